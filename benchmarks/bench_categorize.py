@@ -0,0 +1,103 @@
+#!/usr/bin/env python3
+"""
+Benchmark FileAnalyzer's path categorization against the original
+pattern-by-pattern implementation, and check both agree on every path.
+
+Usage: python benchmarks/bench_categorize.py [--count 100000] [--seed 0]
+"""
+
+import argparse
+import random
+import re
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from ipip.file_analyzer import FileAnalyzer  # noqa: E402
+
+DIRECTORIES = [
+    "", "src", "src/app", "tests", "test", "docs", "build", "dist", "scripts", "bin",
+    "data", "datasets", "assets", "static", "public", "tmp", "temp", "config",
+    "node_modules/pkg", "__pycache__", "lib/utils", "My Project/Sub Dir", "out/x",
+]
+
+STEMS = [
+    "main", "utils", "test_utils", "utils_test", "app.test", "spec_helper", "README",
+    "CHANGELOG", "LICENSE", "config", "settings", "Dockerfile", "docker-compose",
+    ".env", "contest", "latest", "report", "schema", "logo", "style", "backup", "notes",
+    "résumé", "ДАННЫЕ", "Contributing", "index", "setup",
+]
+
+EXTENSIONS = [
+    "", ".py", ".js", ".ts", ".jsx", ".tsx", ".rb", ".go", ".java", ".c", ".h",
+    ".json", ".yaml", ".yml", ".toml", ".ini", ".cfg", ".conf", ".md", ".rst", ".txt",
+    ".pdf", ".o", ".obj", ".exe", ".dll", ".so", ".pyc", ".sh", ".bat", ".ps1",
+    ".csv", ".xml", ".sql", ".db", ".sqlite", ".png", ".JPG", ".jpeg", ".gif", ".svg",
+    ".ico", ".css", ".scss", ".less", ".tmp", ".temp", ".bak", ".backup", "~",
+    ".spec.ts", ".test.js", ".tar.gz", ".PY", ".Json",
+]
+
+
+def legacy_categorize(analyzer: FileAnalyzer, file_str: str) -> int:
+    """The original implementation: one uncompiled re.search per pattern, rule by rule."""
+    rules = [
+        analyzer.test_patterns, analyzer.config_patterns, analyzer.doc_patterns,
+        analyzer.build_patterns, analyzer.script_patterns, analyzer.data_patterns,
+        analyzer.asset_patterns, analyzer.temp_patterns,
+    ]
+    for rank, patterns in enumerate(rules):
+        if any(re.search(pattern, file_str, re.IGNORECASE) for pattern in patterns):
+            return rank
+    return None
+
+
+def synthetic_paths(count: int, seed: int):
+    rng = random.Random(seed)
+    paths = []
+    for _ in range(count):
+        directory = rng.choice(DIRECTORIES)
+        name = rng.choice(STEMS) + rng.choice(EXTENSIONS)
+        paths.append(f"{directory}/{name}" if directory else name)
+    return paths
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--count", type=int, default=100_000)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    analyzer = FileAnalyzer()
+    categorizer = analyzer._categorizer
+    paths = synthetic_paths(args.count, args.seed)
+    names = [path.rsplit("/", 1)[-1] for path in paths]
+
+    start = time.perf_counter()
+    legacy = [legacy_categorize(analyzer, path) for path in paths]
+    legacy_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    compiled = [categorizer.match(path, name) for path, name in zip(paths, names)]
+    compiled_time = time.perf_counter() - start
+
+    mismatches = [(p, a, b) for p, a, b in zip(paths, legacy, compiled) if a != b]
+
+    print(f"{len(paths)} synthetic paths")
+    print(f"legacy:   {legacy_time:.3f}s ({legacy_time / len(paths) * 1e6:.2f} µs/path)")
+    print(f"compiled: {compiled_time:.3f}s ({compiled_time / len(paths) * 1e6:.2f} µs/path)")
+    print(f"speedup:  {legacy_time / compiled_time:.1f}x")
+
+    if mismatches:
+        print(f"{len(mismatches)} mismatches, e.g.:")
+        for path, expected, got in mismatches[:10]:
+            print(f"  {path!r}: legacy={expected} compiled={got}")
+        return 1
+
+    print("categories identical for every path")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
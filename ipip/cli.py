@@ -11,8 +11,10 @@ from .requirements_manager import RequirementsManager
 from .package_searcher import PackageSearcher
 from .file_operations import FileOperationManager
 from .ollama_installer import OllamaInstaller
+from .pypi_client import pypi_client
 from rich.console import Console
 from rich.table import Table
+from rich.live import Live
 
 console = Console()
 
@@ -29,8 +31,18 @@ _setup_done = False
 @click.option('--undo', is_flag=True, help='Emergency undo recent file operations')
 @click.option('--context', is_flag=True, help='Show current file context')
 @click.option('--clear-context', is_flag=True, help='Clear current file context')
+@click.option('--import-popularity', type=click.Path(exists=True, dir_okay=False), help='Import a CSV/Parquet download-statistics dump used to rank packages')
+@click.option('--exclude', multiple=True, help='Gitignore-style pattern to skip when scanning the project (repeatable)')
+@click.option('--full/--roots', 'full_requirements', default=True,
+              help='Pin every installed package (--full, default) or only the top-level packages the project imports (--roots)')
+@click.option('--graph', 'show_graph', is_flag=True, help='Show the dependency graph when creating requirements')
+@click.option('--lock', is_flag=True, help='Write hash-pinned requirements for pip --require-hashes')
+@click.option('--monorepo', is_flag=True, help='Write or update a requirements file for every sub-project of the checkout')
+@click.option('--workers', type=click.IntRange(min=1), default=None, help='Worker threads/processes for scanning and analyzing files')
 @click.pass_context
-def main(ctx, query: tuple, dry_run: bool, verbose: bool, model: str, setup: bool, undo: bool, context: bool, clear_context: bool):
+def main(ctx, query: tuple, dry_run: bool, verbose: bool, model: str, setup: bool, undo: bool, context: bool, clear_context: bool,
+         import_popularity: Optional[str], exclude: tuple, full_requirements: bool, show_graph: bool, lock: bool,
+         monorepo: bool, workers: Optional[int]):
     """
     ipip - Intelligent pip package installer using AI.
     
@@ -39,6 +51,7 @@ def main(ctx, query: tuple, dry_run: bool, verbose: bool, model: str, setup: boo
         ipip "build a chatbot"          # AI suggests relevant packages  
         ipip "move test files to tests" # Organizes files intelligently
         ipip create requirements        # Creates requirements.txt
+        ipip watch requirements         # Keeps requirements.txt in sync
     """
     global _setup_done
     
@@ -66,6 +79,20 @@ def main(ctx, query: tuple, dry_run: bool, verbose: bool, model: str, setup: boo
         console.print("[green]✅ File context cleared[/green]")
         return
     
+    if import_popularity:
+        from pathlib import Path
+        from .popularity import import_popularity as import_snapshot
+        try:
+            index = import_snapshot(Path(import_popularity))
+        except Exception as e:
+            console.print(f"[red]Error: {e}[/red]")
+            if verbose:
+                import traceback
+                console.print(traceback.format_exc())
+            sys.exit(1)
+        console.print(f"[green]✅ Imported download statistics for {len(index)} packages[/green]")
+        return
+    
     # Run auto-setup on first use (unless it's just help)
     if not _setup_done and query and not any(h in str(query) for h in ['--help', '-h']):
         installer = OllamaInstaller(verbose=verbose)
@@ -84,8 +111,8 @@ def main(ctx, query: tuple, dry_run: bool, verbose: bool, model: str, setup: boo
         resolver = LLMResolver(model=model, verbose=verbose)
         installer = PackageInstaller(dry_run=dry_run, verbose=verbose)
         searcher = PackageSearcher(verbose=verbose)
-        requirements_manager = RequirementsManager(verbose=verbose)
-        file_manager = FileOperationManager(dry_run=dry_run, verbose=verbose)
+        requirements_manager = RequirementsManager(verbose=verbose, max_workers=workers, exclude_globs=exclude)
+        file_manager = FileOperationManager(dry_run=dry_run, verbose=verbose, max_workers=workers)
         
         # Use LLM to understand the intent
         intent = resolver.parse_intent(query_str)
@@ -98,12 +125,15 @@ def main(ctx, query: tuple, dry_run: bool, verbose: bool, model: str, setup: boo
         elif intent.action == "search":
             _handle_search(intent, searcher, verbose)
         elif intent.action == "requirements":
-            _handle_requirements(intent, requirements_manager, verbose)
+            _handle_requirements(intent, requirements_manager, verbose, full_requirements, show_graph, lock, monorepo)
         elif intent.action == "file":
             _handle_file_operations(intent, file_manager, verbose)
         else:
             console.print(f"[red]Unknown action: {intent.action}[/red]")
             sys.exit(1)
+        
+        if verbose:
+            pypi_client.show_stats()
             
     except Exception as e:
         console.print(f"[red]Error: {e}[/red]")
@@ -139,42 +169,60 @@ def _handle_install(intent, installer, resolver, dry_run: bool, verbose: bool):
 
 def _handle_search(intent, searcher, verbose: bool):
     """Handle package search and discovery."""
-    # Show progress for package search
-    if not verbose:
-        with console.status("[bold blue]Searching packages...", spinner="dots"):
-            results = searcher.search_packages(intent.target)
-    else:
+    if verbose:
         console.print(f"[blue]Searching for packages related to: {intent.target}[/blue]")
-        results = searcher.search_packages(intent.target)
     
-    if not results:
+    stream = searcher.stream_packages(intent.target)
+    
+    # Local candidates arrive immediately; only wait for the first one
+    with console.status("[bold blue]Searching packages...", spinner="dots"):
+        first = next(stream, None)
+    
+    if first is None:
         console.print(f"[yellow]No packages found for: {intent.target}[/yellow]")
         return
     
-    table = Table(title=f"Packages for '{intent.target}'")
+    # Render rows as they arrive, filling in PyPI details as each fetch completes
+    results = {first.name: first}
+    with Live(_build_search_table(intent.target, results), console=console, refresh_per_second=10) as live:
+        for package in stream:
+            results[package.name] = package
+            live.update(_build_search_table(intent.target, results))
+    
+    # Interactive selection
+    if len(results) > 1:
+        _interactive_package_selection(list(results.values()))
+
+
+def _build_search_table(target: str, results: dict) -> Table:
+    """Build the search results table from the packages received so far."""
+    table = Table(title=f"Packages for '{target}'")
     table.add_column("Package", style="cyan", no_wrap=True)
     table.add_column("Description", style="magenta")
     table.add_column("Version", style="green")
     
-    for result in results:
-        table.add_row(result.name, result.description, result.version)
-    
-    console.print(table)
+    for result in results.values():
+        table.add_row(result.name, result.description, result.version or "[dim]…[/dim]")
     
-    # Interactive selection
-    if len(results) > 1:
-        _interactive_package_selection(results)
+    return table
 
 
-def _handle_requirements(intent, requirements_manager, verbose: bool):
+def _handle_requirements(intent, requirements_manager, verbose: bool, full: bool = True, show_graph: bool = False,
+                         lock: bool = False, monorepo: bool = False):
     """Handle requirements.txt operations."""
-    if "create" in intent.target.lower() or "generate" in intent.target.lower():
-        requirements_manager.create_requirements()
+    if "watch" in intent.target.lower():
+        requirements_manager.watch_requirements(lock=lock)
+    elif monorepo and "update" in intent.target.lower():
+        requirements_manager.update_monorepo_requirements()
+    elif monorepo:
+        requirements_manager.create_monorepo_requirements(lock=lock)
+    elif "create" in intent.target.lower() or "generate" in intent.target.lower():
+        requirements_manager.create_requirements(full=full, show_graph=show_graph, lock=lock)
     elif "update" in intent.target.lower():
         requirements_manager.update_requirements()
     else:
         # Default to create
-        requirements_manager.create_requirements()
+        requirements_manager.create_requirements(full=full, show_graph=show_graph, lock=lock)
 
 
 def _handle_file_operations(intent, file_manager, verbose: bool):
@@ -12,6 +12,27 @@ from rich.console import Console
 console = Console()
 
 
+def get_config_dir() -> Path:
+    """Get the configuration directory."""
+    # Use XDG_CONFIG_HOME if available, otherwise ~/.config
+    if os.name == 'nt':  # Windows
+        config_home = os.environ.get('APPDATA', str(Path.home() / 'AppData' / 'Roaming'))
+        return Path(config_home) / 'ipip'
+    else:  # Unix-like
+        config_home = os.environ.get('XDG_CONFIG_HOME', str(Path.home() / '.config'))
+        return Path(config_home) / 'ipip'
+
+
+def get_cache_dir() -> Path:
+    """Get the cache directory for data ipip can rebuild at any time."""
+    if os.name == 'nt':  # Windows
+        cache_home = os.environ.get('LOCALAPPDATA', str(Path.home() / 'AppData' / 'Local'))
+        return Path(cache_home) / 'ipip' / 'Cache'
+    else:  # Unix-like
+        cache_home = os.environ.get('XDG_CACHE_HOME', str(Path.home() / '.cache'))
+        return Path(cache_home) / 'ipip'
+
+
 @dataclass
 class LLMConfig:
     """Configuration for LLM settings."""
@@ -45,13 +66,7 @@ class ConfigManager:
     
     def _get_config_dir(self) -> Path:
         """Get the configuration directory."""
-        # Use XDG_CONFIG_HOME if available, otherwise ~/.config
-        if os.name == 'nt':  # Windows
-            config_home = os.environ.get('APPDATA', str(Path.home() / 'AppData' / 'Roaming'))
-            return Path(config_home) / 'ipip'
-        else:  # Unix-like
-            config_home = os.environ.get('XDG_CONFIG_HOME', str(Path.home() / '.config'))
-            return Path(config_home) / 'ipip'
+        return get_config_dir()
     
     def load_config(self) -> IpipConfig:
         """Load configuration from file."""
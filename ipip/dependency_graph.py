@@ -0,0 +1,216 @@
+"""
+Installed distribution graph built from package metadata.
+"""
+
+from dataclasses import dataclass, field
+from importlib import metadata as importlib_metadata
+from typing import Dict, Iterable, List, Optional, Set
+
+from packaging.requirements import InvalidRequirement, Requirement
+from packaging.utils import canonicalize_name
+from rich.console import Console
+from rich.tree import Tree
+
+console = Console()
+
+_METADATA_SUFFIXES = ('.dist-info', '.egg-info', '.data')
+
+
+@dataclass
+class InstalledDistribution:
+    """An installed distribution and its edges in the dependency graph."""
+    name: str
+    version: str
+    requires: Set[str] = field(default_factory=set)
+    top_level: Set[str] = field(default_factory=set)
+    metadata: Optional[importlib_metadata.Distribution] = field(default=None, repr=False, compare=False)
+    _modules: Optional[Set[str]] = field(default=None, init=False, repr=False, compare=False)
+
+    @property
+    def key(self) -> str:
+        return canonicalize_name(self.name)
+
+    def provides_module(self, module: str) -> bool:
+        """Check whether the distribution installs anything at or below a dotted module path."""
+        if self._modules is None:
+            # RECORD is only read for the few distributions that share a top-level name
+            self._modules = _module_paths(self.metadata) if self.metadata is not None else set(self.top_level)
+        return module in self._modules
+
+
+class DependencyGraph:
+    """Dependency graph of the installed distributions, keyed by canonical name."""
+
+    def __init__(self, distributions: Dict[str, InstalledDistribution]):
+        self.distributions = distributions
+        self._providers: Dict[str, List[str]] = {}
+        for key, dist in distributions.items():
+            for module in dist.top_level:
+                self._providers.setdefault(module, []).append(key)
+
+    @classmethod
+    def from_environment(cls) -> 'DependencyGraph':
+        """Build the graph from the metadata of every distribution on sys.path."""
+        distributions = {}
+
+        for dist in importlib_metadata.distributions():
+            name = dist.metadata['Name']
+            if not name:
+                continue
+
+            key = canonicalize_name(name)
+            if key in distributions:
+                continue  # First one on sys.path wins, as for imports
+
+            distributions[key] = InstalledDistribution(
+                name=name,
+                version=dist.version,
+                requires=_active_requirements(dist.requires or []),
+                top_level=_top_level_modules(dist),
+                metadata=dist,
+            )
+
+        # Drop edges to distributions that aren't installed
+        for dist in distributions.values():
+            dist.requires &= distributions.keys()
+
+        return cls(distributions)
+
+    def __contains__(self, key: str) -> bool:
+        return key in self.distributions
+
+    def __getitem__(self, key: str) -> InstalledDistribution:
+        return self.distributions[key]
+
+    def versions(self) -> Dict[str, str]:
+        """Get {project name: version} for every installed distribution."""
+        return {dist.name: dist.version for dist in self.distributions.values()}
+
+    def providers(self, import_name: str) -> List[str]:
+        """Get the distributions that provide an import, given its top-level or dotted name.
+
+        Distributions sharing a top-level name (namespace packages such as
+        ``google``) are told apart by the deepest part of the dotted path
+        that any of them installs files for. All of them are returned only
+        when the path doesn't tell them apart.
+        """
+        parts = import_name.split('.')
+        candidates = self._providers.get(parts[0], [])
+        if len(candidates) <= 1:
+            return candidates
+
+        for depth in range(len(parts), 1, -1):
+            module = '.'.join(parts[:depth])
+            matched = [key for key in candidates if self.distributions[key].provides_module(module)]
+            if matched:
+                return matched
+        return candidates
+
+    def closure(self, keys: Iterable[str]) -> Set[str]:
+        """Get the given distributions plus everything they transitively require."""
+        seen = set()
+        stack = [k for k in keys if k in self.distributions]
+        while stack:
+            key = stack.pop()
+            if key in seen:
+                continue
+            seen.add(key)
+            stack.extend(self.distributions[key].requires - seen)
+        return seen
+
+    def minimal_roots(self, keys: Iterable[str]) -> Set[str]:
+        """Get the smallest subset of keys whose closure covers all of them.
+
+        A key is dropped when another key in the set already pulls it in.
+        Within a dependency cycle the alphabetically first member is kept.
+        """
+        keys = {k for k in keys if k in self.distributions}
+        reach = {k: self.closure(self.distributions[k].requires) - {k} for k in keys}
+
+        roots = set()
+        for key in keys:
+            dominated = any(
+                key in reach[other] and not (other in reach[key] and key < other)
+                for other in keys if other != key
+            )
+            if not dominated:
+                roots.add(key)
+
+        return roots
+
+    def show(self, roots: Iterable[str], title: str = "Dependency Graph") -> None:
+        """Print the dependency tree below the given roots."""
+        tree = Tree(f"[bold]{title}[/bold]")
+        expanded: Set[str] = set()
+
+        def add(branch: Tree, key: str) -> None:
+            dist = self.distributions[key]
+            label = f"[cyan]{dist.name}[/cyan] [dim]{dist.version}[/dim]"
+            if key in expanded:
+                branch.add(f"{label} [dim](see above)[/dim]")
+                return
+            expanded.add(key)
+            node = branch.add(label)
+            for child in sorted(dist.requires):
+                add(node, child)
+
+        for key in sorted(roots):
+            if key in self.distributions:
+                add(tree, key)
+
+        console.print(tree)
+
+
+def _active_requirements(requires: Iterable[str]) -> Set[str]:
+    """Get the canonical names of requirements that apply here without extras."""
+    names = set()
+    for line in requires:
+        try:
+            requirement = Requirement(line)
+        except InvalidRequirement:
+            continue
+        if requirement.marker is not None:
+            try:
+                if not requirement.marker.evaluate({'extra': ''}):
+                    continue
+            except Exception:
+                continue
+        names.add(canonicalize_name(requirement.name))
+    return names
+
+
+def _top_level_modules(dist) -> Set[str]:
+    """Get the top-level import names a distribution provides."""
+    top_level = dist.read_text('top_level.txt')
+    if top_level:
+        return {line.strip().replace('/', '.').split('.')[0] for line in top_level.splitlines() if line.strip()}
+
+    modules = set()
+    for path in dist.files or []:
+        parts = path.parts
+        if not parts or parts[0] in ('..', '__pycache__') or parts[0].endswith(_METADATA_SUFFIXES):
+            continue
+        if len(parts) > 1:
+            modules.add(parts[0])
+        elif parts[0].endswith(('.py', '.so', '.pyd')):
+            modules.add(parts[0].split('.', 1)[0])
+
+    return {m for m in modules if m.isidentifier()}
+
+
+def _module_paths(dist) -> Set[str]:
+    """Get the dotted paths of every package and module a distribution installs files in or as."""
+    modules = set()
+    for path in dist.files or []:
+        parts = list(path.parts)
+        if not parts or parts[0] in ('..', '__pycache__') or parts[0].endswith(_METADATA_SUFFIXES):
+            continue
+        if parts[-1].endswith(('.py', '.so', '.pyd')):
+            parts[-1] = parts[-1].split('.', 1)[0]
+        else:
+            parts.pop()  # Data files only vouch for their packages
+        for depth in range(1, len(parts) + 1):
+            if not parts[depth - 1].isidentifier():
+                break
+            modules.add('.'.join(parts[:depth]))
+    return modules
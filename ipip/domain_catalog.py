@@ -0,0 +1,193 @@
+"""
+Domain -> package catalog used for keyword-based package discovery.
+"""
+
+import json
+import os
+import re
+import threading
+from pathlib import Path
+from typing import Dict, List, Optional, Set, Tuple
+from rich.console import Console
+
+from .config import get_config_dir
+
+console = Console()
+
+CATALOG_VERSION = 1
+BUILTIN_CATALOG = Path(__file__).parent / "data" / "domain_catalog.json"
+
+_TOKEN_RE = re.compile(r"[a-z0-9+#]+")
+
+
+class DomainCatalog:
+    """Domain -> package catalog with a compiled keyword index.
+
+    Every word of a domain name and every synonym phrase is a key in one
+    dict, so matching a query costs one lookup per query word (and per
+    word n-gram, for multi-word synonyms) regardless of catalog size.
+    """
+
+    def __init__(self):
+        self.domains: Dict[str, List[Tuple[str, str]]] = {}
+        self.synonyms: Dict[str, List[str]] = {}
+        self._index: Dict[str, Set[str]] = {}
+        self._order: Dict[str, int] = {}
+        self._max_ngram = 1
+
+    def add_catalog(self, data: Dict, source: str = "") -> bool:
+        """Merge a catalog document into this catalog.
+
+        Malformed domains, package entries and synonyms are skipped with a
+        warning; the rest of the document still loads.
+        """
+        if not isinstance(data, dict):
+            console.print(f"[yellow]Warning: Skipping catalog {source}: expected a JSON object[/yellow]")
+            return False
+
+        version = data.get("version", CATALOG_VERSION)
+        if not isinstance(version, int) or version > CATALOG_VERSION:
+            console.print(f"[yellow]Warning: Skipping catalog {source} with unsupported version {version}[/yellow]")
+            return False
+
+        domains = data.get("domains", {})
+        synonyms = data.get("synonyms", {})
+        if not isinstance(domains, dict) or not isinstance(synonyms, dict):
+            console.print(f"[yellow]Warning: Skipping catalog {source}: "
+                          f"\"domains\" and \"synonyms\" must be JSON objects[/yellow]")
+            return False
+
+        for domain, packages in domains.items():
+            if not isinstance(packages, list):
+                console.print(f"[yellow]Warning: Skipping domain {domain!r} in catalog {source}: "
+                              f"expected a list of packages[/yellow]")
+                continue
+
+            entries = self.domains.setdefault(domain.lower(), [])
+            known = {name for name, _ in entries}
+            for entry in packages:
+                parsed = _package_entry(entry)
+                if parsed is None:
+                    console.print(f"[yellow]Warning: Skipping package entry {entry!r} of domain {domain!r} "
+                                  f"in catalog {source}[/yellow]")
+                    continue
+                if parsed[0] not in known:
+                    known.add(parsed[0])
+                    entries.append(parsed)
+
+        for phrase, targets in synonyms.items():
+            if isinstance(targets, str):
+                targets = [targets]
+            if not isinstance(targets, list) or not all(isinstance(d, str) for d in targets):
+                console.print(f"[yellow]Warning: Skipping synonym {phrase!r} in catalog {source}: "
+                              f"expected a list of domain names[/yellow]")
+                continue
+            merged = self.synonyms.setdefault(phrase.lower(), [])
+            merged.extend(d.lower() for d in targets if d.lower() not in merged)
+
+        self._build_index()
+        return True
+
+    def add_file(self, file_path: Path) -> bool:
+        """Merge a catalog file into this catalog."""
+        try:
+            with open(file_path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+        except (OSError, ValueError) as e:
+            console.print(f"[yellow]Warning: Could not load catalog {file_path}: {e}[/yellow]")
+            return False
+
+        return self.add_catalog(data, str(file_path))
+
+    def _build_index(self) -> None:
+        """Compile domain words and synonyms into a single keyword index."""
+        index: Dict[str, Set[str]] = {}
+
+        for domain in self.domains:
+            for word in _tokenize(domain):
+                index.setdefault(word, set()).add(domain)
+
+        for phrase, domains in self.synonyms.items():
+            key = " ".join(_tokenize(phrase))
+            index.setdefault(key, set()).update(d for d in domains if d in self.domains)
+
+        self._index = index
+        self._order = {domain: i for i, domain in enumerate(self.domains)}
+        self._max_ngram = max((key.count(" ") + 1 for key in index), default=1)
+
+    def match_domains(self, query: str) -> List[str]:
+        """Get the domains a query refers to, in catalog order."""
+        words = _tokenize(query)
+        matched: Set[str] = set()
+
+        for n in range(1, self._max_ngram + 1):
+            for i in range(len(words) - n + 1):
+                key = " ".join(words[i:i + n])
+                domains = self._index.get(key)
+                if domains is None and n == 1 and key.endswith("s"):
+                    domains = self._index.get(key[:-1])
+                if domains:
+                    matched.update(domains)
+
+        return sorted(matched, key=self._order.__getitem__)
+
+    def packages_for_query(self, query: str) -> List[Tuple[str, str]]:
+        """Get (name, description) pairs for every domain the query refers to."""
+        packages = []
+        for domain in self.match_domains(query):
+            packages.extend(self.domains[domain])
+        return packages
+
+
+def _package_entry(entry) -> Optional[Tuple[str, str]]:
+    """Get (name, description) from a "name" or ["name", "description"] entry, or None if malformed."""
+    if isinstance(entry, str):
+        return (entry, "") if entry else None
+    if (isinstance(entry, list) and 1 <= len(entry) <= 2
+            and all(isinstance(part, str) for part in entry) and entry[0]):
+        return entry[0], entry[1] if len(entry) > 1 else ""
+    return None
+
+
+def _tokenize(text: str) -> List[str]:
+    return _TOKEN_RE.findall(text.lower())
+
+
+def get_user_catalog_paths() -> List[Path]:
+    """Get user catalog files: the config ``catalog`` directory plus ``IPIP_CATALOG_PATH``."""
+    paths = []
+
+    catalog_dir = get_config_dir() / "catalog"
+    if catalog_dir.is_dir():
+        paths.extend(sorted(catalog_dir.glob("*.json")))
+
+    for entry in os.environ.get("IPIP_CATALOG_PATH", "").split(os.pathsep):
+        if not entry:
+            continue
+        path = Path(entry)
+        if path.is_dir():
+            paths.extend(sorted(path.glob("*.json")))
+        elif path.exists():
+            paths.append(path)
+
+    return paths
+
+
+_catalog: Optional[DomainCatalog] = None
+_catalog_lock = threading.Lock()
+
+
+def get_domain_catalog() -> DomainCatalog:
+    """Load the built-in catalog and any user catalogs once, on first use."""
+    global _catalog
+
+    if _catalog is None:
+        with _catalog_lock:
+            if _catalog is None:
+                catalog = DomainCatalog()
+                catalog.add_file(BUILTIN_CATALOG)
+                for path in get_user_catalog_paths():
+                    catalog.add_file(path)
+                _catalog = catalog
+
+    return _catalog
@@ -4,6 +4,7 @@ Emergency undo functionality for file operations.
 
 import json
 import shutil
+import threading
 from pathlib import Path
 from typing import List, Dict
 from rich.console import Console
@@ -12,11 +13,21 @@ from datetime import datetime
 console = Console()
 
 class FileOperationLogger:
-    """Logs all file operations for potential undo."""
+    """Logs all file operations for potential undo.
+    
+    Safe to call from several threads. Each call returns only once the log
+    on disk includes its entry, but one write covers every entry logged
+    while the previous write was in progress. New entries are spliced in
+    before the closing bracket rather than rewriting the whole file.
+    """
     
     def __init__(self):
         self.log_file = Path.home() / ".ipip_file_operations.json"
         self.operations = []
+        self._lock = threading.Lock()
+        self._save_lock = threading.Lock()
+        self._saved_count = 0
+        self._saved_size = None  # size of the log as last written, to notice outside changes
     
     def log_operation(self, operation: str, source: str, target: str):
         """Log a file operation."""
@@ -26,16 +37,45 @@ class FileOperationLogger:
             "source": source,
             "target": target
         }
-        self.operations.append(entry)
-        self._save_log()
+        with self._lock:
+            self.operations.append(entry)
+            logged_count = len(self.operations)
+        
+        with self._save_lock:
+            if self._saved_count < logged_count:
+                self._save_log()
     
     def _save_log(self):
         """Save operations log to file."""
+        with self._lock:
+            operations = list(self.operations)
         try:
-            with open(self.log_file, 'w') as f:
-                json.dump(self.operations, f, indent=2)
+            if self._saved_count and self._saved_size == self._log_size():
+                self._append_log(operations[self._saved_count:])
+            else:
+                with open(self.log_file, 'w') as f:
+                    json.dump(operations, f, indent=2)
+            self._saved_size = self._log_size()
         except Exception as e:
+            self._saved_size = None
             console.print(f"[yellow]Warning: Could not save operation log: {e}[/yellow]")
+        self._saved_count = len(operations)
+    
+    def _append_log(self, entries: List[Dict]):
+        """Add entries to the saved log, laid out exactly as json.dump(..., indent=2) would."""
+        text = ''.join(
+            ',\n' + '\n'.join('  ' + line for line in json.dumps(entry, indent=2).splitlines())
+            for entry in entries
+        )
+        with open(self.log_file, 'r+b') as f:
+            f.seek(-len(b'\n]'), 2)
+            f.write(text.encode('utf-8') + b'\n]')
+    
+    def _log_size(self):
+        try:
+            return self.log_file.stat().st_size
+        except OSError:
+            return None
     
     def load_recent_operations(self, hours: int = 1) -> List[Dict]:
         """Load recent operations for potential undo."""
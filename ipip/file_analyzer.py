@@ -2,16 +2,25 @@
 File analysis module for intelligent file operations.
 """
 
+import hashlib
 import os
 import re
 import mimetypes
+from array import array
+from bisect import bisect_left
+from collections.abc import Sequence
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
 from pathlib import Path
-from typing import List, Dict, Set, Optional, Tuple
+from typing import Callable, Iterable, Iterator, List, Dict, Set, Optional, Tuple
 from dataclasses import dataclass
 from enum import Enum
-from rich.progress import Progress, SpinnerColumn, TextColumn, BarColumn, TaskProgressColumn, TimeElapsedColumn
+from rich.progress import Progress, SpinnerColumn, TextColumn, TimeElapsedColumn
 from rich.console import Console
 
+from .file_index import FileIndex, IndexedFile
+from .ignore import IgnoreTree
+
 class FileCategory(Enum):
     """Categories of files for organization."""
     TEST = "test"
@@ -37,13 +46,474 @@ class FileInfo:
     purpose: str
     confidence: float
     related_files: List[str]
+    modified: float = 0.0  # mtime as a timestamp, 0 if unknown
+
+@dataclass
+class DuplicateGroup:
+    """Files with identical content; the first path is the copy to keep."""
+    size: int
+    paths: List[Path]
+    
+    @property
+    def keep(self) -> Path:
+        return self.paths[0]
+    
+    @property
+    def duplicates(self) -> List[Path]:
+        return self.paths[1:]
+    
+    @property
+    def reclaimable(self) -> int:
+        """Bytes freed by removing every copy but the one kept."""
+        return self.size * (len(self.paths) - 1)
+
+# Path components that are never descended into or analyzed (compared lower-case).
+# Anything starting with "." is excluded as well.
+EXCLUDED_DIR_NAMES = frozenset({
+    # Virtual environment directories
+    'venv', '.venv', 'env', '.env', 'virtualenv',
+    'test_env', 'dev_env', 'prod_env', 'conda_env',
+    'pipenv', '.pipenv', 'poetry_env', '.poetry',
+    # Version control and system directories
+    '.git', '.svn', '.hg', '.bzr',
+    '__pycache__', '.pytest_cache', '.coverage',
+    'node_modules', '.npm', '.yarn',
+    '.cargo', 'target',  # Rust
+    '.gradle', '.m2',    # Java
+    # IDE and editor directories
+    '.vscode', '.idea', '.eclipse', '.netbeans',
+    '.sublime-project', '.sublime-workspace',
+    '.atom', '.brackets', '.emacs.d',
+    # Build and distribution directories
+    'build', 'dist', 'out', 'bin', 'obj',
+    '.tox', '.nox', 'htmlcov', 'coverage',
+    'site-packages', 'lib64', 'include',
+})
+
+# File names that are never analyzed (compared lower-case)
+EXCLUDED_FILE_NAMES = frozenset({
+    # OS-specific files
+    'thumbs.db', '.ds_store', 'desktop.ini',
+    '.trash', '.recycle.bin', 'pagefile.sys',
+    # Critical project files that should never be moved
+    'setup.py', 'pyproject.toml', 'setup.cfg',
+    'requirements.txt', 'pipfile', 'pipfile.lock',
+    'package.json', 'package-lock.json', 'yarn.lock',
+    'makefile', 'dockerfile', 'docker-compose.yml',
+    'cargo.toml', 'cargo.lock',
+    '.gitignore', '.gitattributes',
+    'license', 'license.txt', 'license.md',
+    'readme.md', 'readme.txt', 'readme.rst',
+    # Environment and config files that are location-specific
+    '.env', '.env.local', '.env.production',
+    'config.ini', 'local_settings.py',
+    'secrets.json', 'credentials.json',
+})
+
+# Extensions that are never analyzed (compared lower-case)
+EXCLUDED_EXTENSIONS = frozenset({
+    # Executable and binary files
+    '.exe', '.dll', '.so', '.dylib', '.bin',
+    '.msi', '.pkg', '.deb', '.rpm', '.dmg',
+    # Large data/media files (usually shouldn't be moved automatically)
+    '.iso', '.img', '.vmdk', '.vdi', '.ova',
+    '.mp4', '.avi', '.mkv', '.mov', '.wmv',
+    '.db', '.sqlite', '.mdb', '.accdb',
+})
+
+
+def _is_excluded_part(part: str) -> bool:
+    """Check if a lower-case path component excludes everything below it."""
+    return (part.startswith('.') and part not in ('.', '..')) or part in EXCLUDED_DIR_NAMES
+
+
+def _is_included_name(name: str) -> bool:
+    """Check a lower-case file name against the file name and extension exclusions."""
+    return name not in EXCLUDED_FILE_NAMES and os.path.splitext(name)[1] not in EXCLUDED_EXTENSIONS
+
+
+# Patterns of the form ".*\.ext$" or "\.ext$" only test the file's extension
+_EXTENSION_PATTERN = re.compile(r'^(?:\.\*)?\\\.([A-Za-z0-9]+)\$$')
+
+
+def _strip_wildcards(pattern: str) -> str:
+    """Drop leading and trailing ".*", which can't change whether re.search finds a match."""
+    while pattern.startswith('.*') and pattern[2:3] not in ('?', '+', '*', '{'):
+        pattern = pattern[2:]
+    while pattern.endswith('.*') and not pattern.endswith('\\.*') and pattern != '.*':
+        pattern = pattern[:-2]
+    return pattern
+
+
+class PatternCategorizer:
+    """Compiled form of an ordered list of rules, each a list of regex patterns.
+    
+    Matches exactly like running ``re.search(pattern, path, re.IGNORECASE)``
+    over every pattern of every rule in order and taking the first rule with
+    a hit, but in at most one dict lookup and one regex search:
+    
+    * extension-only patterns become a table from extension to the first
+      rule that lists it;
+    * every other pattern is folded into one anchored alternation of
+      lookaheads, one named group per rule in rule order, so the first
+      alternative that succeeds is the highest-priority rule. One such
+      regex is compiled per rule count, so an extension hit only has to be
+      checked against the path rules that outrank it.
+    """
+    
+    def __init__(self, rules: List[List[str]]):
+        self.extensions: Dict[str, int] = {}
+        path_patterns: List[List[str]] = []
+        
+        for rank, patterns in enumerate(rules):
+            remaining = []
+            for pattern in patterns:
+                match = _EXTENSION_PATTERN.match(pattern)
+                if match:
+                    self.extensions.setdefault('.' + match.group(1).lower(), rank)
+                else:
+                    remaining.append(pattern)
+            path_patterns.append(remaining)
+        
+        # by_rank[r] only holds the path rules that outrank rule r
+        self.by_rank = [self._compile(path_patterns[:rank]) for rank in range(len(rules) + 1)]
+        # Reference form with every pattern, for names the extension table can't decide
+        self.full = self._compile(rules)
+    
+    def _compile(self, rule_patterns: List[List[str]]) -> Optional['re.Pattern']:
+        alternatives = []
+        for rank, patterns in enumerate(rule_patterns):
+            if patterns:
+                # A lookahead searches like re.search; the empty group records which rule hit
+                body = '|'.join(f'(?:{_strip_wildcards(pattern)})' for pattern in patterns)
+                alternatives.append(f'(?=[\\s\\S]*?(?:{body}))(?P<r{rank}>)')
+        if not alternatives:
+            return None
+        return re.compile('^(?:' + '|'.join(alternatives) + ')', re.IGNORECASE)
+    
+    def match(self, path: str, name: str) -> Optional[int]:
+        """Get the index of the first rule matching path (whose last component is name)."""
+        # "$" also matches before a trailing newline
+        stem = name[:-1] if name.endswith('\n') else name
+        dot = stem.rfind('.')
+        extension = stem[dot:] if dot >= 0 else ''
+        
+        # Non-ASCII extensions may case-fold differently from str.lower()
+        if not extension.isascii():
+            return self._search(self.full, path)
+        
+        rank = self.extensions.get(extension.lower())
+        if rank is None:
+            return self._search(self.by_rank[-1], path)
+        
+        better = self._search(self.by_rank[rank], path)
+        return rank if better is None else better
+    
+    @staticmethod
+    def _search(regex: Optional['re.Pattern'], path: str) -> Optional[int]:
+        if regex is None:
+            return None
+        match = regex.match(path)
+        return int(match.lastgroup[1:]) if match else None
+
+
+# Affixes marking a test for the module named by the rest of the stem (compared lower-case)
+_TEST_PREFIXES = ('test_', 'tests_')
+_TEST_SUFFIXES = ('_test', '_tests', '.test', '.spec', '_spec')
+
+
+def _stem_key(stem: str) -> Tuple[str, bool]:
+    """Get a stem's index key and whether it names a test, e.g. "test_Foo" -> ("foo", True)."""
+    key = stem.lower()
+    for prefix in _TEST_PREFIXES:
+        if key.startswith(prefix) and len(key) > len(prefix):
+            return key[len(prefix):], True
+    for suffix in _TEST_SUFFIXES:
+        if key.endswith(suffix) and len(key) > len(suffix):
+            return key[:-len(suffix)], True
+    return key, False
+
+
+# "first 20 test files", "top 5 python files"
+_RESULT_LIMIT = re.compile(r'\b(?:first|top)\s+(\d+)\b', re.IGNORECASE)
+
+
+def parse_result_limit(query: str) -> Optional[int]:
+    """Get the number of results a query asks for, if it asks for a specific number."""
+    match = _RESULT_LIMIT.search(query)
+    return int(match.group(1)) if match else None
+
+
+# Below this many files, a thread pool costs more than it saves
+PARALLEL_ANALYSIS_THRESHOLD = 64
+
+# Analysis progress is refreshed once per this many files
+PROGRESS_BATCH_SIZE = 64
+
+# Content sniffing only looks at this many leading bytes, however large the file
+SNIFF_BYTES = 64 * 1024
+
+# Files listed per AI matching prompt; trees this small are sent whole
+AI_PROMPT_FILES = 50
+
+# Broad queries send at most this many files to AI, in batches of AI_PROMPT_FILES
+AI_MAX_CANDIDATES = 1000
+
+# AI matching batches in flight at once
+AI_CONCURRENCY = 4
+
+# Duplicate candidates are compared on this many bytes from each end before being hashed in full
+DUPLICATE_SAMPLE_BYTES = 16 * 1024
+
+
+def _sample_digest(path: Path, size: int) -> Optional[bytes]:
+    """Hash a file's first and last DUPLICATE_SAMPLE_BYTES, which is the whole file when it's small."""
+    try:
+        with open(path, 'rb') as f:
+            hasher = hashlib.blake2b(f.read(DUPLICATE_SAMPLE_BYTES), digest_size=16)
+            if size > 2 * DUPLICATE_SAMPLE_BYTES:
+                f.seek(-DUPLICATE_SAMPLE_BYTES, os.SEEK_END)
+            hasher.update(f.read())
+        return hasher.digest()
+    except OSError:
+        return None
+
+
+def _full_digest(path: Path) -> Optional[str]:
+    from .lockfile import hash_file
+    
+    try:
+        return hash_file(path)
+    except OSError:
+        return None
+
+
+def _sniff_python(content: bytes) -> str:
+    """Guess a Python file's purpose from the start of its content."""
+    if b'import unittest' in content or b'import pytest' in content or b'def test_' in content:
+        return "Python test file"
+    elif b'if __name__ == "__main__"' in content:
+        return "Python script"
+    elif b'class ' in content and b'def ' in content:
+        return "Python module with classes"
+    elif b'def ' in content:
+        return "Python module with functions"
+    else:
+        return "Python source file"
+
+
+def _sniff_javascript(content: bytes) -> str:
+    """Guess a JavaScript/TypeScript file's purpose from the start of its content."""
+    if b'describe(' in content or b'it(' in content or b'test(' in content:
+        return "JavaScript test file"
+    elif b'export default' in content or b'module.exports' in content:
+        return "JavaScript module"
+    elif b'React' in content or b'jsx' in content.lower():
+        return "React component"
+    else:
+        return "JavaScript source file"
+
+
+class StemIndex:
+    """Index of file stems for finding related files without comparing every pair.
+    
+    Within a directory, files are related when one normalized stem is a
+    prefix of the other ("utils" and "utils_io", "app" and "test_app").
+    Across directories, a test is related to the modules its stem names
+    ("tests/test_foo.py" and "src/foo.py").
+    """
+    
+    def __init__(self, paths: Iterable[Path] = ()):
+        # Per directory: key -> paths, plus the keys sorted for prefix range lookups
+        self._dirs: Dict[Path, Tuple[Dict[str, List[Path]], List[str]]] = {}
+        self._tests: Dict[str, List[Path]] = {}
+        self._modules: Dict[str, List[Path]] = {}
+        self.add(paths)
+    
+    def add(self, paths: Iterable[Path]) -> None:
+        """Add files to the index, e.g. one directory at a time while streaming."""
+        by_dir: Dict[Path, Dict[str, List[Path]]] = {}
+        for path in paths:
+            key, is_test = _stem_key(path.stem)
+            by_dir.setdefault(path.parent, {}).setdefault(key, []).append(path)
+            (self._tests if is_test else self._modules).setdefault(key, []).append(path)
+        
+        for directory, keys in by_dir.items():
+            if directory in self._dirs:
+                existing = self._dirs[directory][0]
+                for key, key_paths in keys.items():
+                    existing.setdefault(key, []).extend(key_paths)
+                keys = existing
+            self._dirs[directory] = (keys, sorted(keys))
+    
+    def related(self, path: Path) -> List[str]:
+        """Get the files related to path, same-directory matches first."""
+        key, is_test = _stem_key(path.stem)
+        related: List[Path] = []
+        
+        entry = self._dirs.get(path.parent)
+        if entry is not None and key:
+            keys, sorted_keys = entry
+            
+            # Keys this key is a prefix of (including itself)
+            for i in range(bisect_left(sorted_keys, key), len(sorted_keys)):
+                if not sorted_keys[i].startswith(key):
+                    break
+                related.extend(keys[sorted_keys[i]])
+            
+            # Keys that are a prefix of this key
+            for length in range(1, len(key)):
+                related.extend(keys.get(key[:length], ()))
+        
+        # Tests pair with the modules they name anywhere in the tree, and vice versa
+        for other in (self._modules if is_test else self._tests).get(key, ()):
+            if other.parent != path.parent:
+                related.append(other)
+        
+        seen = {path}
+        result = []
+        for other in related:
+            if other not in seen:
+                seen.add(other)
+                result.append(str(other))
+        return result
+
+
+# (size, modified, category, purpose, confidence) of one analyzed file
+AnalysisRow = Tuple[int, float, FileCategory, str, float]
+
+# Category codes stored by FileInfoTable, in declaration order
+_CATEGORIES = list(FileCategory)
+_CATEGORY_CODES = {category: code for code, category in enumerate(_CATEGORIES)}
+
+
+class FileInfoView(FileInfo):
+    """A FileInfo materialized from one row of a FileInfoTable.
+
+    Related files are only looked up when first read.
+    """
+
+    def __init__(self, table: 'FileInfoTable', row: int, path: Path, size: int, modified: float,
+                 category: FileCategory, purpose: str, confidence: float):
+        self.path = path
+        self.name = path.name
+        self.extension = path.suffix.lower()
+        self.size = size
+        self.modified = modified
+        self.category = category
+        self.purpose = purpose
+        self.confidence = confidence
+        self._table = table
+        self._row = row
+        self._related_files: Optional[List[str]] = None
+
+    @property
+    def related_files(self) -> List[str]:
+        if self._related_files is None:
+            self._related_files = self._table.related_files(self._row)
+        return self._related_files
+
+    @related_files.setter
+    def related_files(self, value: List[str]) -> None:
+        self._related_files = value
+
+
+class FileInfoTable(Sequence):
+    """Column-oriented storage for the FileInfo of a whole directory tree.
+
+    A FileInfo object with its Path costs around a kilobyte; a row here
+    costs a few dozen bytes. Each column is a typed array: category codes,
+    sizes, mtimes, the row's parent directory in a table of distinct directories,
+    and its (purpose, confidence) pair in a table of distinct pairs, which
+    only hold a handful of values. File names are packed into one UTF-8
+    buffer. Indexing materializes a FileInfoView on demand, so the table
+    can be used wherever a list of FileInfo is expected.
+    """
+
+    def __init__(self):
+        self._directories: List[str] = []
+        self._directory_codes: Dict[str, int] = {}
+        self._analyses: List[Tuple[str, float]] = []
+        self._analysis_codes: Dict[Tuple[str, float], int] = {}
+
+        self._parents = array('I')
+        self._categories = array('B')
+        self._sizes = array('q')
+        self._modified = array('d')
+        self._purposes = array('I')
+        self._name_offsets = array('q', [0])
+        self._names = bytearray()
+
+        # Built on the first related-files lookup and extended with rows added since
+        self._related_index: Optional[StemIndex] = None
+        self._related_rows = 0
+
+    def append(self, path: Path, size: int, modified: float,
+               category: FileCategory, purpose: str, confidence: float) -> None:
+        """Add one analyzed file as a new row."""
+        directory, name = os.path.split(str(path))
+
+        parent = self._directory_codes.get(directory)
+        if parent is None:
+            parent = self._directory_codes[directory] = len(self._directories)
+            self._directories.append(directory)
+
+        analysis = (purpose, confidence)
+        code = self._analysis_codes.get(analysis)
+        if code is None:
+            code = self._analysis_codes[analysis] = len(self._analyses)
+            self._analyses.append(analysis)
+
+        self._parents.append(parent)
+        self._categories.append(_CATEGORY_CODES[category])
+        self._sizes.append(size)
+        self._modified.append(modified)
+        self._purposes.append(code)
+        self._names += name.encode('utf-8', 'surrogatepass')
+        self._name_offsets.append(len(self._names))
+
+    def __len__(self) -> int:
+        return len(self._sizes)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self[row] for row in range(*index.indices(len(self)))]
+
+        row = index + len(self) if index < 0 else index
+        if not 0 <= row < len(self):
+            raise IndexError("FileInfoTable index out of range")
+
+        purpose, confidence = self._analyses[self._purposes[row]]
+        return FileInfoView(self, row, self.path(row), self._sizes[row], self._modified[row],
+                            _CATEGORIES[self._categories[row]], purpose, confidence)
+
+    def path(self, row: int) -> Path:
+        """Get the path of a row without materializing the rest of it."""
+        name = self._names[self._name_offsets[row]:self._name_offsets[row + 1]].decode('utf-8', 'surrogatepass')
+        return Path(os.path.join(self._directories[self._parents[row]], name))
+
+    def related_files(self, row: int) -> List[str]:
+        """Get the files related to a row among all rows added so far."""
+        if self._related_index is None:
+            self._related_index = StemIndex()
+        if self._related_rows < len(self):
+            self._related_index.add(self.path(r) for r in range(self._related_rows, len(self)))
+            self._related_rows = len(self)
+        return self._related_index.related(self.path(row))
+
 
 class FileAnalyzer:
     """Analyzes files to determine their purpose and category."""
     
-    def __init__(self, verbose: bool = False):
+    def __init__(self, verbose: bool = False, max_workers: Optional[int] = None, use_index: bool = True,
+                 use_ignore_files: bool = True):
         self.verbose = verbose
+        self.max_workers = max_workers
+        self.use_index = use_index
+        self.use_ignore_files = use_ignore_files
         self.console = Console()
+        self._directory_indexes: Dict[Path, StemIndex] = {}
+        self._sniff_cache: Dict[Tuple[str, int, int], str] = {}
         self.test_patterns = [
             r'test_.*\.py$',
             r'.*_test\.py$',
@@ -141,19 +611,49 @@ class FileAnalyzer:
             r'temp/.*',
             r'tmp/.*',
         ]
+        
+        self._category_rules = [
+            (FileCategory.TEST, "Test file", 0.9),
+            (FileCategory.CONFIG, "Configuration file", 0.8),
+            (FileCategory.DOCUMENTATION, "Documentation file", 0.8),
+            (FileCategory.BUILD, "Build artifact", 0.9),
+            (FileCategory.SCRIPT, "Script file", 0.7),
+            (FileCategory.DATA, "Data file", 0.7),
+            (FileCategory.ASSET, "Asset file", 0.8),
+            (FileCategory.TEMPORARY, "Temporary file", 0.9),
+        ]
+        self._categorizer = PatternCategorizer([
+            self.test_patterns,
+            self.config_patterns,
+            self.doc_patterns,
+            self.build_patterns,
+            self.script_patterns,
+            self.data_patterns,
+            self.asset_patterns,
+            self.temp_patterns,
+        ])
     
-    def analyze_file(self, file_path: Path) -> FileInfo:
-        """Analyze a single file to determine its purpose and category."""
+    def analyze_file(self, file_path: Path, stat_result: Optional[os.stat_result] = None,
+                     related_index: Optional[StemIndex] = None) -> FileInfo:
+        """Analyze a single file to determine its purpose and category.
+        
+        Pass ``stat_result`` when the caller already has it (e.g. from a
+        ``DirEntry``) to avoid another stat call, and ``related_index`` to
+        look up related files in a prebuilt index.
+        """
         name = file_path.name
         extension = file_path.suffix.lower()
         
-        try:
-            size = file_path.stat().st_size
-        except (OSError, FileNotFoundError):
-            size = 0
+        if stat_result is None:
+            try:
+                stat_result = file_path.stat()
+            except (OSError, FileNotFoundError):
+                pass
+        size = stat_result.st_size if stat_result is not None else 0
+        modified = stat_result.st_mtime if stat_result is not None else 0.0
         
-        category, purpose, confidence = self._categorize_file(file_path)
-        related_files = self._find_related_files(file_path)
+        category, purpose, confidence = self._categorize_file(file_path, stat_result)
+        related_files = self._find_related_files(file_path, related_index)
         
         return FileInfo(
             path=file_path,
@@ -163,234 +663,292 @@ class FileAnalyzer:
             category=category,
             purpose=purpose,
             confidence=confidence,
-            related_files=related_files
+            related_files=related_files,
+            modified=modified
         )
     
-    def analyze_directory(self, directory: Path, recursive: bool = True) -> List[FileInfo]:
-        """Analyze all files in a directory, excluding system and sensitive files."""
-        files = []
+    def analyze_directory(self, directory: Path, recursive: bool = True) -> FileInfoTable:
+        """Analyze all files in a directory, excluding system and sensitive files.
+        
+        Analyses are kept in a persistent per-directory index, so files in
+        directories unchanged since the last command are not analyzed again.
+        Results are collected into a compact FileInfoTable rather than one
+        FileInfo object per file.
+        """
+        files = FileInfoTable()
+        cached = 0
         
-        # First pass: collect all file paths (for progress tracking)
         if self.verbose:
             self.console.print(f"[blue]📁 Scanning directory: {directory}[/blue]")
         
-        all_file_paths = []
-        scanned_count = 0
-        
-        # Show scanning progress for large directories
+        # Scanning and analysis are one streaming pass, so the total isn't known up front
         with Progress(
             SpinnerColumn(),
             TextColumn("[progress.description]{task.description}"),
-            TextColumn("[cyan]{task.completed}[/cyan] files found"),
+            TextColumn("[cyan]{task.completed}[/cyan] files"),
             TimeElapsedColumn(),
             console=self.console,
-            transient=True
-        ) as scan_progress:
+            transient=True  # Remove progress display when complete
+        ) as progress:
             
-            scan_task = scan_progress.add_task("[cyan]Scanning...", total=None)
-            
-            if recursive:
-                for file_path in directory.rglob('*'):
-                    scanned_count += 1
-                    if scanned_count % 100 == 0:  # Update every 100 files
-                        scan_progress.update(scan_task, completed=len(all_file_paths), description=f"[cyan]Scanning... ({scanned_count} checked)")
-                    
-                    if file_path.is_file() and self._should_include_file(file_path):
-                        all_file_paths.append(file_path)
-            else:
-                for file_path in directory.iterdir():
-                    scanned_count += 1
-                    scan_progress.update(scan_task, completed=len(all_file_paths))
-                    
-                    if file_path.is_file() and self._should_include_file(file_path):
-                        all_file_paths.append(file_path)
+            task = progress.add_task("[cyan]Analyzing files...", total=None)
             
-            scan_progress.update(scan_task, completed=len(all_file_paths), description=f"[cyan]Scan complete")
-        
-        # Second pass: analyze files with progress bar
-        if len(all_file_paths) > 10 or self.verbose:  # Show progress for 10+ files or in verbose mode
-            with Progress(
-                SpinnerColumn(),
-                TextColumn("[progress.description]{task.description}"),
-                BarColumn(),
-                TaskProgressColumn(),
-                TextColumn("files"),
-                TimeElapsedColumn(),
-                console=self.console,
-                transient=True  # Remove progress bar when complete
-            ) as progress:
-                
-                task = progress.add_task(
-                    f"[cyan]Analyzing files...", 
-                    total=len(all_file_paths)
-                )
+            pending = 0
+            for item, row in self._iter_analyzed_rows(directory, recursive):
+                files.append(item.path, *row)
+                cached += item.is_cached
+                pending += 1
                 
-                for file_path in all_file_paths:
-                    files.append(self.analyze_file(file_path))
-                    progress.advance(task)
+                # Refresh progress per batch rather than per file
+                if pending >= PROGRESS_BATCH_SIZE:
+                    progress.advance(task, pending)
+                    pending = 0
                     
                     # Update description with current file (for very verbose mode)
-                    if self.verbose and len(all_file_paths) > 50:
-                        progress.update(task, description=f"[cyan]Analyzing: {file_path.name[:30]}...")
-        else:
-            # For small numbers of files, just process without progress bar
-            for file_path in all_file_paths:
-                files.append(self.analyze_file(file_path))
+                    if self.verbose:
+                        progress.update(task, description=f"[cyan]Analyzing: {item.path.name[:30]}...")
+            
+            progress.advance(task, pending)
         
         if self.verbose:
-            self.console.print(f"[green]✅ Analyzed {len(files)} files[/green]")
+            self.console.print(f"[green]✅ Analyzed {len(files)} files ({cached} from index)[/green]")
         
         return files
     
-    def _should_include_file(self, file_path: Path) -> bool:
-        """Check if a file should be included in analysis (excludes system/sensitive files)."""
-        path_str = str(file_path).replace('\\', '/')
-        path_parts = path_str.lower().split('/')
-        file_name = file_path.name.lower()
-        
-        # CRITICAL EXCLUSIONS - Never touch these!
-        
-        # 1. Hidden files and directories (starting with .)
-        for part in path_parts:
-            if part.startswith('.') and part not in ['.', '..']:
-                return False
-        
-        # 2. Virtual environment directories
-        env_dirs = {
-            'venv', '.venv', 'env', '.env', 'virtualenv', 
-            'test_env', 'dev_env', 'prod_env', 'conda_env',
-            'pipenv', '.pipenv', 'poetry_env', '.poetry'
-        }
-        for part in path_parts:
-            if part in env_dirs:
-                return False
-        
-        # 3. Version control and system directories
-        system_dirs = {
-            '.git', '.svn', '.hg', '.bzr',
-            '__pycache__', '.pytest_cache', '.coverage',
-            'node_modules', '.npm', '.yarn',
-            '.cargo', 'target',  # Rust
-            '.gradle', '.m2',    # Java
-        }
-        for part in path_parts:
-            if part in system_dirs:
-                return False
-        
-        # 4. IDE and editor directories
-        ide_dirs = {
-            '.vscode', '.idea', '.eclipse', '.netbeans',
-            '.sublime-project', '.sublime-workspace',
-            '.atom', '.brackets', '.emacs.d'
-        }
-        for part in path_parts:
-            if part in ide_dirs:
-                return False
-        
-        # 5. Build and distribution directories
-        build_dirs = {
-            'build', 'dist', 'target', 'out', 'bin', 'obj',
-            '.tox', '.nox', 'htmlcov', 'coverage',
-            'site-packages', 'lib64', 'include'
-        }
-        for part in path_parts:
-            if part in build_dirs:
-                return False
-        
-        # 6. OS-specific files
-        os_files = {
-            'thumbs.db', '.ds_store', 'desktop.ini',
-            '.trash', '.recycle.bin', 'pagefile.sys'
-        }
-        if file_name in os_files:
-            return False
+    def iter_analyze_directory(self, directory: Path, recursive: bool = True) -> Iterator[FileInfo]:
+        """Analyze files lazily, one directory at a time, yielding each FileInfo as soon as it's ready.
+        
+        Nothing is collected up front, so matching and display can start at
+        once and a consumer that stops early also stops the walk. Related
+        files can only point at files already yielded.
+        """
+        files = FileInfoTable()
+        for item, row in self._iter_analyzed_rows(directory, recursive):
+            files.append(item.path, *row)
+            yield files[-1]
+    
+    def _iter_analyzed_rows(self, directory: Path,
+                            recursive: bool) -> Iterator[Tuple[IndexedFile, AnalysisRow]]:
+        """Scan and analyze one directory at a time, yielding (file, analysis) in walk order.
         
-        # 7. Critical project files that should never be moved
-        critical_files = {
-            'setup.py', 'pyproject.toml', 'setup.cfg',
-            'requirements.txt', 'pipfile', 'pipfile.lock',
-            'package.json', 'package-lock.json', 'yarn.lock',
-            'makefile', 'dockerfile', 'docker-compose.yml',
-            'cargo.toml', 'cargo.lock',
-            '.gitignore', '.gitattributes',
-            'license', 'license.txt', 'license.md',
-            'readme.md', 'readme.txt', 'readme.rst'
-        }
-        if file_name in critical_files:
-            return False
+        One thread pool serves every directory, and each directory is written
+        back to the index as soon as all of its files are analyzed.
+        """
+        index = self._open_index(directory)
         
-        # 8. Executable and binary files (be careful with these)
-        dangerous_extensions = {
-            '.exe', '.dll', '.so', '.dylib', '.bin',
-            '.msi', '.pkg', '.deb', '.rpm', '.dmg'
-        }
-        if file_path.suffix.lower() in dangerous_extensions:
-            return False
+        workers = self.max_workers or min(32, (os.cpu_count() or 1) + 4)
+        executor = ThreadPoolExecutor(max_workers=workers) if workers > 1 else None
         
-        # 9. Large data/media files (usually shouldn't be moved automatically)
-        large_file_extensions = {
-            '.iso', '.img', '.vmdk', '.vdi', '.ova',
-            '.mp4', '.avi', '.mkv', '.mov', '.wmv',
-            '.db', '.sqlite', '.mdb', '.accdb'
-        }
-        if file_path.suffix.lower() in large_file_extensions:
-            return False
+        try:
+            for current, items in self._iter_scan_batches(directory, recursive, index):
+                if executor is not None and len(items) > 1:
+                    rows = executor.map(self._analyze_row, items)
+                else:
+                    rows = map(self._analyze_row, items)
+                
+                analyzed = []
+                for item, row in zip(items, rows):
+                    analyzed.append((item, row))
+                    yield item, row
+                
+                if index is not None:
+                    self._store_index(index, current, analyzed)
+        finally:
+            if executor is not None:
+                executor.shutdown(wait=True)
+            if index is not None:
+                self._close_index(index)
+    
+    def _iter_scan_batches(self, directory: Path, recursive: bool,
+                           index: Optional[FileIndex]) -> Iterator[Tuple[str, List[IndexedFile]]]:
+        """Yield (directory, files to analyze) one directory at a time, through the index when there is one."""
+        # Exclusions in the starting path itself apply to everything below it
+        if any(_is_excluded_part(part) for part in str(directory).replace('\\', '/').lower().split('/')):
+            return
+        
+        ignore = IgnoreTree(directory) if self.use_ignore_files else None
+        list_directory = partial(self._list_directory, ignore=ignore)
+        
+        if index is not None:
+            yield from index.iter_scan(directory, recursive, list_directory,
+                                       ignore.signature if ignore is not None else None)
+            return
+        
+        stack = [str(directory)]
+        while stack:
+            current = stack.pop()
+            entries, subdirs = list_directory(current)
+            yield current, [IndexedFile(Path(entry.path), current) for entry in entries]
+            if recursive:
+                stack.extend(reversed(subdirs))
+    
+    def analyze_files(self, paths: List[Path], root: Optional[Path] = None) -> List[FileInfo]:
+        """Analyze specific files, reusing analyses the index of root still holds for them."""
+        index = self._open_index(root) if root is not None else None
         
-        # 10. Environment and config files that are location-specific
-        env_config_files = {
-            '.env', '.env.local', '.env.production',
-            'config.ini', 'local_settings.py',
-            'secrets.json', 'credentials.json'
-        }
-        if file_name in env_config_files:
-            return False
+        items = []
+        for path in paths:
+            try:
+                stat_result = path.stat()
+            except OSError:
+                continue
+            cached = index.lookup(path, stat_result) if index is not None else None
+            items.append(cached or IndexedFile(path, str(path.parent), stat_result, stat_result.st_size))
+        
+        if index is not None:
+            self._close_index(index)
         
-        return True
+        return list(self._analyze_items(items))
     
-    def _categorize_file(self, file_path: Path) -> Tuple[FileCategory, str, float]:
-        """Categorize a file based on patterns and content."""
-        file_str = str(file_path).replace('\\', '/')
-        name = file_path.name.lower()
+    def _open_index(self, directory: Path) -> Optional[FileIndex]:
+        """Open the persistent index for directory, or None if it's disabled or unavailable."""
+        if not self.use_index:
+            return None
+        try:
+            return FileIndex(directory)
+        except Exception as e:
+            if self.verbose:
+                self.console.print(f"[yellow]File index unavailable, scanning without it: {e}[/yellow]")
+            return None
+    
+    def _store_index(self, index: FileIndex, directory: str,
+                     analyzed: List[Tuple[IndexedFile, AnalysisRow]]) -> None:
+        """Write a directory's new analyses back to the index; the index is an optimization, so failures are ignored."""
+        try:
+            index.store(directory, (
+                (item, category.value, purpose, confidence)
+                for item, (_, _, category, purpose, confidence) in analyzed
+            ))
+        except Exception as e:
+            if self.verbose:
+                self.console.print(f"[yellow]Could not update file index: {e}[/yellow]")
+    
+    def _close_index(self, index: FileIndex) -> None:
+        """Commit and close the index, ignoring failures."""
+        try:
+            index.close()
+        except Exception as e:
+            if self.verbose:
+                self.console.print(f"[yellow]Could not update file index: {e}[/yellow]")
+    
+    def _analyze_items(self, items: List[IndexedFile], related_index: Optional[StemIndex] = None) -> Iterator[FileInfo]:
+        """Analyze scanned files on a thread pool, yielding results in input order.
         
-        # Test files
-        if any(re.search(pattern, file_str, re.IGNORECASE) for pattern in self.test_patterns):
-            return FileCategory.TEST, "Test file", 0.9
+        Analysis is dominated by stat and read calls, which release the GIL,
+        so threads overlap the I/O. Small batches are analyzed inline.
+        """
+        workers = self.max_workers or min(32, (os.cpu_count() or 1) + 4)
         
-        # Configuration files
-        if any(re.search(pattern, file_str, re.IGNORECASE) for pattern in self.config_patterns):
-            return FileCategory.CONFIG, "Configuration file", 0.8
+        if workers <= 1 or len(items) < PARALLEL_ANALYSIS_THRESHOLD:
+            for item in items:
+                yield self._analyze_item(item, related_index)
+            return
         
-        # Documentation
-        if any(re.search(pattern, file_str, re.IGNORECASE) for pattern in self.doc_patterns):
-            return FileCategory.DOCUMENTATION, "Documentation file", 0.8
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            yield from executor.map(lambda item: self._analyze_item(item, related_index), items)
+    
+    def _analyze_item(self, item: IndexedFile, related_index: Optional[StemIndex] = None) -> FileInfo:
+        """Analyze a scanned file, or rebuild its FileInfo from the index."""
+        size, modified, category, purpose, confidence = self._analyze_row(item)
+        return FileInfo(
+            path=item.path,
+            name=item.path.name,
+            extension=item.path.suffix.lower(),
+            size=size,
+            category=category,
+            purpose=purpose,
+            confidence=confidence,
+            related_files=self._find_related_files(item.path, related_index),
+            modified=modified
+        )
+    
+    def _analyze_row(self, item: IndexedFile) -> AnalysisRow:
+        """Get (size, modified, category, purpose, confidence) of a scanned file, from the index when it holds them."""
+        if item.is_cached:
+            return item.size, item.mtime_ns / 1e9, FileCategory(item.category), item.purpose, item.confidence
+        
+        stat_result = item.stat_result
+        if stat_result is None:
+            try:
+                stat_result = item.path.stat()
+            except OSError:
+                pass
+        size = stat_result.st_size if stat_result is not None else 0
+        modified = stat_result.st_mtime if stat_result is not None else 0.0
+        
+        category, purpose, confidence = self._categorize_file(item.path, stat_result)
+        return size, modified, category, purpose, confidence
+    
+    def _list_directory(self, directory: str,
+                        ignore: Optional[IgnoreTree] = None) -> Tuple[List[os.DirEntry], List[str]]:
+        """List a directory's included files and the subdirectories worth descending into.
+        
+        Excluded directories, and those the ignore files rule out, are pruned
+        here, before anything below them is listed. Entries come in name
+        order. Symlinked directories are not followed; symlinked files are
+        included.
+        """
+        try:
+            with os.scandir(directory) as it:
+                entries = sorted(it, key=lambda e: e.name)
+        except OSError:
+            return [], []
+        
+        is_ignored = ignore.directory_matcher(directory) if ignore is not None else None
+        
+        files = []
+        subdirs = []
+        for entry in entries:
+            name = entry.name.lower()
+            if _is_excluded_part(name):
+                continue
+            
+            try:
+                if entry.is_dir(follow_symlinks=False):
+                    if is_ignored is None or not is_ignored(entry.name, True):
+                        subdirs.append(entry.path)
+                    continue
+                if not entry.is_file():
+                    continue
+            except OSError:
+                continue
+            
+            if _is_included_name(name) and (is_ignored is None or not is_ignored(entry.name, False)):
+                files.append(entry)
         
-        # Build artifacts
-        if any(re.search(pattern, file_str, re.IGNORECASE) for pattern in self.build_patterns):
-            return FileCategory.BUILD, "Build artifact", 0.9
+        return files, subdirs
+    
+    def _should_include_file(self, file_path: Path) -> bool:
+        """Check if a file should be included in analysis (excludes system/sensitive files)."""
+        path_parts = str(file_path).replace('\\', '/').lower().split('/')
         
-        # Scripts
-        if any(re.search(pattern, file_str, re.IGNORECASE) for pattern in self.script_patterns):
-            return FileCategory.SCRIPT, "Script file", 0.7
+        # Hidden, environment, system, IDE and build directories anywhere in the path
+        if any(_is_excluded_part(part) for part in path_parts):
+            return False
         
-        # Data files
-        if any(re.search(pattern, file_str, re.IGNORECASE) for pattern in self.data_patterns):
-            return FileCategory.DATA, "Data file", 0.7
+        return _is_included_name(file_path.name.lower())
+    
+    def _categorize_file(self, file_path: Path,
+                         stat_result: Optional[os.stat_result] = None) -> Tuple[FileCategory, str, float]:
+        """Categorize a file based on patterns and content.
         
-        # Assets
-        if any(re.search(pattern, file_str, re.IGNORECASE) for pattern in self.asset_patterns):
-            return FileCategory.ASSET, "Asset file", 0.8
+        Content is only sniffed when no path pattern decides the category.
+        """
+        file_str = str(file_path).replace('\\', '/')
+        name = file_path.name.lower()
         
-        # Temporary files
-        if any(re.search(pattern, file_str, re.IGNORECASE) for pattern in self.temp_patterns):
-            return FileCategory.TEMPORARY, "Temporary file", 0.9
+        # Path patterns, in priority order: test, config, docs, build, scripts, data, assets, temporary
+        rank = self._categorizer.match(file_str, file_path.name)
+        if rank is not None:
+            return self._category_rules[rank]
         
         # Specific file analysis
         if file_path.suffix.lower() == '.py':
-            purpose = self._analyze_python_file(file_path)
+            purpose = self._analyze_python_file(file_path, stat_result)
             return FileCategory.SOURCE, purpose, 0.8
         
         if file_path.suffix.lower() in ['.js', '.ts', '.jsx', '.tsx']:
-            purpose = self._analyze_javascript_file(file_path)
+            purpose = self._analyze_javascript_file(file_path, stat_result)
             return FileCategory.SOURCE, purpose, 0.8
         
         # Default to source if it's a code file
@@ -400,53 +958,60 @@ class FileAnalyzer:
         
         return FileCategory.UNKNOWN, "Unknown file type", 0.3
     
-    def _analyze_python_file(self, file_path: Path) -> str:
+    def _analyze_python_file(self, file_path: Path, stat_result: Optional[os.stat_result] = None) -> str:
         """Analyze Python file content to determine purpose."""
-        try:
-            content = file_path.read_text(encoding='utf-8', errors='ignore')
-            
-            if 'import unittest' in content or 'import pytest' in content or 'def test_' in content:
-                return "Python test file"
-            elif 'if __name__ == "__main__"' in content:
-                return "Python script"
-            elif 'class ' in content and 'def ' in content:
-                return "Python module with classes"
-            elif 'def ' in content:
-                return "Python module with functions"
-            else:
-                return "Python source file"
-        except Exception:
-            return "Python file"
+        return self._sniff_content(file_path, stat_result, _sniff_python, "Python file")
     
-    def _analyze_javascript_file(self, file_path: Path) -> str:
+    def _analyze_javascript_file(self, file_path: Path, stat_result: Optional[os.stat_result] = None) -> str:
         """Analyze JavaScript/TypeScript file content."""
+        return self._sniff_content(file_path, stat_result, _sniff_javascript, "JavaScript file")
+    
+    def _sniff_content(self, file_path: Path, stat_result: Optional[os.stat_result],
+                       sniff: Callable[[bytes], str], fallback: str) -> str:
+        """Classify a file from its first SNIFF_BYTES bytes, cached by path, size and mtime."""
         try:
-            content = file_path.read_text(encoding='utf-8', errors='ignore')
+            st = stat_result or file_path.stat()
+            key = (str(file_path), st.st_size, st.st_mtime_ns)
             
-            if 'describe(' in content or 'it(' in content or 'test(' in content:
-                return "JavaScript test file"
-            elif 'export default' in content or 'module.exports' in content:
-                return "JavaScript module"
-            elif 'React' in content or 'jsx' in content.lower():
-                return "React component"
-            else:
-                return "JavaScript source file"
+            purpose = self._sniff_cache.get(key)
+            if purpose is None:
+                with open(file_path, 'rb') as f:
+                    prefix = f.read(SNIFF_BYTES)
+                purpose = self._sniff_cache[key] = sniff(prefix)
+            
+            return purpose
         except Exception:
-            return "JavaScript file"
+            return fallback
     
-    def _find_related_files(self, file_path: Path) -> List[str]:
-        """Find files related to the given file."""
-        related = []
-        base_name = file_path.stem
-        parent_dir = file_path.parent
-        
-        # Look for files with similar names
-        for sibling in parent_dir.iterdir():
-            if sibling.is_file() and sibling != file_path:
-                if base_name in sibling.stem or sibling.stem in base_name:
-                    related.append(str(sibling))
-        
-        return related
+    def _find_related_files(self, file_path: Path, index: Optional[StemIndex] = None) -> List[str]:
+        """Find files related to the given file.
+        
+        Without an index, one is built from the file's directory listing and
+        kept for the analyzer's lifetime, so analyzing several files from
+        the same directory lists it once.
+        """
+        if index is None:
+            index = self._directory_indexes.get(file_path.parent)
+            if index is None:
+                index = StemIndex(self._list_directory_files(file_path.parent))
+                self._directory_indexes[file_path.parent] = index
+        
+        return index.related(file_path)
+    
+    def _list_directory_files(self, directory: Path) -> List[Path]:
+        """List the regular files directly inside directory."""
+        files = []
+        try:
+            with os.scandir(directory) as it:
+                for entry in it:
+                    try:
+                        if entry.is_file():
+                            files.append(Path(entry.path))
+                    except OSError:
+                        continue
+        except OSError:
+            pass
+        return files
     
     def categorize_files_by_purpose(self, files: List[FileInfo]) -> Dict[str, List[FileInfo]]:
         """Group files by their detected purpose."""
@@ -460,14 +1025,73 @@ class FileAnalyzer:
         
         return categories
     
-    def find_files_by_query(self, files: List[FileInfo], query: str) -> List[FileInfo]:
-        """Find files that match a natural language query using AI."""
+    def find_duplicates(self, files: Iterable[FileInfo]) -> List[DuplicateGroup]:
+        """Group files with identical content, largest reclaimable space first.
+        
+        Each stage only reads files the previous one couldn't tell apart:
+        files are grouped by size, then by a hash of their first and last
+        blocks, and only then hashed in full, on a thread pool. Empty files
+        are ignored. The copy kept is the oldest, then the one with the
+        shortest path.
+        """
+        by_size: Dict[int, List[FileInfo]] = {}
+        for file_info in files:
+            if file_info.size > 0:
+                by_size.setdefault(file_info.size, []).append(file_info)
+        candidates = [group for group in by_size.values() if len(group) > 1]
+        if not candidates:
+            return []
+        
+        workers = self.max_workers or min(32, (os.cpu_count() or 1) + 4)
+        groups: List[DuplicateGroup] = []
+        
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            by_sample: Dict[Tuple[int, bytes], List[FileInfo]] = {}
+            sampled = [file_info for group in candidates for file_info in group]
+            digests = executor.map(lambda f: _sample_digest(f.path, f.size), sampled)
+            for file_info, digest in zip(sampled, digests):
+                if digest is not None:
+                    by_sample.setdefault((file_info.size, digest), []).append(file_info)
+            
+            to_hash: List[FileInfo] = []
+            for (size, _), group in by_sample.items():
+                if len(group) < 2:
+                    continue
+                if size <= 2 * DUPLICATE_SAMPLE_BYTES:
+                    groups.append(self._duplicate_group(size, group))  # The sample was the whole file
+                else:
+                    to_hash.extend(group)
+            
+            by_content: Dict[Tuple[int, str], List[FileInfo]] = {}
+            for file_info, digest in zip(to_hash, executor.map(lambda f: _full_digest(f.path), to_hash)):
+                if digest is not None:
+                    by_content.setdefault((file_info.size, digest), []).append(file_info)
+            
+            for (size, _), group in by_content.items():
+                if len(group) > 1:
+                    groups.append(self._duplicate_group(size, group))
+        
+        groups.sort(key=lambda group: (-group.reclaimable, str(group.keep)))
+        return groups
+    
+    @staticmethod
+    def _duplicate_group(size: int, files: List[FileInfo]) -> DuplicateGroup:
+        ordered = sorted(files, key=lambda f: (f.modified or float('inf'), len(str(f.path)), str(f.path)))
+        return DuplicateGroup(size=size, paths=[f.path for f in ordered])
+    
+    def find_files_by_query(self, files: List[FileInfo], query: str, root: Optional[Path] = None) -> List[FileInfo]:
+        """Find files that match a natural language query, using AI for queries nothing simpler can answer.
+        
+        ``root`` is the directory the query's relative paths ("in config") refer to.
+        """
         if self.verbose:
             self.console.print(f"[blue]🔍 Searching for files matching: '{query}'[/blue]")
         
-        # First try quick heuristic matches for common patterns
-        quick_matches = self._quick_heuristic_match(files, query)
-        if quick_matches:
+        # First try structured queries and quick heuristic matches for common patterns.
+        # A query they understand is answered by them alone, even when nothing matches,
+        # so "files larger than 10MB" never falls through to matching names.
+        quick_matches = self._quick_heuristic_match(files, query, root)
+        if quick_matches is not None:
             if self.verbose:
                 self.console.print(f"[green]✅ Found {len(quick_matches)} files using quick pattern matching[/green]")
             return quick_matches
@@ -483,8 +1107,30 @@ class FileAnalyzer:
         
         return result
     
-    def _quick_heuristic_match(self, files: List[FileInfo], query: str) -> List[FileInfo]:
-        """Quick heuristic matching for common, safe patterns."""
+    def _quick_heuristic_match(self, files: List[FileInfo], query: str,
+                               root: Optional[Path] = None) -> Optional[List[FileInfo]]:
+        """Quick heuristic matching for common, safe patterns; None if the query isn't one."""
+        predicate = self.quick_match_predicate(query, root)
+        if predicate is None:
+            return None  # No quick match found, let AI handle it
+        return [f for f in files if predicate(f)]
+    
+    def quick_match_predicate(self, query: str, root: Optional[Path] = None) -> Optional[Callable[[FileInfo], bool]]:
+        """Get a per-file test for queries the quick heuristics understand, or None.
+        
+        Queries are first compiled into a structured filter plan (extension,
+        glob, size, age, category and directory predicates); the fixed
+        phrases below catch a few more. Because the test looks at one file at
+        a time, it can filter a stream of analyzed files as they arrive.
+        """
+        from .file_query import compile_query
+        
+        plan = compile_query(query, root)
+        if plan is not None:
+            if self.verbose:
+                self.console.print(f"[blue]Compiled query: {plan.describe()}[/blue]")
+            return plan
+        
         query_lower = query.lower()
         
         # Exact category matches (safe and fast)
@@ -499,51 +1145,108 @@ class FileAnalyzer:
         
         for phrase, category in exact_category_matches.items():
             if phrase in query_lower:
-                return [f for f in files if f.category == category]
+                return lambda f: f.category == category
         
         # File extension matches
         if 'python files' in query_lower:
-            return [f for f in files if f.extension == '.py']
+            return lambda f: f.extension == '.py'
         if 'javascript files' in query_lower:
-            return [f for f in files if f.extension in ['.js', '.ts']]
+            return lambda f: f.extension in ['.js', '.ts']
         if 'image files' in query_lower:
-            return [f for f in files if f.extension in ['.png', '.jpg', '.jpeg', '.gif', '.svg']]
+            return lambda f: f.extension in ['.png', '.jpg', '.jpeg', '.gif', '.svg']
         
-        return []  # No quick match found, let AI handle it
+        return None
     
     def _ai_assisted_file_matching(self, files: List[FileInfo], query: str) -> List[FileInfo]:
-        """Use AI to intelligently match files based on query."""
+        """Use AI to intelligently match files based on query.
+        
+        Up to AI_PROMPT_FILES files are all sent in one prompt. Beyond that,
+        files are ranked locally by overlap with the query, and each prompt
+        of AI_PROMPT_FILES files is filled with ranked candidates first and
+        then with the remaining files in walk order, so files the ranking
+        can't see (a "logo.png" for "photos") still get a chance. A broad
+        query (more candidates than one prompt, or no ranking signal at
+        all) sends up to AI_MAX_CANDIDATES files in concurrent batches and
+        the answers are merged. Either way each prompt stays bounded.
+        """
+        from .file_ranking import CandidateRanker
         from .llm_resolver import LLMResolver
         
-        # Show progress for AI preparation
+        llm_resolver = LLMResolver(verbose=self.verbose)
+        if llm_resolver.model != "local" or llm_resolver._get_ollama_target() is None:
+            return self._enhanced_pattern_matching(files, query)
+        
+        if len(files) <= AI_PROMPT_FILES:
+            candidates = list(files)
+        else:
+            ranked = CandidateRanker(query).rank(files)
+            if len(ranked) > AI_MAX_CANDIDATES:
+                if self.verbose:
+                    self.console.print(f"[yellow]Only the {AI_MAX_CANDIDATES} best of {len(ranked)} "
+                                       f"candidate files are sent to AI[/yellow]")
+                ranked = ranked[:AI_MAX_CANDIDATES]
+            
+            # Whole prompts, topped up with unranked files; without any ranking signal, as many as allowed
+            prompts = -(-len(ranked) // AI_PROMPT_FILES)
+            budget = prompts * AI_PROMPT_FILES if ranked else AI_MAX_CANDIDATES
+            
+            candidates = ranked
+            ranked_paths = {file_info.path for file_info in ranked}
+            for file_info in files:
+                if len(candidates) >= budget:
+                    break
+                if file_info.path not in ranked_paths:
+                    candidates.append(file_info)
+        
+        batches = [candidates[i:i + AI_PROMPT_FILES] for i in range(0, len(candidates), AI_PROMPT_FILES)]
+        if self.verbose:
+            self.console.print(f"[blue]Asking AI about {len(candidates)} of {len(files)} files "
+                               f"in {len(batches)} batch(es)[/blue]")
+        
+        matched_paths: Set[Path] = set()
+        answered = False
+        
         with Progress(
             SpinnerColumn(),
             TextColumn("[progress.description]{task.description}"),
+            TextColumn("[cyan]{task.completed}/{task.total}[/cyan] batches"),
+            TimeElapsedColumn(),
             console=self.console,
             transient=True
         ) as ai_progress:
             
-            prep_task = ai_progress.add_task("[yellow]Preparing file data for AI analysis...")
-            
-            # Prepare file list for AI analysis
-            file_data = []
-            for file_info in files:
-                file_data.append({
-                    "name": file_info.name,
-                    "path": str(file_info.path),
-                    "extension": file_info.extension,
-                    "category": file_info.category.value,
-                    "purpose": file_info.purpose,
-                    "size": file_info.size
-                })
+            task = ai_progress.add_task("[yellow]Waiting for AI response...", total=len(batches))
             
-            ai_progress.update(prep_task, description=f"[yellow]Sending {len(file_data)} files to AI for analysis...")
+            def ask(batch: List[FileInfo]) -> Optional[List[FileInfo]]:
+                response = llm_resolver._run_ollama(self._file_matching_prompt(batch, query), show_status=False)
+                if response is None:
+                    return None
+                matched_names = set(self._parse_ai_file_response(response))
+                return [file_info for file_info in batch if file_info.name in matched_names]
             
-            # Create a focused prompt for file matching
-            prompt = f'''Analyze these files and identify which ones match the query: "{query}"
+            workers = min(len(batches), self.max_workers or AI_CONCURRENCY)
+            with ThreadPoolExecutor(max_workers=workers) as executor:
+                for matches in executor.map(ask, batches):
+                    ai_progress.advance(task)
+                    if matches is not None:
+                        answered = True
+                        matched_paths.update(file_info.path for file_info in matches)
+        
+        if matched_paths:
+            return [file_info for file_info in files if file_info.path in matched_paths]
+        
+        if self.verbose and not answered:
+            self.console.print("[yellow]AI matching failed, falling back to pattern matching[/yellow]")
+        
+        # Fallback: enhanced pattern matching
+        return self._enhanced_pattern_matching(files, query)
+    
+    def _file_matching_prompt(self, files: List[FileInfo], query: str) -> str:
+        """Build the prompt asking which of files match query."""
+        return f'''Analyze these files and identify which ones match the query: "{query}"
 
 Files available:
-{self._format_files_for_ai(file_data)}
+{self._format_files_for_ai(files)}
 
 Task: Return ONLY the file names that match the query "{query}".
 
@@ -555,46 +1258,13 @@ Consider:
 
 Respond with a JSON array of matching file names:
 ["filename1.ext", "filename2.ext"]'''
-            
-            ai_progress.update(prep_task, description="[yellow]Waiting for AI response...")
-            
-            try:
-                # Use LLM to get file matches
-                llm_resolver = LLMResolver(verbose=False)
-                if llm_resolver.model == "local":
-                    response = llm_resolver._resolve_with_local_llm(prompt)
-                    matched_names = self._parse_ai_file_response(response)
-                    
-                    ai_progress.update(prep_task, description="[yellow]Processing AI response...")
-                    
-                    # Convert matched names back to FileInfo objects
-                    matching_files = []
-                    for file_info in files:
-                        if file_info.name in matched_names:
-                            matching_files.append(file_info)
-                    
-                    if matching_files:  # AI found matches
-                        return matching_files
-                
-            except Exception as e:
-                # If AI fails, fall back to basic pattern matching
-                if self.verbose:
-                    self.console.print(f"[yellow]AI matching failed: {e}[/yellow]")
-                pass
-        
-        # Fallback: enhanced pattern matching
-        return self._enhanced_pattern_matching(files, query)
     
-    def _format_files_for_ai(self, file_data: List[dict]) -> str:
-        """Format file list for AI analysis."""
-        formatted = []
-        for i, file_info in enumerate(file_data[:50]):  # Limit to prevent token overflow
-            formatted.append(f"{i+1}. {file_info['name']} ({file_info['extension']}) - {file_info['purpose']}")
-        
-        if len(file_data) > 50:
-            formatted.append(f"... and {len(file_data) - 50} more files")
-        
-        return "\n".join(formatted)
+    def _format_files_for_ai(self, files: List[FileInfo]) -> str:
+        """Format file list for AI analysis; callers keep the list to AI_PROMPT_FILES entries."""
+        return "\n".join(
+            f"{i+1}. {file_info.name} ({file_info.extension}) - {file_info.purpose}"
+            for i, file_info in enumerate(files)
+        )
     
     def _parse_ai_file_response(self, response: List[str]) -> List[str]:
         """Parse AI response to extract file names."""
@@ -5,7 +5,7 @@ File context system for ipip - remembers active files for conversational operati
 import json
 from pathlib import Path
 from typing import List, Dict, Optional, Set
-from dataclasses import dataclass, asdict
+from dataclasses import dataclass, asdict, field
 from datetime import datetime
 from rich.console import Console
 from rich.table import Table
@@ -18,7 +18,8 @@ class FileContext:
     active_files: List[str]
     last_operation: str
     timestamp: str
-    operation_type: str  # list, create, move, etc.
+    operation_type: str  # list, create, move, duplicates, etc.
+    originals: Dict[str, str] = field(default_factory=dict)  # duplicates: active file -> copy that is kept
     
     def to_dict(self) -> Dict:
         return asdict(self)
@@ -54,14 +55,16 @@ class FileContextManager:
         except Exception:
             pass  # Fail silently for context saving
     
-    def set_active_files(self, files: List[Path], operation: str, operation_type: str):
+    def set_active_files(self, files: List[Path], operation: str, operation_type: str,
+                         originals: Optional[Dict[Path, Path]] = None):
         """Set the currently active files."""
         file_paths = [str(f) for f in files]
         self.current_context = FileContext(
             active_files=file_paths,
             last_operation=operation,
             timestamp=datetime.now().isoformat(),
-            operation_type=operation_type
+            operation_type=operation_type,
+            originals={str(copy): str(kept) for copy, kept in (originals or {}).items()}
         )
         self.save_context()
     
@@ -79,6 +82,13 @@ class FileContextManager:
         
         return existing_files
     
+    def get_original(self, file_path: Path) -> Optional[Path]:
+        """Get the kept copy an active duplicate was found identical to, if any."""
+        if not self.current_context:
+            return None
+        original = self.current_context.originals.get(str(file_path))
+        return Path(original) if original else None
+    
     def add_file_to_context(self, file_path: Path, operation: str):
         """Add a single file to the current context."""
         if not self.current_context:
@@ -159,7 +169,7 @@ def get_context_for_query(query: str) -> List[Path]:
     # Check for context-dependent commands
     context_commands = [
         "move files", "copy files", "delete files",
-        "move them", "copy them", "delete them",
+        "move them", "copy them", "delete them", "remove them",
         "organize files", "these files", "those files",
         "the files", "current files", "active files"
     ]
@@ -170,10 +180,11 @@ def get_context_for_query(query: str) -> List[Path]:
     
     return []
 
-def update_context_after_operation(files: List[Path], operation: str, operation_type: str):
+def update_context_after_operation(files: List[Path], operation: str, operation_type: str,
+                                   originals: Optional[Dict[Path, Path]] = None):
     """Update context after a file operation."""
     if files:
-        file_context.set_active_files(files, operation, operation_type)
+        file_context.set_active_files(files, operation, operation_type, originals)
 
 def clear_context_if_new_operation(query: str) -> bool:
     """Clear context if this is a new type of operation."""
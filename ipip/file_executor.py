@@ -0,0 +1,117 @@
+"""
+Parallel execution of planned file operations.
+
+A plan's operations are ordered only where it matters: an operation waits
+for every earlier one that touches the same path, or a path above or below
+it. Plans list directory creates before the moves and copies into them, so
+those keep their order, while moves of unrelated files run side by side on
+a thread pool.
+"""
+
+import os
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from typing import Callable, Dict, Iterator, List, Optional, Sequence, Set
+
+from .file_operations import FileOperation, OperationResult
+
+
+def _touched_paths(operation: FileOperation) -> Set[str]:
+    """Get the normalized paths an operation reads, writes or removes."""
+    return {
+        os.path.normcase(os.path.abspath(path))
+        for path in (operation.source_path, operation.target_path)
+        if path is not None
+    }
+
+
+def _ancestors(path: str) -> Iterator[str]:
+    parent = os.path.dirname(path)
+    while parent != path:
+        yield parent
+        path, parent = parent, os.path.dirname(parent)
+
+
+def operation_dependencies(operations: Sequence[FileOperation]) -> List[Set[int]]:
+    """Get, for each operation, the positions of the earlier operations it must wait for.
+
+    Two operations conflict when one touches a path equal to, inside, or
+    containing a path the other touches. Only the latest conflicting
+    operation on each path is recorded, since it already waits for the
+    ones before it.
+    """
+    last_at: Dict[str, int] = {}           # path -> latest operation touching exactly it
+    below: Dict[str, List[int]] = {}       # directory -> operations touching something inside it since then
+    dependencies: List[Set[int]] = []
+
+    for position, operation in enumerate(operations):
+        waits_for: Set[int] = set()
+        paths = _touched_paths(operation)
+
+        for path in paths:
+            if path in last_at:
+                waits_for.add(last_at[path])
+            waits_for.update(below.pop(path, ()))
+            for ancestor in _ancestors(path):
+                if ancestor in last_at:
+                    waits_for.add(last_at[ancestor])
+
+        for path in paths:
+            last_at[path] = position
+            for ancestor in _ancestors(path):
+                below.setdefault(ancestor, []).append(position)
+
+        waits_for.discard(position)
+        dependencies.append(waits_for)
+
+    return dependencies
+
+
+def execute_operations(operations: Sequence[FileOperation],
+                       execute: Callable[[FileOperation], OperationResult],
+                       max_workers: Optional[int] = None) -> Iterator[OperationResult]:
+    """Run operations on a thread pool, yielding results in plan order.
+
+    An operation starts once everything it depends on has finished, whether
+    that succeeded or not, just as it would in a sequential run. Results are
+    yielded as soon as every operation before them has finished too.
+    """
+    workers = max_workers or min(32, (os.cpu_count() or 1) + 4)
+    if workers <= 1 or len(operations) <= 1:
+        for operation in operations:
+            yield execute(operation)
+        return
+
+    dependencies = operation_dependencies(operations)
+    waiting = [len(waits_for) for waits_for in dependencies]
+    dependents: List[List[int]] = [[] for _ in operations]
+    for position, waits_for in enumerate(dependencies):
+        for earlier in waits_for:
+            dependents[earlier].append(position)
+
+    results: List[Optional[OperationResult]] = [None] * len(operations)
+    next_result = 0
+
+    # Ready operations are handed to the pool a few at a time, so each wait() stays cheap
+    ready = deque(position for position, count in enumerate(waiting) if count == 0)
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        running: Dict[Future, int] = {}
+
+        while ready or running:
+            while ready and len(running) < 2 * workers:
+                position = ready.popleft()
+                running[executor.submit(execute, operations[position])] = position
+
+            done, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in done:
+                position = running.pop(future)
+                results[position] = future.result()
+                for later in dependents[position]:
+                    waiting[later] -= 1
+                    if waiting[later] == 0:
+                        ready.append(later)
+
+            while next_result < len(results) and results[next_result] is not None:
+                yield results[next_result]
+                results[next_result] = None
+                next_result += 1
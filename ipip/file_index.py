@@ -0,0 +1,274 @@
+"""
+Persistent SQLite index of file analysis results, reused across commands.
+"""
+
+import hashlib
+import json
+import os
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Set, Tuple
+
+try:
+    import sqlite3
+except ImportError:  # Python builds without sqlite; the index is then simply disabled
+    sqlite3 = None
+
+from .config import get_cache_dir
+
+# (included file entries, subdirectory paths) of one directory
+DirectoryLister = Callable[[str], Tuple[List[os.DirEntry], List[str]]]
+
+# Identifies the ignore rules a directory was listed under
+DirectoryKey = Callable[[str], str]
+
+# Directories modified this close to being listed may change again within the same
+# mtime tick on filesystems with coarse timestamps, so their listing isn't reused
+RACY_MTIME_NS = 2 * 10**9
+
+# Stored in place of a racy directory's mtime, so it never matches and the directory is listed again
+UNTRUSTED_MTIME_NS = -1
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT NOT NULL);
+CREATE TABLE IF NOT EXISTS dirs (
+    path TEXT PRIMARY KEY,
+    mtime_ns INTEGER NOT NULL,
+    subdirs TEXT NOT NULL,
+    ignore_key TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS files (
+    path TEXT PRIMARY KEY,
+    dir TEXT NOT NULL,
+    size INTEGER NOT NULL,
+    mtime_ns INTEGER NOT NULL,
+    category TEXT NOT NULL,
+    purpose TEXT NOT NULL,
+    confidence REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS files_dir ON files (dir);
+"""
+
+
+@dataclass
+class IndexedFile:
+    """A file found by a scan, with its analysis when the index still holds a valid one."""
+    path: Path
+    directory: str
+    stat_result: Optional[os.stat_result] = None
+    size: int = 0
+    category: Optional[str] = None
+    purpose: str = ""
+    confidence: float = 0.0
+    mtime_ns: int = 0
+
+    @property
+    def is_cached(self) -> bool:
+        return self.category is not None
+
+
+class FileIndex:
+    """Per-directory index of file analysis results.
+
+    Each scanned directory is stored with its mtime and its subdirectories,
+    and each file with its size, mtime and analysis. A directory whose mtime
+    is unchanged is not listed again: its files and subdirectories come from
+    the index, so unchanged subtrees cost one stat per directory and file.
+    Adding, removing or renaming a file changes its directory's mtime, and so
+    do editors that save by writing a new file and renaming it over the old
+    one; editing a file in place only changes the file's own, which is why
+    stored files are stat-ed as well. Files are re-analyzed only if their
+    size or mtime changed. A directory is also listed again when the ignore
+    files that apply to it have changed. A directory modified within
+    RACY_MTIME_NS of being listed is listed again next time, though its
+    files' analyses are still reused.
+    """
+
+    VERSION = 2
+
+    def __init__(self, root: Path, cache_dir: Optional[Path] = None):
+        if sqlite3 is None:
+            raise ImportError("The file index requires the sqlite3 module")
+
+        self.root = root
+        key = hashlib.sha1(str(root.resolve()).encode('utf-8')).hexdigest()[:16]
+        self.db_path = (cache_dir or get_cache_dir()) / "files" / f"{key}.sqlite"
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+
+        self._conn = sqlite3.connect(str(self.db_path))
+        self._conn.executescript(_SCHEMA)
+        self._check_meta()
+
+        # Directories listed by the current scan and not yet written back by store()
+        self._changed_dirs: Dict[str, Tuple[int, List[str], int, str]] = {}
+
+    def _check_meta(self) -> None:
+        """Start over if the index was written by another version or for another root spelling."""
+        meta = dict(self._conn.execute("SELECT key, value FROM meta"))
+        expected = {"version": str(self.VERSION), "root": str(self.root)}
+        if meta != expected:
+            # Dropped rather than emptied, since another version may have another schema
+            self._conn.executescript("DROP TABLE IF EXISTS dirs; DROP TABLE IF EXISTS files;" + _SCHEMA)
+            with self._conn:
+                self._conn.execute("DELETE FROM meta")
+                self._conn.executemany("INSERT INTO meta VALUES (?, ?)", expected.items())
+
+    def scan(self, directory: Path, recursive: bool, list_directory: DirectoryLister,
+             directory_key: Optional[DirectoryKey] = None) -> List[IndexedFile]:
+        """Get every included file below directory, in the order the walker visits them."""
+        return [item for _, items in self.iter_scan(directory, recursive, list_directory, directory_key)
+                for item in items]
+
+    def iter_scan(self, directory: Path, recursive: bool, list_directory: DirectoryLister,
+                  directory_key: Optional[DirectoryKey] = None) -> Iterator[Tuple[str, List[IndexedFile]]]:
+        """Yield (directory, files) one directory at a time, in the order the walker visits them.
+
+        ``directory_key`` identifies the ignore rules list_directory applies
+        to a directory; a stored listing made under other rules is stale.
+        Stale directories are pruned only once the scan runs to completion.
+        """
+        visited: Set[str] = set()
+        self._changed_dirs = {}
+
+        stack = [str(directory)]
+        while stack:
+            current = stack.pop()
+            try:
+                mtime_ns = os.stat(current).st_mtime_ns
+            except OSError:
+                continue
+            visited.add(current)
+            stored_mtime_ns = mtime_ns if mtime_ns <= time.time_ns() - RACY_MTIME_NS else UNTRUSTED_MTIME_NS
+            ignore_key = directory_key(current) if directory_key is not None else ""
+
+            row = self._conn.execute(
+                "SELECT mtime_ns, subdirs, ignore_key FROM dirs WHERE path = ?", (current,)
+            ).fetchone()
+            if row is not None and row[0] == mtime_ns and row[2] == ignore_key:
+                subdir_names = json.loads(row[1])
+                subdirs = [os.path.join(current, name) for name in subdir_names]
+                items, edited = self._restat(current)
+                if edited:
+                    self._changed_dirs[current] = (stored_mtime_ns, subdir_names, len(items), ignore_key)
+            else:
+                entries, subdirs = list_directory(current)
+                items = list(self._revalidate(current, entries))
+                self._changed_dirs[current] = (
+                    stored_mtime_ns, [os.path.basename(path) for path in subdirs], len(items), ignore_key
+                )
+
+            yield current, items
+
+            if recursive:
+                stack.extend(reversed(subdirs))
+
+        if recursive:
+            self._prune(str(directory), visited)
+
+    def _restat(self, directory: str) -> Tuple[List[IndexedFile], bool]:
+        """Get the stored files of an unchanged directory, and whether any was edited or removed since.
+
+        Edited files come back without their stale analysis, to be analyzed again.
+        """
+        items = []
+        edited = False
+        for path, size, mtime_ns, category, purpose, confidence in self._conn.execute(
+            "SELECT path, size, mtime_ns, category, purpose, confidence FROM files WHERE dir = ? ORDER BY path",
+            (directory,)
+        ).fetchall():
+            try:
+                st = os.stat(path)
+            except OSError:
+                edited = True
+                continue
+
+            if st.st_size == size and st.st_mtime_ns == mtime_ns:
+                items.append(IndexedFile(Path(path), directory, st, size, category, purpose, confidence, mtime_ns))
+            else:
+                edited = True
+                items.append(IndexedFile(Path(path), directory, st, st.st_size, mtime_ns=st.st_mtime_ns))
+
+        return items, edited
+
+    def _revalidate(self, directory: str, entries: List[os.DirEntry]) -> Iterable[IndexedFile]:
+        """Reuse stored analyses for files of a changed directory whose size and mtime still match."""
+        known = {
+            path: (size, mtime_ns, category, purpose, confidence)
+            for path, size, mtime_ns, category, purpose, confidence in self._conn.execute(
+                "SELECT path, size, mtime_ns, category, purpose, confidence FROM files WHERE dir = ?",
+                (directory,)
+            )
+        }
+
+        for entry in entries:
+            try:
+                st = entry.stat()
+            except OSError:
+                continue
+
+            path = Path(entry.path)
+            stored = known.get(str(path))
+            if stored is not None and stored[0] == st.st_size and stored[1] == st.st_mtime_ns:
+                yield IndexedFile(path, directory, st, st.st_size, stored[2], stored[3], stored[4], st.st_mtime_ns)
+            else:
+                yield IndexedFile(path, directory, st, st.st_size, mtime_ns=st.st_mtime_ns)
+
+    def _prune(self, directory: str, visited: Set[str]) -> None:
+        """Forget directories below directory that no longer exist or are now excluded."""
+        prefix = directory.rstrip(os.sep) + os.sep
+        stale = [
+            path for (path,) in self._conn.execute("SELECT path FROM dirs")
+            if (path == directory or path.startswith(prefix)) and path not in visited
+        ]
+        if stale:
+            with self._conn:
+                self._conn.executemany("DELETE FROM dirs WHERE path = ?", ((p,) for p in stale))
+                self._conn.executemany("DELETE FROM files WHERE dir = ?", ((p,) for p in stale))
+
+    def lookup(self, path: Path, stat_result: os.stat_result) -> Optional[IndexedFile]:
+        """Get the stored analysis of one file if its size and mtime still match."""
+        row = self._conn.execute(
+            "SELECT size, mtime_ns, category, purpose, confidence FROM files WHERE path = ?", (str(path),)
+        ).fetchone()
+        if row is None or row[0] != stat_result.st_size or row[1] != stat_result.st_mtime_ns:
+            return None
+        return IndexedFile(path, os.path.dirname(str(path)), stat_result, row[0], row[2], row[3], row[4], row[1])
+
+    def store(self, directory: str, analyzed: Iterable[Tuple[IndexedFile, str, str, float]]) -> None:
+        """Write back a directory listed by the current scan with its files' analyses.
+
+        ``analyzed`` holds (file, category, purpose, confidence) for the
+        directory's files. Directories that came unchanged from the index
+        are skipped, and a directory is only written when all of its files
+        are present, so a scan stopped early never leaves a directory
+        recorded with files missing. Writes are committed by close().
+        """
+        listed = self._changed_dirs.pop(directory, None)
+        if listed is None:
+            return
+        mtime_ns, subdirs, file_count, ignore_key = listed
+
+        # Files modified just before being analyzed are likewise analyzed again next time
+        racy_after_ns = time.time_ns() - RACY_MTIME_NS
+        rows = [
+            (str(item.path), directory, item.stat_result.st_size,
+             item.stat_result.st_mtime_ns if item.stat_result.st_mtime_ns <= racy_after_ns else UNTRUSTED_MTIME_NS,
+             category, purpose, confidence)
+            for item, category, purpose, confidence in analyzed
+            if item.stat_result is not None
+        ]
+        if len(rows) != file_count:
+            return
+
+        self._conn.execute("DELETE FROM files WHERE dir = ?", (directory,))
+        self._conn.execute("INSERT OR REPLACE INTO dirs VALUES (?, ?, ?, ?)",
+                           (directory, mtime_ns, json.dumps(subdirs), ignore_key))
+        self._conn.executemany("INSERT OR REPLACE INTO files VALUES (?, ?, ?, ?, ?, ?, ?)", rows)
+
+    def close(self) -> None:
+        """Commit what store() wrote and close the database."""
+        try:
+            self._conn.commit()
+        finally:
+            self._conn.close()
@@ -3,8 +3,10 @@ File operations module for intelligent file management.
 """
 
 import os
+import re
 import shutil
 import json
+import filecmp
 from pathlib import Path
 from typing import List, Dict, Optional, Tuple, Set
 from dataclasses import dataclass
@@ -13,13 +15,16 @@ from rich.table import Table
 from rich.prompt import Confirm, Prompt
 from rich.panel import Panel
 
-from .file_analyzer import FileAnalyzer, FileInfo, FileCategory
+from .file_analyzer import DuplicateGroup, FileAnalyzer, FileInfo, FileCategory, parse_result_limit
 from .llm_resolver import LLMResolver
 from .emergency_undo import file_logger
 from .file_context import file_context, get_context_for_query, update_context_after_operation, clear_context_if_new_operation
 
 console = Console()
 
+# "find duplicate files", "show duplicated images in data", "list identical files"
+_DUPLICATES_QUERY = re.compile(r'\b(?:duplicates?|duplicated|identical)\b', re.IGNORECASE)
+
 @dataclass
 class FileOperation:
     """Represents a file operation to be performed."""
@@ -41,10 +46,11 @@ class OperationResult:
 class FileOperationManager:
     """Manages intelligent file operations using AI."""
     
-    def __init__(self, dry_run: bool = False, verbose: bool = False):
+    def __init__(self, dry_run: bool = False, verbose: bool = False, max_workers: Optional[int] = None):
         self.dry_run = dry_run
         self.verbose = verbose
-        self.analyzer = FileAnalyzer(verbose=verbose)
+        self.max_workers = max_workers
+        self.analyzer = FileAnalyzer(verbose=verbose, max_workers=max_workers)
         self.llm_resolver = LLMResolver(verbose=verbose)
         self.current_directory = Path.cwd()
     
@@ -85,10 +91,11 @@ class FileOperationManager:
                     console.print("[yellow]Operations cancelled by user[/yellow]")
                     return []
         
-        # Execute operations
+        # Execute operations, independent ones in parallel
+        from .file_executor import execute_operations
+        
         files_affected = []
-        for operation in operations:
-            result = self._execute_operation(operation)
+        for result in execute_operations(operations, self._execute_operation, self.max_workers):
             results.append(result)
             
             if result.success:
@@ -113,20 +120,44 @@ class FileOperationManager:
     
     def _handle_list_command(self, command: str) -> List[OperationResult]:
         """Handle file listing commands."""
-        # Analyze current directory
-        files = self.analyzer.analyze_directory(self.current_directory)
-        
         # Find matching files
         if "context" in command.lower() or "active" in command.lower():
             # Show current context
             file_context.show_context(verbose=self.verbose)
             return []
         
-        # Find files based on query
-        matching_files = self.analyzer.find_files_by_query(files, command)
+        if _DUPLICATES_QUERY.search(command):
+            return self._handle_duplicates_command(command)
+        
+        limit = parse_result_limit(command)
+        files: List[FileInfo] = []
+        matching_files: List[FileInfo] = []
+        
+        # Queries the quick heuristics understand are matched while the tree is
+        # still being walked, and a "first N" query stops the walk at N matches
+        predicate = self.analyzer.quick_match_predicate(command, self.current_directory)
+        if predicate is not None:
+            stream = self.analyzer.iter_analyze_directory(self.current_directory)
+            try:
+                with console.status("[bold blue]Scanning files...", spinner="dots") as status:
+                    for file_info in stream:
+                        if not predicate(file_info):
+                            continue
+                        matching_files.append(file_info)
+                        status.update(f"[bold blue]Scanning files... {len(matching_files)} found")
+                        if limit is not None and len(matching_files) >= limit:
+                            break
+            finally:
+                stream.close()  # Stops the walk and records what was analyzed in the index
+        else:
+            # Everything else needs the whole tree, e.g. for AI matching
+            files = self.analyzer.analyze_directory(self.current_directory)
+            matching_files = self.analyzer.find_files_by_query(files, command, self.current_directory)
+            if limit is not None:
+                matching_files = matching_files[:limit]
         
         if not matching_files:
-            if self.verbose:
+            if self.verbose and files:
                 console.print(f"[blue]Analyzed {len(files)} files for query: {command}[/blue]")
                 # Show a few example files for debugging
                 if files:
@@ -153,6 +184,79 @@ class FileOperationManager:
             files_affected=file_paths
         )]
     
+    def _handle_duplicates_command(self, command: str) -> List[OperationResult]:
+        """Find files with identical content and put the redundant copies in context.
+        
+        The rest of the query scopes the search ("duplicate images in data"),
+        and "delete them" or "move them to ..." can follow.
+        """
+        scope = _DUPLICATES_QUERY.sub(' ', command)
+        predicate = self.analyzer.quick_match_predicate(scope, self.current_directory)
+        
+        files = self.analyzer.analyze_directory(self.current_directory)
+        candidates = [f for f in files if predicate(f)] if predicate is not None else files
+        
+        with console.status(f"[bold blue]Comparing {len(candidates)} files...", spinner="dots"):
+            groups = self.analyzer.find_duplicates(candidates)
+        
+        if not groups:
+            console.print(f"[green]No duplicate files found among {len(candidates)} files[/green]")
+            return []
+        
+        self._display_duplicate_groups(groups)
+        
+        duplicates = [path for group in groups for path in group.duplicates]
+        originals = {path: group.keep for group in groups for path in group.duplicates}
+        update_context_after_operation(duplicates, command, "duplicates", originals)
+        
+        reclaimable = sum(group.reclaimable for group in groups)
+        return [OperationResult(
+            success=True,
+            operation=FileOperation("list", None, None, reason=f"Found {len(groups)} groups of duplicate files"),
+            message=f"Found {len(duplicates)} duplicate files, {self._format_size(reclaimable)} reclaimable",
+            files_affected=duplicates
+        )]
+    
+    def _display_duplicate_groups(self, groups: List[DuplicateGroup]):
+        """Display duplicate groups with the copy kept and the space each group wastes."""
+        reclaimable = sum(group.reclaimable for group in groups)
+        console.print(f"[blue]🔁 {len(groups)} groups of duplicate files, "
+                      f"{self._format_size(reclaimable)} reclaimable:[/blue]")
+        
+        for i, group in enumerate(groups, 1):
+            console.print(f"[dim]Group {i}: {len(group.paths)} copies of {self._format_size(group.size)}, "
+                          f"{self._format_size(group.reclaimable)} reclaimable[/dim]")
+            
+            table = Table(show_header=False, box=None, padding=(0, 1))
+            table.add_column("Icon", style="blue", width=3)
+            table.add_column("Path", style="white")
+            table.add_column("Status", style="dim")
+            
+            table.add_row("✅", str(self._relative_path(group.keep)), "kept")
+            for path in group.duplicates:
+                table.add_row("📄", str(self._relative_path(path)), "duplicate")
+            
+            console.print(table)
+        
+        console.print("[dim]💡 The duplicate copies are now in your active context. Use 'delete them' or "
+                      "'move them to \"folder\"' to clean up; one copy of each file is always kept.[/dim]")
+        console.print()
+    
+    def _relative_path(self, path: Path) -> Path:
+        try:
+            return path.relative_to(self.current_directory)
+        except ValueError:
+            return path
+    
+    @staticmethod
+    def _format_size(size: int) -> str:
+        if size < 1024:
+            return f"{size}B"
+        elif size < 1024 * 1024:
+            return f"{size // 1024}KB"
+        else:
+            return f"{size // (1024 * 1024)}MB"
+    
     def _display_file_list(self, files: List[FileInfo], query: str):
         """Display a list of files in a nice format."""
         console.print(f"[blue]📁 Files matching '{query}' ({len(files)} found):[/blue]")
@@ -194,19 +298,11 @@ class FileOperationManager:
                 else:
                     icon = "📄"
                 
-                # Format file size
-                if file_info.size < 1024:
-                    size_str = f"{file_info.size}B"
-                elif file_info.size < 1024 * 1024:
-                    size_str = f"{file_info.size // 1024}KB"
-                else:
-                    size_str = f"{file_info.size // (1024 * 1024)}MB"
-                
                 table.add_row(
                     icon,
                     file_info.name,
                     file_info.purpose,
-                    size_str
+                    self._format_size(file_info.size)
                 )
             
             console.print(table)
@@ -227,8 +323,14 @@ class FileOperationManager:
         if context_files:
             if self.verbose:
                 console.print(f"[blue]Using {len(context_files)} files from context[/blue]")
+            
+            if file_context.current_context and file_context.current_context.operation_type == "duplicates":
+                duplicate_operations = self._parse_duplicates_command(command, context_files)
+                if duplicate_operations is not None:
+                    return duplicate_operations
+            
             # Convert Path objects to FileInfo objects
-            files = [self.analyzer.analyze_file(f) for f in context_files if f.exists()]
+            files = self.analyzer.analyze_files(context_files, self.current_directory)
         else:
             # Analyze current directory
             files = self.analyzer.analyze_directory(self.current_directory)
@@ -250,6 +352,81 @@ class FileOperationManager:
         
         return operations
     
+    def _parse_duplicates_command(self, command: str, context_files: List[Path]) -> Optional[List[FileOperation]]:
+        """Parse "move them" / "delete them" after a duplicates query, or None for other commands.
+        
+        Every copy is compared again with the copy kept for it, so nothing is
+        touched if either changed or the kept copy is gone since the query.
+        """
+        # Whole words only, since "remove" contains "move"
+        is_delete = re.search(r'\b(?:delete|remove)\b', command, re.IGNORECASE) is not None
+        is_move = not is_delete and re.search(r'\b(?:move|organize)\b', command, re.IGNORECASE) is not None
+        if not (is_move or is_delete):
+            return None
+        
+        verified = []
+        for path in context_files:
+            original = file_context.get_original(path)
+            if original is None or not self._still_identical(path, original):
+                console.print(f"[yellow]Skipping {path.name}: no longer identical to the copy being kept[/yellow]")
+                continue
+            verified.append((path, original))
+        
+        operations = []
+        if is_move:
+            files = self.analyzer.analyze_files([path for path, _ in verified], self.current_directory)
+            target_dir = self._determine_target_directory(command, files)
+            if not target_dir:
+                return operations
+            
+            if not target_dir.exists():
+                operations.append(FileOperation(
+                    operation="create",
+                    source_path=None,
+                    target_path=target_dir,
+                    reason=f"Create target directory {target_dir.name}",
+                    confidence=0.9
+                ))
+            
+            # Copies often share a name, so later ones get a numbered name
+            taken: Set[Path] = set()
+            originals = dict(verified)
+            for file_info in files:
+                target_path = target_dir / file_info.name
+                n = 2
+                while target_path in taken or target_path.exists():
+                    target_path = target_dir / f"{file_info.path.stem} ({n}){file_info.path.suffix}"
+                    n += 1
+                taken.add(target_path)
+                
+                operations.append(FileOperation(
+                    operation="move",
+                    source_path=file_info.path,
+                    target_path=target_path,
+                    reason=f"Move duplicate of {self._relative_path(originals[file_info.path])} to {target_dir.name}",
+                    confidence=1.0
+                ))
+        else:
+            for path, original in verified:
+                operations.append(FileOperation(
+                    operation="delete",
+                    source_path=path,
+                    target_path=None,
+                    reason=f"Delete duplicate of {self._relative_path(original)}",
+                    confidence=1.0
+                ))
+        
+        return operations
+    
+    @staticmethod
+    def _still_identical(path: Path, original: Path) -> bool:
+        try:
+            if path.resolve() == original.resolve():
+                return False
+            return filecmp.cmp(original, path, shallow=False)
+        except OSError:
+            return False
+    
     def _parse_create_folder_command(self, command: str, files: List[FileInfo]) -> List[FileOperation]:
         """Parse folder creation commands."""
         operations = []
@@ -330,7 +507,7 @@ class FileOperationManager:
         operations = []
         
         # Find files to move based on command
-        target_files = self.analyzer.find_files_by_query(files, command)
+        target_files = self.analyzer.find_files_by_query(files, command, self.current_directory)
         
         if not target_files:
             return operations
@@ -369,7 +546,7 @@ class FileOperationManager:
         operations = []
         
         # Find files to delete
-        target_files = self.analyzer.find_files_by_query(files, command)
+        target_files = self.analyzer.find_files_by_query(files, command, self.current_directory)
         
         # Only allow deletion of safe file types by default
         safe_to_delete = [FileCategory.TEMPORARY, FileCategory.BUILD]
@@ -391,7 +568,7 @@ class FileOperationManager:
         operations = []
         
         # Find files to copy
-        target_files = self.analyzer.find_files_by_query(files, command)
+        target_files = self.analyzer.find_files_by_query(files, command, self.current_directory)
         
         # Determine target directory
         target_dir = self._determine_target_directory(command, target_files)
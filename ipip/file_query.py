@@ -0,0 +1,354 @@
+"""
+Compiler from natural-language file queries to structured filter plans.
+
+Queries such as "python files larger than 10MB", "yaml files in config" or
+"*.log files older than 30 days" are parsed into a list of predicates that
+run directly over analyzed files, so only queries outside this grammar need
+the LLM.
+"""
+
+import fnmatch
+import os
+import re
+import time
+from dataclasses import dataclass, field
+from datetime import datetime
+from pathlib import Path
+from typing import Callable, List, Optional, Tuple
+
+from .file_analyzer import FileCategory, FileInfo
+
+FilePredicate = Callable[[FileInfo], bool]
+
+# File type words and the extensions they stand for
+TYPE_EXTENSIONS = {
+    'python': ('.py', '.pyi'),
+    'py': ('.py', '.pyi'),
+    'javascript': ('.js', '.ts'),
+    'js': ('.js',),
+    'typescript': ('.ts', '.tsx'),
+    'ts': ('.ts', '.tsx'),
+    'yaml': ('.yaml', '.yml'),
+    'yml': ('.yaml', '.yml'),
+    'json': ('.json',),
+    'toml': ('.toml',),
+    'ini': ('.ini', '.cfg'),
+    'xml': ('.xml',),
+    'html': ('.html', '.htm'),
+    'css': ('.css', '.scss', '.sass', '.less'),
+    'markdown': ('.md', '.markdown'),
+    'md': ('.md', '.markdown'),
+    'text': ('.txt',),
+    'txt': ('.txt',),
+    'csv': ('.csv',),
+    'sql': ('.sql',),
+    'shell': ('.sh', '.bash', '.zsh'),
+    'log': ('.log',),
+    'image': ('.png', '.jpg', '.jpeg', '.gif', '.svg'),
+    'images': ('.png', '.jpg', '.jpeg', '.gif', '.svg'),
+    'pdf': ('.pdf',),
+    'c': ('.c', '.h'),
+    'cpp': ('.cpp', '.cc', '.cxx', '.hpp', '.h'),
+    'java': ('.java',),
+    'go': ('.go',),
+    'rust': ('.rs',),
+    'ruby': ('.rb',),
+}
+
+# Category words and the category they select
+CATEGORY_WORDS = {
+    'test': FileCategory.TEST,
+    'tests': FileCategory.TEST,
+    'config': FileCategory.CONFIG,
+    'configs': FileCategory.CONFIG,
+    'configuration': FileCategory.CONFIG,
+    'doc': FileCategory.DOCUMENTATION,
+    'docs': FileCategory.DOCUMENTATION,
+    'documentation': FileCategory.DOCUMENTATION,
+    'data': FileCategory.DATA,
+    'build': FileCategory.BUILD,
+    'script': FileCategory.SCRIPT,
+    'scripts': FileCategory.SCRIPT,
+    'asset': FileCategory.ASSET,
+    'assets': FileCategory.ASSET,
+    'temp': FileCategory.TEMPORARY,
+    'temporary': FileCategory.TEMPORARY,
+    'source': FileCategory.SOURCE,
+    'code': FileCategory.SOURCE,
+}
+
+# Words that carry no constraint of their own
+FILLER_WORDS = frozenset({
+    'list', 'show', 'find', 'display', 'print', 'get', 'search', 'for', 'me',
+    'all', 'any', 'every', 'the', 'a', 'an', 'my', 'our', 'please', 'and',
+    'file', 'files', 'that', 'which', 'are', 'is', 'were', 'was', 'with',
+    'of', 'there', 'here', 'whose', 'have', 'has', 'only', 'just',
+    'in', 'this', 'current', 'folder', 'directory', 'dir',
+    # Operation verbs: "delete files older than 30 days" selects like a listing
+    'delete', 'remove', 'copy', 'move',
+})
+
+_UNITS = {
+    '': 1, 'b': 1, 'byte': 1, 'bytes': 1,
+    'k': 1024, 'kb': 1024, 'kib': 1024,
+    'm': 1024 ** 2, 'mb': 1024 ** 2, 'mib': 1024 ** 2,
+    'g': 1024 ** 3, 'gb': 1024 ** 3, 'gib': 1024 ** 3,
+}
+
+_SECONDS = {
+    'minute': 60, 'hour': 3600, 'day': 86400, 'week': 7 * 86400,
+    'month': 30 * 86400, 'year': 365 * 86400,
+}
+
+_NUMBER = r'(\d+(?:\.\d+)?)'
+_SIZE_UNIT = r'\s*(b|bytes?|kb|kib|k|mb|mib|m|gb|gib|g)?\b'
+_TIME_UNIT = r'\s*(minute|hour|day|week|month|year)s?\b'
+_VERB = r'(?:(?:modified|changed|updated|edited|touched)\s+)?'
+
+_LIMIT = re.compile(r'\b(?:first|top)\s+\d+\b')
+_SIZE_BETWEEN = re.compile(rf'\b(?:sized?\s+)?between\s+{_NUMBER}{_SIZE_UNIT}\s+and\s+{_NUMBER}{_SIZE_UNIT}')
+_SIZE_COMPARE = re.compile(
+    rf'\b(larger|bigger|greater|more|over|above|at\s+least|smaller|less|under|below|at\s+most)'
+    rf'(?:\s+than)?\s+{_NUMBER}{_SIZE_UNIT}'
+)
+_EMPTY = re.compile(r'\bempty\b')
+_AGE_WITHIN = re.compile(rf'\b{_VERB}(?:in|within|during)\s+(?:the\s+)?(?:last|past)\s+(\d+)?{_TIME_UNIT}')
+_AGE_LAST = re.compile(rf'\b{_VERB}(?:in\s+)?(?:the\s+)?(?:last|past)\s+(\d+)?{_TIME_UNIT}')
+_AGE_COMPARE = re.compile(rf'\b{_VERB}(older|newer)\s+than\s+(\d+){_TIME_UNIT}')
+_AGE_AGO = re.compile(rf'\b{_VERB}(more|less)\s+than\s+(\d+){_TIME_UNIT}\s+ago\b')
+_AGE_DAY = re.compile(rf'\b{_VERB}(today|yesterday)\b')
+_AGE_DATE = re.compile(rf'\b{_VERB}(since|after|before)\s+(\d{{4}}-\d{{2}}-\d{{2}})\b')
+_NAMED = re.compile(r'\b(?:named|called|matching)\s+["\']?([^\s"\']+)["\']?')
+_NAME_CONTAINS = re.compile(r'\bwith\s+["\']?([^\s"\']+?)["\']?\s+in\s+(?:the\s+|their\s+)?name\b')
+_DIRECTORY = re.compile(
+    r'\b(?:in|under|inside|within|from)\s+(?:the\s+)?["\']?([\w.\-/\\]+?)["\']?'
+    r'(?:\s+(?:folder|directory|dir|subdirectory))?(?=\s|$)'
+)
+_GLOB = re.compile(r'(?<!\S)["\']?([^\s"\']*[*?\[][^\s"\']*)["\']?(?!\S)')
+_EXTENSION = re.compile(r'(?<!\S)\.([a-z0-9]+)(?!\S)')
+
+
+def _format_size(size: float) -> str:
+    for unit in ('bytes', 'KB', 'MB'):
+        if size < 1024:
+            return f"{size:g} {unit}"
+        size /= 1024
+    return f"{size:g} GB"
+
+
+@dataclass
+class QueryPlan:
+    """A conjunction of file predicates compiled from a query."""
+    predicates: List[Tuple[str, FilePredicate]] = field(default_factory=list)
+
+    def add(self, description: str, predicate: FilePredicate) -> None:
+        self.predicates.append((description, predicate))
+
+    def __call__(self, file_info: FileInfo) -> bool:
+        return all(predicate(file_info) for _, predicate in self.predicates)
+
+    def filter(self, files) -> List[FileInfo]:
+        """Get the files matching every predicate, in their original order."""
+        return [f for f in files if self(f)]
+
+    def describe(self) -> str:
+        return " and ".join(description for description, _ in self.predicates)
+
+
+class QueryCompiler:
+    """Parses file queries into QueryPlans.
+
+    Each clause the grammar knows is cut out of the query as it is
+    recognized. A query compiles only if what remains is filler ("show me
+    all ... files"), so anything the grammar can't express (negations,
+    "or", descriptions like "related to auth") is left to the LLM instead
+    of being answered with a partial match.
+    """
+
+    def __init__(self, root: Optional[Path] = None, now: Optional[float] = None):
+        self.root = root
+        self.now = now if now is not None else time.time()
+
+    def compile(self, query: str) -> Optional[QueryPlan]:
+        """Compile query, or return None if the grammar can't express it."""
+        plan = QueryPlan()
+        text = ' ' + query.lower().strip().rstrip('?.!') + ' '
+
+        text = _LIMIT.sub(' ', text)  # Result limits are applied by the caller
+        for clause in (self._age, self._size, self._names, self._directory, self._glob):
+            text = clause(text, plan)
+        text = self._words(text, plan)
+
+        if not plan.predicates or text.split():
+            return None
+        return plan
+
+    # Clauses: each adds its predicates to plan and returns text with the clause removed
+
+    def _size(self, text: str, plan: QueryPlan) -> str:
+        def between(match):
+            low = float(match.group(1)) * _UNITS[match.group(2) or '']
+            high = float(match.group(3)) * _UNITS[match.group(4) or match.group(2) or '']
+            plan.add(f"between {_format_size(low)} and {_format_size(high)}",
+                     lambda f: low <= f.size <= high)
+            return ' '
+
+        def compare(match):
+            word = ' '.join(match.group(1).split())
+            limit = float(match.group(2)) * _UNITS[match.group(3) or '']
+            if word in ('larger', 'bigger', 'greater', 'more', 'over', 'above'):
+                plan.add(f"larger than {_format_size(limit)}", lambda f: f.size > limit)
+            elif word == 'at least':
+                plan.add(f"at least {_format_size(limit)}", lambda f: f.size >= limit)
+            elif word == 'at most':
+                plan.add(f"at most {_format_size(limit)}", lambda f: f.size <= limit)
+            else:
+                plan.add(f"smaller than {_format_size(limit)}", lambda f: f.size < limit)
+            return ' '
+
+        def empty(match):
+            plan.add("empty", lambda f: f.size == 0)
+            return ' '
+
+        text = _SIZE_BETWEEN.sub(between, text)
+        text = _SIZE_COMPARE.sub(compare, text)
+        return _EMPTY.sub(empty, text)
+
+    def _age(self, text: str, plan: QueryPlan) -> str:
+        def newer_than(seconds: float, description: str):
+            cutoff = self.now - seconds
+            plan.add(description, lambda f: f.modified >= cutoff)
+
+        def older_than(seconds: float, description: str):
+            cutoff = self.now - seconds
+            plan.add(description, lambda f: 0 < f.modified < cutoff)
+
+        def within(match):
+            count, unit = int(match.group(1) or 1), match.group(2)
+            newer_than(count * _SECONDS[unit], f"modified in the last {count} {unit}(s)")
+            return ' '
+
+        def compare(match):
+            direction, count, unit = match.group(1), int(match.group(2)), match.group(3)
+            seconds = count * _SECONDS[unit]
+            if direction in ('older', 'more'):
+                older_than(seconds, f"older than {count} {unit}(s)")
+            else:
+                newer_than(seconds, f"newer than {count} {unit}(s)")
+            return ' '
+
+        def day(match):
+            midnight = datetime.fromtimestamp(self.now).replace(hour=0, minute=0, second=0, microsecond=0)
+            start = midnight.timestamp()
+            if match.group(1) == 'today':
+                plan.add("modified today", lambda f: f.modified >= start)
+            else:
+                end, start = start, start - 86400
+                plan.add("modified yesterday", lambda f: start <= f.modified < end)
+            return ' '
+
+        def date(match):
+            try:
+                cutoff = datetime.strptime(match.group(2), '%Y-%m-%d').timestamp()
+            except ValueError:
+                return match.group(0)  # Not a real date; leave it for the LLM
+            if match.group(1) == 'before':
+                plan.add(f"modified before {match.group(2)}", lambda f: 0 < f.modified < cutoff)
+            else:
+                plan.add(f"modified since {match.group(2)}", lambda f: f.modified >= cutoff)
+            return ' '
+
+        text = _AGE_WITHIN.sub(within, text)
+        text = _AGE_LAST.sub(within, text)
+        text = _AGE_COMPARE.sub(compare, text)
+        text = _AGE_AGO.sub(compare, text)
+        text = _AGE_DAY.sub(day, text)
+        return _AGE_DATE.sub(date, text)
+
+    def _names(self, text: str, plan: QueryPlan) -> str:
+        def named(match):
+            self._add_name(plan, match.group(1))
+            return ' '
+
+        text = _NAME_CONTAINS.sub(named, text)
+        return _NAMED.sub(named, text)
+
+    def _add_name(self, plan: QueryPlan, pattern: str) -> None:
+        if any(c in pattern for c in '*?['):
+            plan.add(f"named {pattern}", lambda f: fnmatch.fnmatchcase(f.name.lower(), pattern))
+        else:
+            plan.add(f"name contains '{pattern}'", lambda f: pattern in f.name.lower())
+
+    def _directory(self, text: str, plan: QueryPlan) -> str:
+        def directory(match):
+            target = match.group(1).replace('\\', '/').strip('/')
+            if not target or target in FILLER_WORDS or target in ('this', 'current', '.'):
+                return match.group(0)
+            parts = tuple(target.split('/'))
+            plan.add(f"in {target}/", lambda f: self._in_directory(f.path, parts))
+            return ' '
+
+        return _DIRECTORY.sub(directory, text)
+
+    def _in_directory(self, path: Path, parts: Tuple[str, ...]) -> bool:
+        """Check if the directories above path contain parts as a consecutive run."""
+        dirs = path.parent.parts
+        if self.root is not None:
+            try:
+                dirs = path.parent.relative_to(self.root).parts
+            except ValueError:
+                pass
+        dirs = tuple(part.lower() for part in dirs)
+        n = len(parts)
+        return any(dirs[i:i + n] == parts for i in range(len(dirs) - n + 1))
+
+    def _glob(self, text: str, plan: QueryPlan) -> str:
+        def glob(match):
+            pattern = match.group(1)
+            if '/' in pattern:
+                plan.add(f"path matches {pattern}", lambda f: fnmatch.fnmatchcase(self._relative(f.path), pattern))
+            else:
+                plan.add(f"named {pattern}", lambda f: fnmatch.fnmatchcase(f.name.lower(), pattern))
+            return ' '
+
+        return _GLOB.sub(glob, text)
+
+    def _relative(self, path: Path) -> str:
+        if self.root is not None:
+            try:
+                path = path.relative_to(self.root)
+            except ValueError:
+                pass
+        return str(path).replace(os.sep, '/').lower()
+
+    def _words(self, text: str, plan: QueryPlan) -> str:
+        """Match file type and category words, e.g. "python", ".yml", "test"."""
+        extensions = set()
+        categories = set()
+        remaining = []
+
+        for word in text.split():
+            dotted = _EXTENSION.fullmatch(word)
+            if dotted:
+                extensions.add('.' + dotted.group(1))
+            elif word in TYPE_EXTENSIONS:
+                extensions.update(TYPE_EXTENSIONS[word])
+            elif word in CATEGORY_WORDS:
+                categories.add(CATEGORY_WORDS[word])
+            else:
+                remaining.append(word)
+
+        if extensions:
+            wanted = frozenset(extensions)
+            plan.add(f"extension in {', '.join(sorted(wanted))}", lambda f: f.extension in wanted)
+        if categories:
+            chosen = frozenset(categories)
+            plan.add(f"category in {', '.join(sorted(c.value for c in chosen))}",
+                     lambda f: f.category in chosen)
+
+        return ' '.join(word for word in remaining if word not in FILLER_WORDS)
+
+
+def compile_query(query: str, root: Optional[Path] = None) -> Optional[QueryPlan]:
+    """Compile a file query into a filter plan, or None if it needs the LLM."""
+    return QueryCompiler(root).compile(query)
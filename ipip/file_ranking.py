@@ -0,0 +1,90 @@
+"""
+Local pre-ranking of files against a query, to choose what the LLM sees.
+"""
+
+import re
+from functools import lru_cache
+from typing import FrozenSet, List, Sequence
+
+from .file_analyzer import FileInfo
+from .file_query import FILLER_WORDS
+
+_TOKEN = re.compile(r'[a-z0-9]+')
+_CAMEL_CASE = re.compile(r'([a-z0-9])([A-Z])')
+
+# Share of the query's trigrams a name must contain to count as a fuzzy match
+TRIGRAM_THRESHOLD = 0.5
+
+
+def _singular(token: str) -> str:
+    """Crudely drop a plural "s", so "scripts" matches "script"."""
+    if len(token) > 3 and token.endswith('s') and not token.endswith('ss'):
+        return token[:-1]
+    return token
+
+
+@lru_cache(maxsize=4096)
+def tokenize(text: str) -> FrozenSet[str]:
+    """Split text into singular lower-case word tokens, breaking up camelCase and snake_case."""
+    return frozenset(_singular(t) for t in _TOKEN.findall(_CAMEL_CASE.sub(r'\1 \2', text).lower()))
+
+
+def trigrams(tokens: FrozenSet[str]) -> FrozenSet[str]:
+    """Get the character trigrams of tokens, each padded so short tokens still have some."""
+    grams = set()
+    for token in tokens:
+        padded = f"  {token} "
+        grams.update(padded[i:i + 3] for i in range(len(padded) - 2))
+    return frozenset(grams)
+
+
+class CandidateRanker:
+    """Scores files by how much their name and analysis overlap a query.
+
+    Exact token matches in the file name count most, then matches in the
+    purpose, category or parent directory, then prefix matches ("install"
+    and "installer"), then names containing most of the query's
+    trigrams, which catches partial words and typos.
+    """
+
+    def __init__(self, query: str):
+        self.tokens = frozenset(t for t in tokenize(query) if len(t) > 1 and t not in FILLER_WORDS)
+        self.trigrams = trigrams(self.tokens)
+
+    @property
+    def is_broad(self) -> bool:
+        """Whether the query has no words to rank by, e.g. "list everything important"."""
+        return not self.tokens
+
+    def score(self, file_info: FileInfo) -> float:
+        if not self.tokens:
+            return 0.0
+
+        name_tokens = tokenize(file_info.name)
+        context_tokens = (tokenize(file_info.purpose) | tokenize(file_info.category.value)
+                          | tokenize(file_info.path.parent.name))
+
+        score = 3.0 * len(self.tokens & name_tokens) + 1.0 * len(self.tokens & context_tokens)
+
+        for token in self.tokens - name_tokens:
+            if len(token) >= 3 and any(
+                len(other) >= 3 and (other.startswith(token) or token.startswith(other))
+                for other in name_tokens
+            ):
+                score += 1.5
+
+        overlap = len(self.trigrams & trigrams(name_tokens)) / len(self.trigrams)
+        if overlap >= TRIGRAM_THRESHOLD:
+            score += 2.0 * overlap
+
+        return score
+
+    def rank(self, files: Sequence[FileInfo]) -> List[FileInfo]:
+        """Get the files with a positive score, best first; ties keep their original order."""
+        scored = []
+        for position, file_info in enumerate(files):
+            score = self.score(file_info)
+            if score > 0:
+                scored.append((-score, position, file_info))
+        scored.sort(key=lambda entry: entry[:2])
+        return [file_info for _, _, file_info in scored]
@@ -0,0 +1,94 @@
+"""
+Cheap fingerprints of the environment used to skip redundant requirements work.
+"""
+
+import hashlib
+import json
+import os
+import sys
+from pathlib import Path
+from typing import Dict, Iterable, Optional
+
+from .config import get_cache_dir
+from .watcher import get_site_packages_dirs
+
+_METADATA_SUFFIXES = ('.dist-info', '.egg-info', '.egg-link', '.pth')
+
+
+def environment_fingerprint(*parts: str, site_dirs: Optional[Iterable[Path]] = None) -> str:
+    """Fingerprint the installed distributions plus any extra parts.
+
+    Only directory listings and mtimes of site-packages are read, so this
+    takes milliseconds; an install, upgrade or removal changes both.
+    """
+    hasher = hashlib.sha1(sys.executable.encode('utf-8'))
+
+    for directory in site_dirs if site_dirs is not None else get_site_packages_dirs():
+        try:
+            mtime_ns = directory.stat().st_mtime_ns
+            with os.scandir(directory) as it:
+                names = sorted(entry.name for entry in it if entry.name.endswith(_METADATA_SUFFIXES))
+        except OSError:
+            continue
+        hasher.update(f"{directory}\0{mtime_ns}\0{','.join(names)}\n".encode('utf-8'))
+
+    for part in parts:
+        hasher.update(f"{part}\n".encode('utf-8'))
+
+    return hasher.hexdigest()
+
+
+class RequirementsState:
+    """Fingerprints recorded when each requirements file of a project was last written.
+
+    A recorded fingerprint only counts while the file itself still has the
+    size and mtime it had when it was recorded, so hand edits invalidate it.
+    """
+
+    VERSION = 1
+
+    def __init__(self, project_root: Path, cache_dir: Optional[Path] = None):
+        self.project_root = project_root
+        key = hashlib.sha1(str(project_root.resolve()).encode('utf-8')).hexdigest()[:16]
+        self.state_file = (cache_dir or get_cache_dir()) / "state" / f"{key}.json"
+        self.entries: Dict[str, list] = {}
+        self.load()
+
+    def load(self) -> None:
+        """Load recorded fingerprints, starting empty if they're missing or stale."""
+        try:
+            with open(self.state_file, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            if data.get("version") == self.VERSION:
+                self.entries = data.get("files", {})
+        except (OSError, ValueError):
+            self.entries = {}
+
+    def is_current(self, file_path: Path, fingerprint: str) -> bool:
+        """Check if file_path was written for this fingerprint and hasn't changed since."""
+        entry = self.entries.get(str(file_path))
+        if entry is None or entry[0] != fingerprint:
+            return False
+        try:
+            st = file_path.stat()
+        except OSError:
+            return False
+        return entry[1] == st.st_size and entry[2] == st.st_mtime_ns
+
+    def record(self, file_path: Path, fingerprint: str) -> None:
+        """Record the fingerprint file_path now corresponds to."""
+        try:
+            st = file_path.stat()
+        except OSError:
+            return
+
+        self.entries[str(file_path)] = [fingerprint, st.st_size, st.st_mtime_ns]
+
+        try:
+            self.state_file.parent.mkdir(parents=True, exist_ok=True)
+            tmp_file = self.state_file.with_suffix('.tmp')
+            with open(tmp_file, 'w', encoding='utf-8') as f:
+                json.dump({"version": self.VERSION, "files": self.entries}, f)
+            os.replace(tmp_file, self.state_file)
+        except OSError:
+            pass  # Skipping work is an optimization; never fail the command over it
@@ -0,0 +1,289 @@
+"""
+Compiled .gitignore-style pattern matching for ipip.
+"""
+
+import os
+import re
+from pathlib import Path
+from typing import Callable, Dict, Iterable, List, NamedTuple, Optional, Pattern, Tuple
+
+# Ignore files read in every directory, in precedence order (later files win)
+IGNORE_FILE_NAMES = ('.gitignore', '.ipipignore')
+
+
+class IgnoreRule:
+    """A single gitignore-style pattern compiled to a regex."""
+
+    def __init__(self, pattern: str, regex: str, negated: bool, dir_only: bool):
+        self.pattern = pattern
+        self.regex = regex
+        self.negated = negated
+        self.dir_only = dir_only
+        self.compiled = re.compile(regex)
+
+
+def parse_pattern(line: str) -> Optional[IgnoreRule]:
+    """Parse one gitignore line into a rule, or None for blanks and comments."""
+    line = line.rstrip('\n').rstrip('\r')
+
+    # Trailing spaces are ignored unless escaped
+    stripped = line.rstrip(' ')
+    if stripped.endswith('\\') and len(stripped) < len(line):
+        stripped += ' '
+    line = stripped
+
+    if not line or line.startswith('#'):
+        return None
+
+    negated = False
+    if line.startswith('!'):
+        negated = True
+        line = line[1:]
+    elif line.startswith('\\!') or line.startswith('\\#'):
+        line = line[1:]
+
+    dir_only = line.endswith('/')
+    line = line.rstrip('/')
+    if not line:
+        return None
+
+    # A slash anywhere but the end anchors the pattern to the ignore file's directory
+    anchored = '/' in line
+    line = line.lstrip('/')
+
+    body = _translate(line)
+    prefix = '' if anchored else '(?:.*/)?'
+    return IgnoreRule(line, f'^{prefix}{body}$', negated, dir_only)
+
+
+def _translate(pattern: str) -> str:
+    """Translate a gitignore glob (without leading/trailing slashes) to a regex body."""
+    out = []
+    i, n = 0, len(pattern)
+
+    while i < n:
+        c = pattern[i]
+
+        if c == '*':
+            if pattern.startswith('**', i):
+                at_start = i == 0 or pattern[i - 1] == '/'
+                at_end = i + 2 == n or pattern[i + 2] == '/'
+                if at_start and at_end:
+                    if i + 2 == n:
+                        out.append('.*')          # trailing "/**": everything inside
+                        i += 2
+                    else:
+                        out.append('(?:.*/)?')    # "**/": zero or more directories
+                        i += 3
+                    continue
+            out.append('[^/]*')
+            while i < n and pattern[i] == '*':
+                i += 1
+            continue
+
+        if c == '?':
+            out.append('[^/]')
+        elif c == '[':
+            end = pattern.find(']', i + 1)
+            if end == -1:
+                out.append(re.escape(c))
+            else:
+                inner = pattern[i + 1:end]
+                if inner.startswith('!'):
+                    inner = '^' + inner[1:]
+                out.append('[' + inner.replace('\\', '\\\\') + ']')
+                i = end
+        elif c == '\\' and i + 1 < n:
+            i += 1
+            out.append(re.escape(pattern[i]))
+        else:
+            out.append(re.escape(c))
+
+        i += 1
+
+    return ''.join(out)
+
+
+class IgnoreMatcher:
+    """Matches relative POSIX paths against a list of gitignore-style rules.
+
+    All rules are combined into one alternation per entry type, so the
+    common case (nothing matches) costs a single regex call. Only when
+    something matches and negations are present are the rules replayed
+    in order, with the last matching rule winning as in git.
+    """
+
+    def __init__(self, rules: Iterable[IgnoreRule] = ()):
+        self.rules: List[IgnoreRule] = list(rules)
+        self._compile()
+
+    @classmethod
+    def from_lines(cls, lines: Iterable[str]) -> 'IgnoreMatcher':
+        return cls(rule for rule in map(parse_pattern, lines) if rule is not None)
+
+    @classmethod
+    def from_file(cls, file_path: Path) -> 'IgnoreMatcher':
+        """Load rules from an ignore file; a missing or unreadable file yields no rules."""
+        try:
+            with open(file_path, 'r', encoding='utf-8', errors='ignore') as f:
+                return cls.from_lines(f)
+        except OSError:
+            return cls()
+
+    def extend(self, other: 'IgnoreMatcher') -> 'IgnoreMatcher':
+        """Return a matcher with the other matcher's rules appended (they take precedence)."""
+        return IgnoreMatcher(self.rules + other.rules)
+
+    def _compile(self) -> None:
+        self._has_negation = any(rule.negated for rule in self.rules)
+        self._file_any = self._combine(rule for rule in self.rules if not rule.dir_only)
+        self._dir_any = self._combine(self.rules)
+
+    @staticmethod
+    def _combine(rules: Iterable[IgnoreRule]) -> Optional[Pattern]:
+        regexes = [rule.regex for rule in rules]
+        if not regexes:
+            return None
+        return re.compile('|'.join(f'(?:{r})' for r in regexes))
+
+    def __bool__(self) -> bool:
+        return bool(self.rules)
+
+    def match(self, relative_path: str, is_dir: bool = False) -> bool:
+        """Check if a path (relative, '/'-separated) is ignored."""
+        return bool(self.check(relative_path, is_dir))
+
+    def check(self, relative_path: str, is_dir: bool = False) -> Optional[bool]:
+        """Like match(), but None when no rule matches at all, so a parent directory's rules can decide."""
+        combined = self._dir_any if is_dir else self._file_any
+        if combined is None or not combined.match(relative_path):
+            return None
+
+        if not self._has_negation:
+            return True
+
+        for rule in reversed(self.rules):
+            if rule.dir_only and not is_dir:
+                continue
+            if rule.compiled.match(relative_path):
+                return not rule.negated
+
+        return None
+
+
+class IgnoreLevel(NamedTuple):
+    """The ignore files of one directory."""
+    source: str                  # directory holding the ignore files
+    base: str                    # walk path the rules' relative paths start from
+    prefix: str                  # path of base relative to source, '/'-terminated ('' when they're the same)
+    matcher: IgnoreMatcher
+    stamp: Tuple[Tuple[str, int, int], ...]  # (name, mtime_ns, size) of each ignore file
+
+
+def find_work_tree(path: str) -> Optional[str]:
+    """Get the enclosing git work tree's top directory, or None outside a repository."""
+    current = os.path.abspath(path)
+    while True:
+        if os.path.exists(os.path.join(current, '.git')):
+            return current
+        parent = os.path.dirname(current)
+        if parent == current:
+            return None
+        current = parent
+
+
+class IgnoreTree:
+    """Ignore files loaded hierarchically, the way git applies them.
+
+    Each directory's ignore files cover everything below it, with patterns
+    relative to that directory, and deeper files take precedence over
+    shallower ones. Directories between the enclosing repository's top and
+    the walk root count as well, so a walk started in a subdirectory still
+    honours the top-level .gitignore. Every directory's files are read once,
+    the first time the walk reaches it.
+    """
+
+    def __init__(self, root: Path, file_names: Iterable[str] = IGNORE_FILE_NAMES):
+        self.root = str(root)
+        self.file_names = tuple(file_names)
+        self._levels: Dict[str, Tuple[IgnoreLevel, ...]] = {}
+
+        absolute = os.path.abspath(self.root)
+        top = find_work_tree(absolute) or absolute
+
+        ancestors = []
+        current = absolute
+        while current != top:
+            current = os.path.dirname(current)
+            ancestors.append(current)
+
+        levels = []
+        for ancestor in reversed(ancestors):
+            prefix = os.path.relpath(absolute, ancestor).replace(os.sep, '/') + '/'
+            level = self._load(ancestor, self.root, prefix)
+            if level is not None:
+                levels.append(level)
+
+        own = self._load(self.root, self.root, '')
+        if own is not None:
+            levels.append(own)
+        self._levels[self.root] = tuple(levels)
+
+    def _load(self, source: str, base: str, prefix: str) -> Optional[IgnoreLevel]:
+        """Read the ignore files in source, or None if it has none."""
+        rules: List[IgnoreRule] = []
+        stamp = []
+        for name in self.file_names:
+            path = os.path.join(source, name)
+            try:
+                st = os.stat(path)
+            except OSError:
+                continue
+            rules.extend(IgnoreMatcher.from_file(Path(path)).rules)
+            stamp.append((name, st.st_mtime_ns, st.st_size))
+
+        if not stamp:
+            return None
+        return IgnoreLevel(source, base, prefix, IgnoreMatcher(rules), tuple(stamp))
+
+    def levels(self, directory: str) -> Tuple[IgnoreLevel, ...]:
+        """Get the ignore levels that apply inside directory, shallowest first."""
+        levels = self._levels.get(directory)
+        if levels is not None:
+            return levels
+
+        parent = os.path.dirname(directory)
+        if parent == directory or not directory.startswith(self.root):
+            return ()
+
+        levels = self.levels(parent)
+        own = self._load(directory, directory, '')
+        if own is not None:
+            levels = levels + (own,)
+        self._levels[directory] = levels
+        return levels
+
+    def signature(self, directory: str) -> str:
+        """Identify the ignore files that apply inside directory, as they are now."""
+        return repr([(level.source, level.stamp) for level in self.levels(directory)])
+
+    def directory_matcher(self, directory: str) -> Optional[Callable[[str, bool], bool]]:
+        """Get a test of whether an entry of directory, given by name, is ignored; None if no rules apply there."""
+        checks = []
+        for level in reversed(self.levels(directory)):
+            if not level.matcher:
+                continue
+            rest = directory[len(level.base):].strip(os.sep).replace(os.sep, '/')
+            checks.append((level.prefix + (rest + '/' if rest else ''), level.matcher))
+
+        if not checks:
+            return None
+
+        def is_ignored(name: str, is_dir: bool) -> bool:
+            for prefix, matcher in checks:
+                verdict = matcher.check(prefix + name, is_dir)
+                if verdict is not None:
+                    return verdict
+            return False
+
+        return is_ignored
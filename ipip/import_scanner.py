@@ -0,0 +1,354 @@
+"""
+AST-based import scanning for requirements generation.
+"""
+
+import ast
+import hashlib
+import json
+import os
+import re
+import sys
+import sysconfig
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Sequence, Set
+
+from .config import get_cache_dir
+
+# Files per worker task; large enough to amortize process round-trips
+DEFAULT_CHUNK_SIZE = 128
+
+# Below this many files a process pool costs more than it saves
+PARALLEL_THRESHOLD = 256
+
+_BLOCK_FIELDS = ('body', 'orelse', 'finalbody', 'handlers', 'cases')
+
+# Legacy line patterns, only used for files that don't parse (e.g. Python 2 code)
+_FALLBACK_PATTERNS = [
+    re.compile(r'^\s*import\s+([a-zA-Z_][a-zA-Z0-9_]*)'),
+    re.compile(r'^\s*from\s+([a-zA-Z_][a-zA-Z0-9_]*)[\w.]*\s+import'),
+]
+
+
+def _stdlib_module_names() -> frozenset:
+    """Get the names of all standard library top-level modules."""
+    names = getattr(sys, 'stdlib_module_names', None)
+    if names:
+        return frozenset(names)
+
+    # Python < 3.10: list the standard library directory
+    names = set(sys.builtin_module_names)
+    stdlib_dirs = {sysconfig.get_paths()['stdlib'], sysconfig.get_paths().get('platstdlib', '')}
+    for stdlib_dir in stdlib_dirs:
+        for extra in ('', 'lib-dynload'):
+            directory = os.path.join(stdlib_dir, extra)
+            try:
+                entries = os.listdir(directory)
+            except OSError:
+                continue
+            for entry in entries:
+                if entry == 'site-packages':
+                    continue
+                name = entry.split('.', 1)[0]
+                if name.isidentifier():
+                    names.add(name)
+
+    return frozenset(names)
+
+
+STDLIB_MODULES = _stdlib_module_names()
+
+
+def extract_imports(source, filename: str = '<unknown>', dotted: bool = False) -> Set[str]:
+    """Extract top-level module names from absolute imports in Python source.
+
+    Imports are found anywhere in the statement tree (inside functions,
+    conditionals and try blocks). Relative imports are always local and are
+    skipped, as is ``__future__``. Text inside strings and docstrings is
+    never matched.
+
+    With ``dotted`` the full module paths are kept instead, and each name
+    imported ``from`` a module is added below it too, since it may be a
+    submodule (``from google.cloud import storage``).
+    """
+    try:
+        tree = ast.parse(source, filename=filename)
+    except (SyntaxError, ValueError):
+        return _extract_imports_fallback(source)
+
+    imports = set()
+    stack = list(tree.body)
+    while stack:
+        node = stack.pop()
+
+        if isinstance(node, ast.Import):
+            for alias in node.names:
+                imports.add(alias.name if dotted else alias.name.split('.', 1)[0])
+        elif isinstance(node, ast.ImportFrom):
+            if not node.level and node.module:
+                if dotted:
+                    imports.add(node.module)
+                    imports.update(f"{node.module}.{alias.name}" for alias in node.names if alias.name != '*')
+                else:
+                    imports.add(node.module.split('.', 1)[0])
+        else:
+            for field in _BLOCK_FIELDS:
+                block = getattr(node, field, None)
+                if block:
+                    stack.extend(block)
+
+    return {name for name in imports if name.split('.', 1)[0] != '__future__'}
+
+
+def _extract_imports_fallback(source) -> Set[str]:
+    """Line-based extraction for sources that can't be parsed."""
+    if isinstance(source, bytes):
+        source = source.decode('utf-8', errors='ignore')
+
+    imports = set()
+    for line in source.split('\n'):
+        if line.lstrip().startswith('#'):
+            continue
+        for pattern in _FALLBACK_PATTERNS:
+            match = pattern.match(line)
+            if match:
+                imports.add(match.group(1))
+
+    imports.discard('__future__')
+    return imports
+
+
+def _scan_chunk(paths: List[str]) -> List[Optional[List[str]]]:
+    """Worker: extract dotted imports from a batch of files (None for unreadable files)."""
+    results = []
+    for path in paths:
+        try:
+            with open(path, 'rb') as f:
+                source = f.read()
+        except OSError:
+            results.append(None)
+            continue
+        results.append(sorted(extract_imports(source, path, dotted=True)))
+    return results
+
+
+def scan_files(paths: Sequence[Path], max_workers: Optional[int] = None,
+               chunk_size: int = DEFAULT_CHUNK_SIZE) -> Dict[Path, Set[str]]:
+    """Extract dotted imports from many files, in parallel across processes for large sets.
+
+    Files are sent to workers in chunks so per-task overhead stays small
+    relative to parsing. Unreadable files are left out of the result.
+    """
+    paths = list(paths)
+    names = [str(p) for p in paths]
+
+    if len(paths) < PARALLEL_THRESHOLD or max_workers == 1:
+        batches = [_scan_chunk(names)]
+    else:
+        chunks = [names[i:i + chunk_size] for i in range(0, len(names), chunk_size)]
+        try:
+            with ProcessPoolExecutor(max_workers=max_workers) as executor:
+                batches = list(executor.map(_scan_chunk, chunks))
+        except (OSError, RuntimeError):
+            # Process pools can be unavailable (sandboxes, frozen apps)
+            batches = [_scan_chunk(names)]
+
+    results = {}
+    offset = 0
+    for batch in batches:
+        for imports in batch:
+            if imports is not None:
+                results[paths[offset]] = set(imports)
+            offset += 1
+
+    return results
+
+
+def local_module_names(paths: Iterable[Path], project_root: Path) -> Set[str]:
+    """Get names importable from within the project: module stems and package dirs."""
+    names = set()
+    for path in paths:
+        try:
+            relative = path.relative_to(project_root)
+        except ValueError:
+            relative = path
+        names.add(relative.stem)
+        names.update(relative.parts[:-1])
+    return names
+
+
+def classify_imports(imports: Iterable[str], local_names: Set[str]) -> Dict[str, Set[str]]:
+    """Split import names, top-level or dotted, into stdlib, local and third-party sets."""
+    classified = {"stdlib": set(), "local": set(), "third_party": set()}
+
+    for name in imports:
+        top_level = name.split('.', 1)[0]
+        if top_level in STDLIB_MODULES:
+            classified["stdlib"].add(name)
+        elif top_level in local_names:
+            classified["local"].add(name)
+        else:
+            classified["third_party"].add(name)
+
+    return classified
+
+
+# Directories modified this close to a walk may have changed after being listed
+RACY_MTIME_NS = 2 * 10**9
+
+
+class ImportCache:
+    """Persistent per-project cache of the imports found in each file.
+
+    Entries are keyed by path relative to the project root and hold the
+    file's size, mtime and dotted import set. Only new or changed files are
+    parsed on the next scan, and entries for deleted files are pruned.
+
+    A scan of a whole walked tree also records the mtime of every walked
+    directory, so a later run can tell the tree is unchanged by stat-ing
+    the recorded paths, without listing any directory.
+    """
+
+    VERSION = 3
+
+    def __init__(self, project_root: Path, cache_dir: Optional[Path] = None, scope: str = ""):
+        self.project_root = project_root
+        # Scans that pick their files differently under the same root keep separate files (``scope``)
+        identity = str(project_root.resolve()) + (f"\0{scope}" if scope else "")
+        key = hashlib.sha1(identity.encode('utf-8')).hexdigest()[:16]
+        self.cache_file = (cache_dir or get_cache_dir()) / "imports" / f"{key}.json"
+        self.entries: Dict[str, list] = {}
+        self.dirs: Dict[str, int] = {}           # walked directory -> mtime_ns, for whole-tree scans
+        self.walk_key: Optional[list] = None     # what decided which files the walk included
+        self.parsed = 0
+        self._dirty = False
+        self.load()
+
+    def load(self) -> None:
+        """Load the cache from disk, starting empty if it's missing or stale."""
+        try:
+            with open(self.cache_file, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            if data.get("version") == self.VERSION and data.get("root") == str(self.project_root):
+                self.entries = data.get("files", {})
+                self.dirs = data.get("dirs", {})
+                self.walk_key = data.get("walk")
+        except (OSError, ValueError):
+            self.entries = {}
+
+    def save(self) -> None:
+        """Write the cache to disk if anything changed."""
+        if not self._dirty:
+            return
+
+        try:
+            self.cache_file.parent.mkdir(parents=True, exist_ok=True)
+            tmp_file = self.cache_file.with_suffix('.tmp')
+            with open(tmp_file, 'w', encoding='utf-8') as f:
+                json.dump({"version": self.VERSION, "root": str(self.project_root), "files": self.entries,
+                           "dirs": self.dirs, "walk": self.walk_key}, f)
+            os.replace(tmp_file, self.cache_file)
+            self._dirty = False
+        except OSError:
+            pass  # The cache is an optimization; never fail the scan over it
+
+    def scan(self, paths: Iterable[Path], max_workers: Optional[int] = None,
+             directories: Optional[Iterable[Path]] = None, walk_key: Optional[list] = None,
+             walk_started_ns: int = 0) -> Dict[Path, Set[str]]:
+        """Get the imports of every path, parsing only new or changed files.
+
+        Pass the ``directories`` a walk visited to find paths, the
+        JSON-serializable ``walk_key`` that decided what it included, and
+        when the walk started, to let cached_imports() answer for the same
+        tree later.
+        """
+        dirs: Dict[str, int] = {}
+        if directories is not None and walk_key is not None:
+            try:
+                for directory in directories:
+                    dirs[self._key(directory)] = mtime_ns = directory.stat().st_mtime_ns
+                    if mtime_ns > walk_started_ns - RACY_MTIME_NS:
+                        raise OSError("directory changed around the walk")
+            except OSError:
+                dirs, walk_key = {}, None  # The listing may be outdated already; don't vouch for it
+        else:
+            walk_key = None
+        if dirs != self.dirs or walk_key != self.walk_key:
+            self.dirs, self.walk_key = dirs, walk_key
+            self._dirty = True
+
+        current: Dict[str, Path] = {}
+        stale: List[Path] = []
+        stats: Dict[str, tuple] = {}
+
+        for path in paths:
+            key = self._key(path)
+            try:
+                st = path.stat()
+            except OSError:
+                continue
+
+            current[key] = path
+            stats[key] = (st.st_size, st.st_mtime_ns)
+
+            entry = self.entries.get(key)
+            if entry is None or entry[0] != st.st_size or entry[1] != st.st_mtime_ns:
+                stale.append(path)
+
+        self.parsed = len(stale)
+        if stale:
+            for path, imports in scan_files(stale, max_workers=max_workers).items():
+                key = self._key(path)
+                size, mtime_ns = stats[key]
+                self.entries[key] = [size, mtime_ns, sorted(imports)]
+            self._dirty = True
+
+        # Prune deleted files (and files that failed to read)
+        for key in [k for k in self.entries if k not in current]:
+            del self.entries[key]
+            self._dirty = True
+
+        self.save()
+
+        return {
+            current[key]: set(self.entries[key][2])
+            for key in current if key in self.entries
+        }
+
+    def cached_imports(self, walk_key: list) -> Optional[Dict[Path, Set[str]]]:
+        """Get every file's imports from the last whole-tree scan, or None if the tree may have changed.
+
+        Only the recorded directories and files are stat-ed: adding, removing
+        or renaming a file changes its directory's mtime, and editing one
+        changes its own.
+        """
+        if self.walk_key is None or self.walk_key != walk_key:
+            return None
+
+        try:
+            for key, mtime_ns in self.dirs.items():
+                if (self.project_root / key).stat().st_mtime_ns != mtime_ns:
+                    return None
+            for key, (size, mtime_ns, _) in self.entries.items():
+                st = (self.project_root / key).stat()
+                if st.st_size != size or st.st_mtime_ns != mtime_ns:
+                    return None
+        except OSError:
+            return None
+
+        self.parsed = 0
+        return {self.project_root / key: set(imports) for key, (_, _, imports) in self.entries.items()}
+
+    def digest(self) -> str:
+        """Get a digest of the cached file states and import sets."""
+        hasher = hashlib.sha1()
+        for key in sorted(self.entries):
+            size, mtime_ns, imports = self.entries[key]
+            hasher.update(f"{key}\0{size}\0{mtime_ns}\0{','.join(imports)}\n".encode('utf-8'))
+        return hasher.hexdigest()
+
+    def _key(self, path: Path) -> str:
+        try:
+            return path.relative_to(self.project_root).as_posix()
+        except ValueError:
+            return path.as_posix()
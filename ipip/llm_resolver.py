@@ -7,12 +7,18 @@ import subprocess
 import re
 import sys
 import os
-from typing import List, Dict, Any, Optional
+import threading
+from typing import List, Dict, Any, Optional, Tuple
 from dataclasses import dataclass
 from rich.console import Console
 
+from .popularity import rank_by_popularity
+
 console = Console()
 
+# Marks a resolver whose Ollama command and model haven't been looked up yet
+_NOT_LOOKED_UP = object()
+
 
 @dataclass
 class Intent:
@@ -38,6 +44,8 @@ class LLMResolver:
         self.model = model
         self.verbose = verbose
         self.package_mappings = self._load_common_mappings()
+        self._ollama_target = _NOT_LOOKED_UP
+        self._ollama_lock = threading.Lock()
     
     def _load_common_mappings(self) -> Dict[str, str]:
         """Load common package name mappings."""
@@ -107,9 +115,12 @@ class LLMResolver:
         requirements_keywords = ["requirements", "requirement", "req", "freeze"]
         create_keywords = ["create", "generate", "make", "build"]
         update_keywords = ["update", "refresh", "sync"]
+        watch_keywords = ["watch", "keep"]
         
         if any(keyword in query_lower for keyword in requirements_keywords):
-            if any(keyword in query_lower for keyword in create_keywords):
+            if any(keyword in query_lower for keyword in watch_keywords):
+                return Intent(action="requirements", target="watch requirements")
+            elif any(keyword in query_lower for keyword in create_keywords):
                 return Intent(action="requirements", target="create requirements")
             elif any(keyword in query_lower for keyword in update_keywords):
                 return Intent(action="requirements", target="update requirements")
@@ -156,17 +167,11 @@ class LLMResolver:
     def _resolve_with_local_llm(self, query: str) -> List[str]:
         """Resolve using local LLM (like ollama)."""
         try:
-            # Get the correct ollama command for this platform
-            ollama_cmd = self._get_ollama_command()
-            
-            if not ollama_cmd:
+            if self._get_ollama_target() is None:
                 if self.verbose:
                     console.print("[yellow]Ollama not found or not responding, falling back to heuristic resolution[/yellow]")
                 return self._resolve_heuristic(query)
             
-            # Get available models and pick the best one
-            model_to_use = self._get_best_ollama_model()
-            
             # Prepare a simple, focused prompt
             prompt = f"""Task: Suggest Python packages for "{query}"
 
@@ -179,59 +184,97 @@ Examples:
 Respond with ONLY a JSON object:
 {{"packages": ["package1", "package2", "package3"]}}"""
             
-            if self.verbose:
-                console.print(f"[blue]Using Ollama model: {model_to_use}[/blue]")
-            
-            # Call ollama with the correct command and progress indicator
             if self.verbose:
                 console.print("[blue]🤖 Querying Ollama LLM... (this may take 5-15 seconds)[/blue]")
             
-            # Add progress indicator
-            with console.status("[bold blue]Thinking with AI...", spinner="dots") as status:
-                try:
-                    result = subprocess.run(
-                        [ollama_cmd, "run", model_to_use, prompt],
-                        capture_output=True,
-                        text=True,
-                        timeout=45,
-                        shell=(sys.platform == "win32"),
-                        encoding='utf-8',
-                        errors='replace'  # Handle Unicode errors gracefully
-                    )
-                except UnicodeDecodeError:
-                    # Fallback with different encoding
-                    result = subprocess.run(
-                        [ollama_cmd, "run", model_to_use, prompt],
-                        capture_output=True,
-                        timeout=45,
-                        shell=(sys.platform == "win32"),
-                        encoding='latin1',
-                        errors='replace'
-                    )
-                    # Convert to string if bytes
-                    if hasattr(result.stdout, 'decode'):
-                        result.stdout = result.stdout.decode('utf-8', errors='replace')
-                    if hasattr(result.stderr, 'decode'):
-                        result.stderr = result.stderr.decode('utf-8', errors='replace')
-            
-            if result.returncode == 0:
-                response = result.stdout.strip()
-                if self.verbose:
-                    console.print(f"[blue]Raw LLM response ({len(response)} chars):[/blue]")
-                    console.print(f"[dim]{response}[/dim]")  # Show full response for debugging
-                return self._parse_llm_response(response, query)
-            else:
-                if self.verbose:
-                    console.print(f"[yellow]Ollama error (exit code {result.returncode}):[/yellow]")
-                    console.print(f"[yellow]STDERR: {result.stderr}[/yellow]")
-                    console.print(f"[yellow]STDOUT: {result.stdout}[/yellow]")
+            response = self._run_ollama(prompt)
+            if response is None:
                 return self._resolve_heuristic(query)
+            
+            if self.verbose:
+                console.print(f"[blue]Raw LLM response ({len(response)} chars):[/blue]")
+                console.print(f"[dim]{response}[/dim]")  # Show full response for debugging
+            return self._parse_llm_response(response, query)
                 
-        except (subprocess.TimeoutExpired, FileNotFoundError, Exception) as e:
+        except Exception as e:
             if self.verbose:
                 console.print(f"[yellow]LLM resolution failed: {e}[/yellow]")
             return self._resolve_heuristic(query)
     
+    def _run_ollama(self, prompt: str, show_status: bool = True, timeout: int = 45) -> Optional[str]:
+        """Run a prompt through the local Ollama model and return its raw output, or None on failure.
+        
+        Safe to call from several threads at once; pass ``show_status=False``
+        then and show progress in the caller instead.
+        """
+        target = self._get_ollama_target()
+        if target is None:
+            return None
+        ollama_cmd, model_to_use = target
+        
+        try:
+            if show_status:
+                with console.status("[bold blue]Thinking with AI...", spinner="dots"):
+                    result = self._invoke_ollama(ollama_cmd, model_to_use, prompt, timeout)
+            else:
+                result = self._invoke_ollama(ollama_cmd, model_to_use, prompt, timeout)
+        except (subprocess.TimeoutExpired, OSError) as e:
+            if self.verbose:
+                console.print(f"[yellow]Ollama call failed: {e}[/yellow]")
+            return None
+        
+        if result.returncode != 0:
+            if self.verbose:
+                console.print(f"[yellow]Ollama error (exit code {result.returncode}):[/yellow]")
+                console.print(f"[yellow]STDERR: {result.stderr}[/yellow]")
+                console.print(f"[yellow]STDOUT: {result.stdout}[/yellow]")
+            return None
+        
+        return result.stdout.strip()
+    
+    def _invoke_ollama(self, ollama_cmd: str, model: str, prompt: str, timeout: int) -> subprocess.CompletedProcess:
+        """Run ``ollama run`` once, decoding its output as UTF-8 with a Latin-1 fallback."""
+        try:
+            return subprocess.run(
+                [ollama_cmd, "run", model, prompt],
+                capture_output=True,
+                text=True,
+                timeout=timeout,
+                shell=(sys.platform == "win32"),
+                encoding='utf-8',
+                errors='replace'  # Handle Unicode errors gracefully
+            )
+        except UnicodeDecodeError:
+            # Fallback with different encoding
+            result = subprocess.run(
+                [ollama_cmd, "run", model, prompt],
+                capture_output=True,
+                timeout=timeout,
+                shell=(sys.platform == "win32"),
+                encoding='latin1',
+                errors='replace'
+            )
+            # Convert to string if bytes
+            if hasattr(result.stdout, 'decode'):
+                result.stdout = result.stdout.decode('utf-8', errors='replace')
+            if hasattr(result.stderr, 'decode'):
+                result.stderr = result.stderr.decode('utf-8', errors='replace')
+            return result
+    
+    def _get_ollama_target(self) -> Optional[Tuple[str, str]]:
+        """Get (ollama command, model), looked up once per resolver; None if Ollama isn't available."""
+        with self._ollama_lock:
+            if self._ollama_target is _NOT_LOOKED_UP:
+                ollama_cmd = self._get_ollama_command()
+                if ollama_cmd is None:
+                    self._ollama_target = None
+                else:
+                    model_to_use = self._get_best_ollama_model()
+                    if self.verbose:
+                        console.print(f"[blue]Using Ollama model: {model_to_use}[/blue]")
+                    self._ollama_target = (ollama_cmd, model_to_use)
+            return self._ollama_target
+    
     def _get_ollama_command(self) -> Optional[str]:
         """Get the correct ollama command for this platform."""
         # Possible ollama commands to try
@@ -388,12 +431,16 @@ Respond with ONLY a JSON object:
                 "fastapi", "django", "beautifulsoup4", "selenium", "opencv-python"
             ]
             
-            for package in common_packages:
-                if package in response.lower():
-                    found_packages.append(package)
+            # Quoted names keep the model's order; merely mentioned ones are equally ranked,
+            # so popularity breaks the tie
+            quoted_packages = list(dict.fromkeys(found_packages))  # Remove duplicates, preserve order
+            mentioned_packages = [
+                package for package in common_packages
+                if package in response.lower() and package not in quoted_packages
+            ]
             
-            if found_packages:
-                unique_packages = list(dict.fromkeys(found_packages))  # Remove duplicates, preserve order
+            if quoted_packages or mentioned_packages:
+                unique_packages = quoted_packages + rank_by_popularity(mentioned_packages)
                 if self.verbose:
                     console.print(f"[blue]Extracted packages: {unique_packages}[/blue]")
                 return unique_packages
@@ -422,7 +469,8 @@ Respond with ONLY a JSON object:
                 found_packages.append(self.package_mappings[word])
         
         if found_packages:
-            return found_packages
+            # Query words carry no ranking of their own, so popularity breaks the tie
+            return rank_by_popularity(found_packages)
         
         # If no direct match, try common patterns
         if "openai" in query.lower():
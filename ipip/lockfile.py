@@ -0,0 +1,148 @@
+"""
+Artifact hashing for hash-pinned requirements files.
+"""
+
+import hashlib
+import os
+import sys
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+from packaging.utils import (
+    InvalidSdistFilename,
+    InvalidWheelFilename,
+    canonicalize_name,
+    canonicalize_version,
+    parse_sdist_filename,
+    parse_wheel_filename,
+)
+from rich.console import Console
+
+from .config import get_cache_dir
+from .pypi_client import PyPIClient, pypi_client
+
+console = Console()
+
+# Read size for streaming hashes; hashlib releases the GIL for large updates
+HASH_BUFFER_SIZE = 1024 * 1024
+
+ArtifactKey = Tuple[str, str]
+
+
+def get_pip_cache_dir() -> Path:
+    """Get pip's cache directory without spawning pip."""
+    if os.environ.get('PIP_CACHE_DIR'):
+        return Path(os.environ['PIP_CACHE_DIR'])
+    if os.name == 'nt':
+        return Path(os.environ.get('LOCALAPPDATA', str(Path.home() / 'AppData' / 'Local'))) / 'pip' / 'Cache'
+    if sys.platform == 'darwin':
+        return Path.home() / 'Library' / 'Caches' / 'pip'
+    return Path(os.environ.get('XDG_CACHE_HOME', str(Path.home() / '.cache'))) / 'pip'
+
+
+def get_artifact_dirs() -> List[Path]:
+    """Get the directories searched for locally cached wheels and sdists."""
+    return [get_pip_cache_dir() / 'wheels', get_cache_dir() / 'wheels']
+
+
+def _artifact_key(file_name: str) -> Optional[ArtifactKey]:
+    """Get (canonical name, canonical version) for a wheel or sdist file name."""
+    try:
+        if file_name.endswith('.whl'):
+            name, version, _, _ = parse_wheel_filename(file_name)
+        elif file_name.endswith(('.tar.gz', '.zip')):
+            name, version = parse_sdist_filename(file_name)
+        else:
+            return None
+    except (InvalidWheelFilename, InvalidSdistFilename):
+        return None
+    return canonicalize_name(name), canonicalize_version(version)
+
+
+def find_local_artifacts(wanted: Set[ArtifactKey], directories: Iterable[Path]) -> Dict[ArtifactKey, List[Path]]:
+    """Find cached artifacts for the wanted (name, version) pairs."""
+    found: Dict[ArtifactKey, List[Path]] = {}
+
+    for directory in directories:
+        if not directory.is_dir():
+            continue
+        for root, _, files in os.walk(directory):
+            for file_name in files:
+                key = _artifact_key(file_name)
+                if key in wanted:
+                    found.setdefault(key, []).append(Path(root) / file_name)
+
+    return found
+
+
+def hash_file(file_path: Path, buffer_size: int = HASH_BUFFER_SIZE) -> str:
+    """Compute a file's sha256 by streaming it through a fixed-size buffer."""
+    hasher = hashlib.sha256()
+    buffer = bytearray(buffer_size)
+    view = memoryview(buffer)
+
+    with open(file_path, 'rb', buffering=0) as f:
+        while True:
+            read = f.readinto(buffer)
+            if not read:
+                break
+            hasher.update(view[:read])
+
+    return hasher.hexdigest()
+
+
+def index_digests(client: PyPIClient, package_name: str, version: str) -> List[str]:
+    """Get the sha256 digests the index publishes for a release."""
+    try:
+        data = client.get_release(package_name, version)
+    except Exception:
+        return []
+
+    if not data:
+        return []
+
+    return [
+        artifact['digests']['sha256']
+        for artifact in data.get('urls', [])
+        if artifact.get('digests', {}).get('sha256')
+    ]
+
+
+def collect_hashes(packages: Dict[str, str], max_workers: Optional[int] = None,
+                   client: Optional[PyPIClient] = None,
+                   artifact_dirs: Optional[List[Path]] = None) -> Dict[str, List[str]]:
+    """Get sha256 hashes for every pinned package.
+
+    Every digest the index publishes for a release is included, so pip can
+    verify whichever artifact it ends up downloading. Hashes of locally
+    cached artifacts, computed concurrently, are added on top; alone they
+    could be of a wheel built locally, which matches nothing on the index.
+    """
+    client = client or pypi_client
+    keys = {name: (canonicalize_name(name), canonicalize_version(version)) for name, version in packages.items()}
+    local = find_local_artifacts(set(keys.values()), artifact_dirs or get_artifact_dirs())
+
+    hashes: Dict[str, Set[str]] = {name: set() for name in packages}
+    workers = max_workers or min(32, (os.cpu_count() or 1) + 4)
+
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        index_jobs = [
+            (name, executor.submit(index_digests, client, name, packages[name]))
+            for name in packages
+        ]
+        local_jobs = [
+            (name, executor.submit(hash_file, path))
+            for name, key in keys.items()
+            for path in local.get(key, [])
+        ]
+
+        for name, future in index_jobs:
+            hashes[name].update(future.result())
+        for name, future in local_jobs:
+            try:
+                hashes[name].add(future.result())
+            except OSError:
+                continue
+
+    return {name: sorted(digests) for name, digests in hashes.items()}
@@ -0,0 +1,61 @@
+"""
+Sub-project discovery for repositories holding several Python projects.
+"""
+
+import os
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional
+
+from .walker import walk
+
+# Files that make a directory its own project
+PROJECT_MARKERS = frozenset({"pyproject.toml", "setup.py", "requirements.txt"})
+
+# Directories marking the top of a version-controlled checkout
+VCS_MARKERS = (".git", ".hg", ".svn")
+
+
+def find_monorepo_root(start: Path) -> Optional[Path]:
+    """Get the top of the checkout containing start, or None outside version control."""
+    current = start.resolve()
+    while True:
+        if any((current / marker).exists() for marker in VCS_MARKERS):
+            return current
+        if current == current.parent:
+            return None
+        current = current.parent
+
+
+def discover_projects(root: Path,
+                      exclude_globs: Iterable[str] = (),
+                      suffixes: tuple = (".py",)) -> Dict[Path, List[Path]]:
+    """Find every sub-project under root and the source files each one owns.
+
+    A single walk both finds the marker files and partitions the sources:
+    every file belongs to the deepest project directory above it. Files
+    outside any sub-project belong to root, which is only included when it
+    owns some of them or is a project itself.
+    """
+    owners: Dict[str, str] = {}
+    projects: Dict[str, List[Path]] = {str(root): []}
+    root_is_project = False
+
+    for directory, _, entries in walk(root, exclude_globs=exclude_globs):
+        names = {entry.name for entry in entries}
+        if names & PROJECT_MARKERS:
+            owner = directory
+            projects.setdefault(owner, [])
+            root_is_project = root_is_project or directory == str(root)
+        else:
+            # Parents are always visited before their children
+            owner = owners.get(os.path.dirname(directory), str(root))
+        owners[directory] = owner
+
+        for entry in entries:
+            if entry.name.endswith(suffixes):
+                projects[owner].append(Path(entry.path))
+
+    if not root_is_project and not projects[str(root)]:
+        del projects[str(root)]
+
+    return {Path(directory): files for directory, files in sorted(projects.items())}
@@ -8,6 +8,8 @@ from typing import List, Optional
 from rich.console import Console
 from rich.progress import Progress, SpinnerColumn, TextColumn
 
+from .pypi_client import pypi_client
+
 console = Console()
 
 
@@ -80,7 +82,11 @@ class PackageInstaller:
             return False
     
     def check_package_exists(self, package: str) -> bool:
-        """Check if a package exists on PyPI."""
+        """Check if a package exists on PyPI, or on the index pip is configured to use."""
+        if pypi_client.project_exists(package):
+            return True
+        
+        # Private indexes and mirrors set in pip's configuration aren't visible to the PyPI client
         try:
             cmd = [sys.executable, "-m", "pip", "index", "versions", package]
             result = subprocess.run(cmd, capture_output=True, text=True, check=False)
@@ -2,12 +2,16 @@
 Package search and discovery functionality for ipip.
 """
 
-import requests
 import json
-from typing import List, Dict, Any, Optional
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import List, Dict, Any, Optional, Iterator, Tuple
 from dataclasses import dataclass
 from rich.console import Console
 
+from .pypi_client import PyPIClient, pypi_client
+from .popularity import rank_by_popularity
+from .domain_catalog import get_domain_catalog
+
 console = Console()
 
 
@@ -29,151 +33,95 @@ class PackageInfo:
 class PackageSearcher:
     """Searches for packages on PyPI and provides recommendations."""
     
-    def __init__(self, verbose: bool = False):
+    def __init__(self, verbose: bool = False, max_workers: int = 8, client: Optional[PyPIClient] = None):
         self.verbose = verbose
-        self.session = requests.Session()
-        self.session.headers.update({
-            'User-Agent': 'ipip/0.1.0 (Intelligent pip installer)'
-        })
+        self.max_workers = max_workers
+        self.client = client or pypi_client
     
     def search_packages(self, query: str, limit: int = 10) -> List[PackageInfo]:
         """Search for packages related to the query."""
-        # PyPI doesn't have a search API anymore, so we'll use alternative approaches
-        packages = []
+        results = {}
+        for package in self.stream_packages(query, limit):
+            results[package.name] = package
         
-        # Try different search strategies
-        packages.extend(self._search_by_keywords(query, limit))
-        packages.extend(self._search_by_category(query, limit))
-        packages.extend(self._get_popular_packages_for_domain(query, limit))
+        return list(results.values())
+    
+    def stream_packages(self, query: str, limit: int = 10) -> Iterator[PackageInfo]:
+        """Yield packages related to the query as soon as they are known.
         
-        # Remove duplicates and sort by relevance
-        seen = set()
-        unique_packages = []
-        for pkg in packages:
-            if pkg.name not in seen:
-                seen.add(pkg.name)
-                unique_packages.append(pkg)
+        Locally known candidates are yielded first with an empty version. Each
+        one is yielded again, enriched with PyPI metadata, as its fetch completes.
+        """
+        candidates = self._collect_candidates(query, limit)
+        if not candidates:
+            return
         
-        return unique_packages[:limit]
+        for name, description in candidates:
+            yield PackageInfo(name=name, description=description, version="")
+        
+        workers = max(1, min(self.max_workers, len(candidates)))
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            futures = [
+                executor.submit(self._get_package_info, name, description)
+                for name, description in candidates
+            ]
+            for future in as_completed(futures):
+                yield future.result()
     
-    def _search_by_keywords(self, query: str, limit: int) -> List[PackageInfo]:
-        """Search packages by keywords using known mappings."""
-        packages = []
-        query_lower = query.lower()
+    def _collect_candidates(self, query: str, limit: int) -> List[Tuple[str, str]]:
+        """Collect (name, description) candidates without touching the network."""
+        # PyPI doesn't have a search API anymore, so we'll use alternative approaches
+        candidates = []
         
-        # Domain-specific package collections
-        domain_packages = {
-            "computer vision": [
-                ("opencv-python", "Computer vision library"),
-                ("pillow", "Python Imaging Library fork"),
-                ("scikit-image", "Image processing library"),
-                ("imageio", "Library for reading and writing image data"),
-                ("face-recognition", "Face recognition library"),
-            ],
-            "vision": [
-                ("opencv-python", "Computer vision library"),
-                ("pillow", "Python Imaging Library fork"),
-                ("scikit-image", "Image processing library"),
-                ("dlib", "Machine learning library with face recognition"),
-            ],
-            "machine learning": [
-                ("scikit-learn", "Machine learning library"),
-                ("tensorflow", "Deep learning framework"),
-                ("torch", "PyTorch deep learning framework"),
-                ("keras", "High-level neural networks API"),
-                ("xgboost", "Gradient boosting framework"),
-                ("lightgbm", "Gradient boosting framework"),
-            ],
-            "deep learning": [
-                ("tensorflow", "Deep learning framework"),
-                ("torch", "PyTorch deep learning framework"),
-                ("keras", "High-level neural networks API"),
-                ("pytorch-lightning", "PyTorch wrapper"),
-            ],
-            "web scraping": [
-                ("requests", "HTTP library"),
-                ("beautifulsoup4", "HTML/XML parser"),
-                ("selenium", "Web browser automation"),
-                ("scrapy", "Web crawling framework"),
-                ("httpx", "Async HTTP client"),
-            ],
-            "data science": [
-                ("pandas", "Data manipulation library"),
-                ("numpy", "Numerical computing library"),
-                ("matplotlib", "Plotting library"),
-                ("seaborn", "Statistical visualization"),
-                ("jupyter", "Interactive computing"),
-            ],
-            "web development": [
-                ("flask", "Micro web framework"),
-                ("django", "Full-featured web framework"),
-                ("fastapi", "Modern API framework"),
-                ("starlette", "ASGI framework"),
-                ("bottle", "Micro web framework"),
-            ],
-            "api": [
-                ("fastapi", "Modern API framework"),
-                ("flask", "Micro web framework"),
-                ("django-rest-framework", "REST API for Django"),
-                ("connexion", "OpenAPI-first framework"),
-            ],
-            "database": [
-                ("sqlalchemy", "SQL toolkit"),
-                ("psycopg2-binary", "PostgreSQL adapter"),
-                ("mysql-connector-python", "MySQL driver"),
-                ("pymongo", "MongoDB driver"),
-                ("redis", "Redis client"),
-            ],
-            "testing": [
-                ("pytest", "Testing framework"),
-                ("unittest2", "Enhanced unittest"),
-                ("nose2", "Testing framework"),
-                ("mock", "Mock object library"),
-                ("factory-boy", "Test fixtures"),
-            ],
-            "gui": [
-                ("tkinter", "GUI toolkit (built-in)"),
-                ("PyQt5", "Cross-platform GUI toolkit"),
-                ("kivy", "Multi-platform GUI framework"),
-                ("wxpython", "Native GUI toolkit"),
-            ],
-        }
+        # Try different search strategies
+        candidates.extend(self._search_by_keywords(query, limit))
+        candidates.extend(self._search_by_category(query, limit))
+        candidates.extend(self._get_popular_packages_for_domain(query, limit))
         
-        # Check for domain matches
-        for domain, pkg_list in domain_packages.items():
-            if any(word in query_lower for word in domain.split()):
-                for pkg_name, description in pkg_list:
-                    packages.append(self._get_package_info(pkg_name, description))
+        # Remove duplicates, keeping the first description seen
+        seen = set()
+        unique_candidates = []
+        for name, description in candidates:
+            if name not in seen:
+                seen.add(name)
+                unique_candidates.append((name, description))
         
-        return packages[:limit]
+        # Rank before truncating so the standard choices survive the limit
+        descriptions = dict(unique_candidates)
+        ranked = rank_by_popularity(list(descriptions))
+        return [(name, descriptions[name]) for name in ranked][:limit]
     
-    def _search_by_category(self, query: str, limit: int) -> List[PackageInfo]:
+    def _search_by_keywords(self, query: str, limit: int) -> List[Tuple[str, str]]:
+        """Search packages by keywords using the domain catalog."""
+        return get_domain_catalog().packages_for_query(query)[:limit]
+    
+    def _search_by_category(self, query: str, limit: int) -> List[Tuple[str, str]]:
         """Search by package categories."""
         # This would ideally use a package database or API
         # For now, return empty list
         return []
     
-    def _get_popular_packages_for_domain(self, query: str, limit: int) -> List[PackageInfo]:
+    def _get_popular_packages_for_domain(self, query: str, limit: int) -> List[Tuple[str, str]]:
         """Get popular packages for specific domains."""
         query_lower = query.lower()
         
         if "vision" in query_lower or "image" in query_lower:
             return [
-                self._get_package_info("opencv-python", "Computer vision library"),
-                self._get_package_info("pillow", "Python Imaging Library"),
-                self._get_package_info("scikit-image", "Image processing"),
+                ("opencv-python", "Computer vision library"),
+                ("pillow", "Python Imaging Library"),
+                ("scikit-image", "Image processing"),
             ]
         elif "ml" in query_lower or "machine" in query_lower:
             return [
-                self._get_package_info("scikit-learn", "Machine learning library"),
-                self._get_package_info("pandas", "Data manipulation"),
-                self._get_package_info("numpy", "Numerical computing"),
+                ("scikit-learn", "Machine learning library"),
+                ("pandas", "Data manipulation"),
+                ("numpy", "Numerical computing"),
             ]
         elif "web" in query_lower:
             return [
-                self._get_package_info("requests", "HTTP library"),
-                self._get_package_info("flask", "Web framework"),
-                self._get_package_info("beautifulsoup4", "HTML parser"),
+                ("requests", "HTTP library"),
+                ("flask", "Web framework"),
+                ("beautifulsoup4", "HTML parser"),
             ]
         
         return []
@@ -181,11 +129,9 @@ class PackageSearcher:
     def _get_package_info(self, package_name: str, description: str = "") -> PackageInfo:
         """Get detailed package information from PyPI."""
         try:
-            url = f"https://pypi.org/pypi/{package_name}/json"
-            response = self.session.get(url, timeout=5)
+            data = self.client.get_project(package_name)
             
-            if response.status_code == 200:
-                data = response.json()
+            if data is not None:
                 info = data.get("info", {})
                 
                 return PackageInfo(
@@ -232,9 +178,4 @@ class PackageSearcher:
     
     def validate_package_exists(self, package_name: str) -> bool:
         """Check if a package exists on PyPI."""
-        try:
-            url = f"https://pypi.org/pypi/{package_name}/json"
-            response = self.session.get(url, timeout=5)
-            return response.status_code == 200
-        except Exception:
-            return False
\ No newline at end of file
+        return self.client.project_exists(package_name)
\ No newline at end of file
@@ -0,0 +1,250 @@
+"""
+Local package popularity table for ranking search and resolver results.
+"""
+
+import csv
+import os
+import struct
+import sys
+import threading
+from array import array
+from pathlib import Path
+from typing import Dict, List, Iterable, Optional, Sequence, Tuple
+
+from packaging.utils import canonicalize_name
+from rich.console import Console
+
+from .config import get_config_dir
+
+console = Console()
+
+SNAPSHOT_MAGIC = b"IPOP1\n"
+SNAPSHOT_NAME = "popularity.bin"
+
+NAME_COLUMNS = ("project", "package", "name", "file_project")
+COUNT_COLUMNS = ("downloads", "download_count", "count", "num_downloads")
+
+
+class PopularityIndex:
+    """Monthly download counts per project.
+
+    Project names map to dense integer ids; the counts live in a single
+    ``array('q')`` indexed by id, so a lookup is one dict probe and one
+    array read.
+    """
+
+    def __init__(self, names: Sequence[str], downloads: array):
+        if len(names) != len(downloads):
+            raise ValueError("names and downloads must have the same length")
+
+        self.names = list(names)
+        self.downloads = downloads
+        self._ids = {name: i for i, name in enumerate(self.names)}
+
+    def __len__(self) -> int:
+        return len(self.names)
+
+    @classmethod
+    def from_rows(cls, rows: Iterable[Tuple[str, int]]) -> 'PopularityIndex':
+        """Build an index from (project, downloads) rows, summing duplicates."""
+        ids: Dict[str, int] = {}
+        names: List[str] = []
+        downloads = array('q')
+
+        for name, count in rows:
+            key = canonicalize_name(name)
+            if key in ids:
+                downloads[ids[key]] += count
+            else:
+                ids[key] = len(names)
+                names.append(key)
+                downloads.append(count)
+
+        return cls(names, downloads)
+
+    @classmethod
+    def from_csv(cls, file_path: Path) -> 'PopularityIndex':
+        """Load a CSV dump with a project column and a download count column."""
+        with open(file_path, 'r', newline='', encoding='utf-8') as f:
+            reader = csv.reader(f)
+            header = next(reader, None)
+            if header is None:
+                return cls([], array('q'))
+
+            name_col, count_col, has_header = _detect_columns(header)
+            rows = reader if has_header else _chain_first(header, reader)
+
+            return cls._from_raw_rows(
+                ((row[name_col], row[count_col]) for row in rows
+                 if len(row) > max(name_col, count_col) and row[count_col].strip()),
+                file_path,
+            )
+
+    @classmethod
+    def from_parquet(cls, file_path: Path) -> 'PopularityIndex':
+        """Load a Parquet dump (requires pyarrow)."""
+        try:
+            import pyarrow.parquet as pq
+        except ImportError:
+            raise ImportError("Reading Parquet dumps requires pyarrow: pip install pyarrow")
+
+        table = pq.read_table(str(file_path))
+        columns = [c.lower() for c in table.column_names]
+        name_col, count_col, _ = _detect_columns(columns)
+
+        names = table.column(name_col).to_pylist()
+        counts = table.column(count_col).to_pylist()
+        return cls._from_raw_rows(
+            ((name, count) for name, count in zip(names, counts) if name and count is not None),
+            file_path,
+        )
+
+    @classmethod
+    def _from_raw_rows(cls, rows: Iterable[Tuple[str, object]], file_path: Path) -> 'PopularityIndex':
+        """Build an index from rows as read from a dump, skipping rows whose count isn't a number."""
+        skipped = 0
+
+        def parsed() -> Iterable[Tuple[str, int]]:
+            nonlocal skipped
+            for name, count in rows:
+                try:
+                    yield name, int(float(count))
+                except (TypeError, ValueError, OverflowError):
+                    skipped += 1
+
+        index = cls.from_rows(parsed())
+        if skipped:
+            console.print(f"[yellow]Warning: Skipped {skipped} rows of {file_path} "
+                          f"without a numeric download count[/yellow]")
+        return index
+
+    @classmethod
+    def load(cls, file_path: Path) -> 'PopularityIndex':
+        """Load a compact snapshot written by ``save``, or a CSV/Parquet dump."""
+        suffix = file_path.suffix.lower()
+        if suffix == '.csv':
+            return cls.from_csv(file_path)
+        if suffix in ('.parquet', '.pq'):
+            return cls.from_parquet(file_path)
+
+        with open(file_path, 'rb') as f:
+            if f.read(len(SNAPSHOT_MAGIC)) != SNAPSHOT_MAGIC:
+                raise ValueError(f"Not a popularity snapshot: {file_path}")
+
+            count, names_size = struct.unpack('<II', f.read(8))
+            names = f.read(names_size).decode('utf-8').split('\n') if count else []
+
+            downloads = array('q')
+            downloads.frombytes(f.read(count * downloads.itemsize))
+            if sys.byteorder != 'little':
+                downloads.byteswap()
+
+        return cls(names, downloads)
+
+    def save(self, file_path: Path) -> None:
+        """Write the index as a compact little-endian snapshot."""
+        names_blob = '\n'.join(self.names).encode('utf-8')
+        downloads = array('q', self.downloads)
+        if sys.byteorder != 'little':
+            downloads.byteswap()
+
+        file_path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = file_path.with_suffix('.tmp')
+        with open(tmp_path, 'wb') as f:
+            f.write(SNAPSHOT_MAGIC)
+            f.write(struct.pack('<II', len(self.names), len(names_blob)))
+            f.write(names_blob)
+            f.write(downloads.tobytes())
+        os.replace(tmp_path, file_path)
+
+    def package_id(self, package_name: str) -> Optional[int]:
+        """Get the dense id of a project, or None if it isn't in the table."""
+        return self._ids.get(canonicalize_name(package_name))
+
+    def get_downloads(self, package_name: str) -> int:
+        """Get the download count of a project (0 when unknown)."""
+        package_id = self.package_id(package_name)
+        return self.downloads[package_id] if package_id is not None else 0
+
+    def rank(self, package_names: Sequence[str]) -> List[str]:
+        """Order names by downloads, most popular first; ties keep their order."""
+        return sorted(package_names, key=self.get_downloads, reverse=True)
+
+
+def _detect_columns(header: Sequence[str]) -> Tuple[int, int, bool]:
+    """Find the project and count columns; fall back to the first two columns."""
+    lowered = [h.strip().lower() for h in header]
+    name_col = next((lowered.index(c) for c in NAME_COLUMNS if c in lowered), None)
+    count_col = next((lowered.index(c) for c in COUNT_COLUMNS if c in lowered), None)
+
+    if name_col is not None and count_col is not None:
+        return name_col, count_col, True
+
+    # Headerless dump: the first row is data unless its second column isn't numeric
+    has_header = len(lowered) < 2 or not lowered[1].replace('.', '', 1).isdigit()
+    return 0, 1, has_header
+
+
+def _chain_first(first: List[str], rest: Iterable[List[str]]) -> Iterable[List[str]]:
+    yield first
+    yield from rest
+
+
+def get_snapshot_path() -> Path:
+    """Get where the imported popularity snapshot lives."""
+    return get_config_dir() / SNAPSHOT_NAME
+
+
+_index: Optional[PopularityIndex] = None
+_index_loaded = False
+_index_lock = threading.Lock()
+
+
+def get_popularity_index() -> Optional[PopularityIndex]:
+    """Lazily load the popularity table, or None if none is configured.
+
+    ``IPIP_POPULARITY_FILE`` may point at a snapshot or a CSV/Parquet dump;
+    otherwise the snapshot created by ``import_popularity`` is used.
+    """
+    global _index, _index_loaded
+
+    if _index_loaded:
+        return _index
+
+    with _index_lock:
+        if not _index_loaded:
+            override = os.environ.get('IPIP_POPULARITY_FILE')
+            path = Path(override) if override else get_snapshot_path()
+
+            if path.exists():
+                try:
+                    _index = PopularityIndex.load(path)
+                except (OSError, ValueError, ImportError, struct.error) as e:
+                    console.print(f"[yellow]Warning: Could not load popularity table {path}: {e}[/yellow]")
+                    _index = None
+
+            _index_loaded = True
+
+    return _index
+
+
+def rank_by_popularity(package_names: Sequence[str]) -> List[str]:
+    """Order names by popularity if a table is available, otherwise keep them as-is."""
+    index = get_popularity_index()
+    if index is None:
+        return list(package_names)
+    return index.rank(package_names)
+
+
+def import_popularity(source: Path) -> PopularityIndex:
+    """Import a CSV/Parquet download dump into the local snapshot."""
+    global _index, _index_loaded
+
+    index = PopularityIndex.load(source)
+    index.save(get_snapshot_path())
+
+    with _index_lock:
+        _index = index
+        _index_loaded = True
+
+    return index
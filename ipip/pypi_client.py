@@ -0,0 +1,195 @@
+"""
+Shared PyPI metadata client for ipip.
+"""
+
+import random
+import threading
+import time
+from concurrent.futures import Future
+from dataclasses import dataclass
+from typing import Dict, Any, Optional
+
+import requests
+from packaging.utils import canonicalize_name
+from rich.console import Console
+
+console = Console()
+
+PYPI_PROJECT_URL = "https://pypi.org/pypi/{name}/json"
+PYPI_RELEASE_URL = "https://pypi.org/pypi/{name}/{version}/json"
+
+
+@dataclass
+class ClientStats:
+    """Counters describing how metadata lookups were served."""
+    hits: int = 0
+    misses: int = 0
+    coalesced: int = 0
+    retries: int = 0
+
+    @property
+    def total(self) -> int:
+        return self.hits + self.misses + self.coalesced
+
+
+class TokenBucket:
+    """Thread-safe token bucket limiting how fast requests are sent."""
+
+    def __init__(self, rate: float, capacity: int):
+        self.rate = rate
+        self.capacity = capacity
+        self._tokens = float(capacity)
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self) -> None:
+        """Block until a token is available, then consume it."""
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+
+                wait = (1 - self._tokens) / self.rate
+
+            time.sleep(wait)
+
+
+class PyPIClient:
+    """Coalescing, rate-limited client for the PyPI JSON API.
+
+    Concurrent lookups for the same project share one in-flight request and
+    definitive answers (found / not found) are cached for the lifetime of the
+    client. Transport errors are not cached and propagate to every waiter.
+    """
+
+    RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+    def __init__(self, rate: float = 10.0, burst: int = 20, max_retries: int = 3,
+                 timeout: float = 5, backoff: float = 0.5):
+        self.timeout = timeout
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self.bucket = TokenBucket(rate, burst)
+        self.stats = ClientStats()
+
+        self.session = requests.Session()
+        self.session.headers.update({
+            'User-Agent': 'ipip/0.1.0 (Intelligent pip installer)'
+        })
+
+        self._cache: Dict[str, Optional[Dict[str, Any]]] = {}
+        self._inflight: Dict[str, Future] = {}
+        self._lock = threading.Lock()
+
+    def get_project(self, package_name: str) -> Optional[Dict[str, Any]]:
+        """Return the PyPI JSON document for a project, or None if it doesn't exist."""
+        key = canonicalize_name(package_name)
+        return self._get(key, PYPI_PROJECT_URL.format(name=key))
+
+    def get_release(self, package_name: str, version: str) -> Optional[Dict[str, Any]]:
+        """Return the PyPI JSON document for one release, or None if it doesn't exist."""
+        name = canonicalize_name(package_name)
+        return self._get(f"{name}=={version}", PYPI_RELEASE_URL.format(name=name, version=version))
+
+    def project_exists(self, package_name: str) -> bool:
+        """Check if a project exists on PyPI."""
+        try:
+            return self.get_project(package_name) is not None
+        except Exception:
+            return False
+
+    def _get(self, key: str, url: str) -> Optional[Dict[str, Any]]:
+        """Serve a lookup from cache, an in-flight request, or a new request."""
+        with self._lock:
+            if key in self._cache:
+                self.stats.hits += 1
+                return self._cache[key]
+
+            future = self._inflight.get(key)
+            if future is not None:
+                self.stats.coalesced += 1
+                leader = False
+            else:
+                future = Future()
+                self._inflight[key] = future
+                self.stats.misses += 1
+                leader = True
+
+        if not leader:
+            return future.result()
+
+        try:
+            result = self._fetch(url)
+        except BaseException as e:
+            future.set_exception(e)
+            raise
+        else:
+            with self._lock:
+                self._cache[key] = result
+            future.set_result(result)
+            return result
+        finally:
+            with self._lock:
+                self._inflight.pop(key, None)
+
+    def _fetch(self, url: str) -> Optional[Dict[str, Any]]:
+        """Fetch a JSON document, retrying 429/5xx and transport errors with jittered backoff."""
+        attempt = 0
+        while True:
+            self.bucket.acquire()
+
+            try:
+                response = self.session.get(url, timeout=self.timeout)
+            except requests.RequestException:
+                if attempt >= self.max_retries:
+                    raise
+                self._sleep_before_retry(attempt)
+                attempt += 1
+                continue
+
+            if response.status_code == 200:
+                return response.json()
+
+            if response.status_code in self.RETRY_STATUSES:
+                if attempt >= self.max_retries:
+                    response.raise_for_status()
+                self._sleep_before_retry(attempt, response.headers.get('Retry-After'))
+                attempt += 1
+                continue
+
+            # 404 and other client errors are definitive answers
+            return None
+
+    def _sleep_before_retry(self, attempt: int, retry_after: Optional[str] = None) -> None:
+        """Sleep for Retry-After if the server sent one, otherwise full-jitter exponential backoff."""
+        with self._lock:
+            self.stats.retries += 1
+
+        delay = None
+        if retry_after:
+            try:
+                delay = float(retry_after)
+            except ValueError:
+                pass
+
+        if delay is None:
+            delay = random.uniform(0, self.backoff * (2 ** attempt))
+
+        time.sleep(delay)
+
+    def show_stats(self) -> None:
+        """Print lookup counters."""
+        if self.stats.total:
+            console.print(
+                f"[dim]PyPI lookups: {self.stats.hits} hits, {self.stats.misses} misses, "
+                f"{self.stats.coalesced} coalesced, {self.stats.retries} retries[/dim]"
+            )
+
+
+# Global client shared by every module
+pypi_client = PyPIClient()
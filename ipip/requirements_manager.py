@@ -2,24 +2,46 @@
 Requirements.txt generation and management for ipip.
 """
 
+import importlib
 import os
-import re
 import subprocess
 import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from importlib import metadata as importlib_metadata
 from pathlib import Path
 from typing import List, Dict, Set, Optional, Tuple
+from packaging.utils import canonicalize_name
 from rich.console import Console
 from rich.table import Table
 
+from .dependency_graph import DependencyGraph
+from .fingerprint import RequirementsState, environment_fingerprint
+from .import_scanner import ImportCache, extract_imports, classify_imports, local_module_names
+from .walker import iter_files
+from .watcher import create_watcher
+from .lockfile import collect_hashes
+from .monorepo import discover_projects, find_monorepo_root
+
 console = Console()
 
+# Common system/base packages to exclude
+SYSTEM_PACKAGES = {
+    "pip", "setuptools", "wheel", "distlib", "virtualenv",
+    "pip-tools", "pipenv", "poetry", "twine", "build",
+}
+
 
 class RequirementsManager:
     """Manages requirements.txt files and project dependencies."""
     
-    def __init__(self, verbose: bool = False):
+    def __init__(self, verbose: bool = False, max_workers: Optional[int] = None,
+                 exclude_globs: Tuple[str, ...] = ()):
         self.verbose = verbose
+        self.max_workers = max_workers
+        self.exclude_globs = exclude_globs
         self.project_root = self._find_project_root()
+        self._import_cache: Optional[ImportCache] = None
     
     def _find_project_root(self) -> Path:
         """Find the project root directory."""
@@ -43,29 +65,45 @@ class RequirementsManager:
         # If no indicators found, use current directory
         return Path.cwd()
     
-    def create_requirements(self, output_file: str = "requirements.txt") -> bool:
-        """Create a requirements.txt file from the current environment."""
+    def _find_monorepo_root(self) -> Path:
+        """Find the top of the monorepo, which may lie above the sub-project the command runs in."""
+        return find_monorepo_root(Path.cwd()) or self.project_root
+    
+    def create_requirements(self, output_file: str = "requirements.txt", full: bool = True,
+                            show_graph: bool = False, lock: bool = False) -> bool:
+        """Create a requirements.txt file from the current environment.
+        
+        By default every installed non-system package is pinned, transitive
+        dependencies included. Without ``full`` only the minimal set of
+        top-level distributions covering the project's imports is pinned. With
+        ``lock`` every pinned artifact gets ``--hash`` entries; since pip's
+        hash-checking mode needs the whole tree pinned, the roots are expanded
+        to their full dependency closure.
+        """
         try:
             console.print("[blue]Analyzing current environment...[/blue]")
             
-            # Get currently installed packages
-            installed_packages = self._get_installed_packages()
-            
-            # Filter out system packages and identify project-specific ones
-            project_packages = self._filter_project_packages(installed_packages)
-            
             # Detect imports in the project
             project_imports = self._scan_project_imports()
             
-            # Match imports to packages
-            required_packages = self._match_imports_to_packages(project_imports, installed_packages)
+            # Nothing to do if neither the environment nor the imports changed since the last write
+            output_path = self.project_root / output_file
+            state = RequirementsState(self.project_root)
+            fingerprint = environment_fingerprint(
+                "create", ",".join(sorted(project_imports)), f"full={full}", f"lock={lock}"
+            )
+            if not show_graph and state.is_current(output_path, fingerprint):
+                console.print(f"[green]✓ Requirements file up to date: {output_path}[/green]")
+                return True
             
-            # Merge with explicitly installed packages
-            all_packages = self._merge_package_lists(project_packages, required_packages)
+            graph = DependencyGraph.from_environment() if (show_graph or not full) else None
+            all_packages = self._resolve_packages(project_imports, graph, full=full, lock=lock)
+            
+            hashes = self._collect_hashes(all_packages) if lock else None
             
             # Write requirements file
-            output_path = self.project_root / output_file
-            self._write_requirements_file(output_path, all_packages)
+            self._write_requirements_file(output_path, all_packages, hashes)
+            state.record(output_path, fingerprint)
             
             console.print(f"[green]✓ Requirements file created: {output_path}[/green]")
             console.print(f"[blue]Found {len(all_packages)} dependencies[/blue]")
@@ -73,12 +111,190 @@ class RequirementsManager:
             if self.verbose:
                 self._display_packages_table(all_packages)
             
+            if show_graph:
+                keys = {canonicalize_name(name) for name in all_packages}
+                graph.show(graph.minimal_roots(keys), title="Project Dependency Graph")
+            
             return True
             
         except Exception as e:
             console.print(f"[red]Error creating requirements: {e}[/red]")
             return False
     
+    def create_monorepo_requirements(self, output_file: str = "requirements.txt", lock: bool = False) -> bool:
+        """Create a requirements file for every sub-project of the monorepo.
+        
+        The monorepo is the whole checkout, even when run from inside one of
+        its sub-projects. Sub-projects are found and their sources partitioned
+        in one walk. The import cache, dependency graph and hash lookups are
+        shared, and each sub-project is resolved concurrently.
+        """
+        try:
+            console.print("[blue]Discovering sub-projects...[/blue]")
+            
+            monorepo_root = self._find_monorepo_root()
+            projects = discover_projects(monorepo_root, exclude_globs=self.exclude_globs)
+            if not projects:
+                console.print(f"[yellow]No Python projects found under {monorepo_root}[/yellow]")
+                return False
+            all_files = [path for files in projects.values() for path in files]
+            
+            # Kept apart from the single-project cache, which records its own walk of the same root
+            file_imports = ImportCache(monorepo_root, scope="monorepo").scan(all_files, max_workers=self.max_workers)
+            
+            graph = DependencyGraph.from_environment()
+            
+            # Sibling projects imported from each other aren't third-party
+            project_locals = {root: local_module_names(files, root) for root, files in projects.items()}
+            monorepo_locals = set().union(*project_locals.values())
+            
+            def resolve(root: Path) -> Dict[str, str]:
+                imports = set().union(*(file_imports.get(path, set()) for path in projects[root]))
+                third_party = classify_imports(imports, monorepo_locals)["third_party"]
+                return self._resolve_packages(third_party, graph, lock=lock)
+            
+            with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+                resolved = dict(zip(projects, executor.map(resolve, projects)))
+            
+            # Hash the union once so shared dependencies are only looked up once
+            hashes = None
+            if lock:
+                union = {}
+                for packages in resolved.values():
+                    union.update(packages)
+                hashes = self._collect_hashes(union)
+            
+            table = Table(title="Sub-project Requirements")
+            table.add_column("Project", style="cyan", no_wrap=True)
+            table.add_column("Files", justify="right")
+            table.add_column("Dependencies", justify="right", style="magenta")
+            table.add_column("Status")
+            
+            for root, packages in resolved.items():
+                output_path = root / output_file
+                project_hashes = {name: hashes[name] for name in packages} if hashes is not None else None
+                written = self._write_requirements_file(output_path, packages, project_hashes)
+                
+                label = str(root.relative_to(monorepo_root)) if root != monorepo_root else "."
+                status = "[green]written[/green]" if written else "[dim]unchanged[/dim]"
+                table.add_row(label, str(len(projects[root])), str(len(packages)), status)
+            
+            console.print(table)
+            console.print(f"[green]✓ Requirements created for {len(resolved)} projects[/green]")
+            return True
+            
+        except Exception as e:
+            console.print(f"[red]Error creating requirements: {e}[/red]")
+            return False
+    
+    def _resolve_packages(self, project_imports: Set[str], graph: Optional[DependencyGraph],
+                          full: bool = False, lock: bool = False) -> Dict[str, str]:
+        """Resolve the project's imports to the packages that should be pinned."""
+        if full:
+            # Get currently installed packages
+            installed_packages = self._get_installed_packages()
+            
+            # Filter out system packages and identify project-specific ones
+            project_packages = self._filter_project_packages(installed_packages)
+            
+            # Match imports to packages
+            top_level = {name.split('.', 1)[0] for name in project_imports}
+            required_packages = self._match_imports_to_packages(top_level, installed_packages)
+            
+            # Merge with explicitly installed packages
+            return self._merge_package_lists(project_packages, required_packages)
+        
+        packages = self._resolve_root_packages(graph, project_imports)
+        if lock:
+            closure = graph.closure(canonicalize_name(name) for name in packages)
+            packages = {graph[key].name: graph[key].version for key in closure}
+        return packages
+    
+    def _resolve_root_packages(self, graph: DependencyGraph, imports: Set[str]) -> Dict[str, str]:
+        """Get the minimal top-level distributions that provide the project's imports."""
+        needed = set()
+        unmapped = set()
+        
+        # Only the most specific paths are mapped: with "from google.cloud import storage",
+        # google.cloud.storage narrows the providers down where google.cloud alone wouldn't
+        ordered = sorted(imports)
+        specific = [name for name, following in zip(ordered, ordered[1:] + [""])
+                    if not following.startswith(name + ".")]
+        
+        for import_name in specific:
+            providers = graph.providers(import_name)
+            if providers:
+                needed.update(providers)
+            else:
+                unmapped.add(import_name.split(".", 1)[0])
+        
+        # Fall back to name heuristics for imports no distribution declares
+        for package_name in self._match_imports_to_packages(unmapped, graph.versions()):
+            needed.add(canonicalize_name(package_name))
+        
+        roots = graph.minimal_roots(key for key in needed if key not in SYSTEM_PACKAGES)
+        
+        if self.verbose:
+            console.print(f"[blue]{len(needed)} distributions cover the imports; {len(roots)} are top-level[/blue]")
+        
+        return {graph[key].name: graph[key].version for key in roots}
+    
+    def watch_requirements(self, output_file: str = "requirements.txt", lock: bool = False) -> bool:
+        """Keep a requirements file in sync with the project until interrupted.
+        
+        Source changes only re-parse the edited files (through the import
+        cache) and the environment graph is rebuilt only when site-packages
+        changes. In lock mode only added or upgraded packages are hashed
+        again. The file is rewritten only when its content would change.
+        Between changes the process sleeps on inotify, or polls once a
+        second where inotify isn't available.
+        """
+        output_path = self.project_root / output_file
+        watcher = create_watcher(self.project_root, self.exclude_globs)
+        
+        console.print(f"[blue]Watching {self.project_root} ({type(watcher).__name__}), press Ctrl+C to stop[/blue]")
+        
+        project_imports = None
+        graph = None
+        hashed: Dict[str, str] = {}              # package -> version its hashes were collected for
+        known_hashes: Dict[str, List[str]] = {}
+        try:
+            while True:
+                if project_imports is None:
+                    project_imports = self._scan_project_imports()
+                if graph is None:
+                    graph = DependencyGraph.from_environment()
+                
+                packages = self._resolve_packages(project_imports, graph, lock=lock)
+                hashes = None
+                if lock:
+                    changed = {name: version for name, version in packages.items() if hashed.get(name) != version}
+                    if changed:
+                        known_hashes.update(self._collect_hashes(changed))
+                        hashed.update(changed)
+                    hashes = {name: known_hashes[name] for name in packages}
+                
+                if self._write_requirements_file(output_path, packages, hashes):
+                    console.print(f"[green]✓ Requirements file updated: {output_path} ({len(packages)} dependencies)[/green]")
+                elif self.verbose:
+                    console.print("[dim]Requirements unchanged[/dim]")
+                
+                changes = watcher.wait()
+                if changes.sources:
+                    project_imports = None
+                if changes.environment:
+                    importlib.invalidate_caches()
+                    graph = None
+                    
+        except KeyboardInterrupt:
+            console.print("\n[yellow]Stopped watching[/yellow]")
+            return True
+        except Exception as e:
+            console.print(f"[red]Error watching requirements: {e}[/red]")
+            return False
+        finally:
+            watcher.close()
+    
     def update_requirements(self, requirements_file: str = "requirements.txt") -> bool:
         """Update an existing requirements.txt file."""
         req_path = self.project_root / requirements_file
@@ -88,33 +304,91 @@ class RequirementsManager:
             console.print("[blue]Creating new requirements file...[/blue]")
             return self.create_requirements(requirements_file)
         
+        return self._update_requirements_file(req_path, RequirementsState(self.project_root))
+    
+    def update_monorepo_requirements(self, requirements_file: str = "requirements.txt") -> bool:
+        """Update the requirements file of every sub-project of the monorepo that has one.
+        
+        If no sub-project has one yet, they are all created instead.
+        """
+        try:
+            monorepo_root = self._find_monorepo_root()
+            projects = discover_projects(monorepo_root, exclude_globs=self.exclude_globs)
+        except Exception as e:
+            console.print(f"[red]Error updating requirements: {e}[/red]")
+            return False
+        
+        req_paths = [root / requirements_file for root in projects if (root / requirements_file).exists()]
+        if not req_paths:
+            console.print(f"[yellow]No sub-project under {monorepo_root} has a {requirements_file}[/yellow]")
+            console.print("[blue]Creating new requirements files...[/blue]")
+            return self.create_monorepo_requirements(requirements_file)
+        
+        for root in projects:
+            if not (root / requirements_file).exists() and self.verbose:
+                console.print(f"[dim]Skipping {root}: no {requirements_file}[/dim]")
+        
+        state = RequirementsState(monorepo_root)
+        results = [self._update_requirements_file(req_path, state) for req_path in req_paths]
+        return all(results)
+    
+    def _update_requirements_file(self, req_path: Path, state: RequirementsState) -> bool:
+        """Bring an existing requirements file's pins in line with the environment."""
         try:
+            # Nothing to do if the environment didn't change since the last write
+            fingerprint = environment_fingerprint("update")
+            if state.is_current(req_path, fingerprint):
+                console.print(f"[green]✓ Requirements file up to date: {req_path}[/green]")
+                return True
+            
             # Read existing requirements
             existing_packages = self._read_requirements_file(req_path)
             
+            # Keep hash-pinned files hash-pinned
+            with open(req_path, 'r') as f:
+                locked = '--hash=' in f.read()
+            
             # Get current environment packages
-            current_packages = self._get_installed_packages()
+            current_packages = self._get_installed_versions()
             
             # Update versions for existing packages
             updated_packages = {}
             for pkg_name in existing_packages:
-                if pkg_name in current_packages:
-                    updated_packages[pkg_name] = current_packages[pkg_name]
+                key = canonicalize_name(pkg_name)
+                if key in current_packages:
+                    updated_packages[pkg_name] = current_packages[key]
                 else:
                     # Package no longer installed
                     if self.verbose:
                         console.print(f"[yellow]Package {pkg_name} no longer installed[/yellow]")
             
-            # Write updated requirements
-            self._write_requirements_file(req_path, updated_packages)
+            # Re-hash only when a pin actually moved
+            hashes = None
+            if locked:
+                unchanged = updated_packages == existing_packages
+                hashes = self._read_requirements_hashes(req_path) if unchanged else self._collect_hashes(updated_packages)
             
-            console.print(f"[green]✓ Requirements file updated: {req_path}[/green]")
+            # Write updated requirements; identical content leaves the file untouched
+            if self._write_requirements_file(req_path, updated_packages, hashes):
+                console.print(f"[green]✓ Requirements file updated: {req_path}[/green]")
+            else:
+                console.print(f"[green]✓ Requirements file up to date: {req_path}[/green]")
+            state.record(req_path, fingerprint)
             return True
             
         except Exception as e:
             console.print(f"[red]Error updating requirements: {e}[/red]")
             return False
     
+    def _get_installed_versions(self) -> Dict[str, str]:
+        """Get {canonical name: version} for installed distributions, without spawning pip."""
+        versions = {}
+        for dist in importlib_metadata.distributions():
+            name = dist.metadata['Name']
+            if name:
+                versions.setdefault(canonicalize_name(name), dist.version)
+        return versions
+    
     def _get_installed_packages(self) -> Dict[str, str]:
         """Get all installed packages and their versions."""
         try:
@@ -139,63 +413,59 @@ class RequirementsManager:
     
     def _filter_project_packages(self, installed_packages: Dict[str, str]) -> Dict[str, str]:
         """Filter out system packages to identify project-specific ones."""
-        # Common system/base packages to exclude
-        system_packages = {
-            "pip", "setuptools", "wheel", "distlib", "virtualenv",
-            "pip-tools", "pipenv", "poetry", "twine", "build",
-        }
-        
         return {
             name: version for name, version in installed_packages.items()
-            if name.lower() not in system_packages
+            if name.lower() not in SYSTEM_PACKAGES
         }
     
     def _scan_project_imports(self) -> Set[str]:
-        """Scan Python files in the project for import statements."""
-        imports = set()
-        python_files = list(self.project_root.rglob("*.py"))
+        """Scan Python files in the project for third-party imports, as dotted module paths.
         
-        # Exclude common directories
-        exclude_dirs = {".git", "__pycache__", ".pytest_cache", "venv", ".venv", "env"}
+        When no recorded directory or file changed since the last scan, the
+        cached imports are used without walking the tree at all.
+        """
+        if self._import_cache is None:
+            self._import_cache = ImportCache(self.project_root)
         
-        for py_file in python_files:
-            # Skip files in excluded directories
-            if any(part in exclude_dirs for part in py_file.parts):
-                continue
-                
-            try:
-                with open(py_file, 'r', encoding='utf-8') as f:
-                    content = f.read()
-                    imports.update(self._extract_imports(content))
-            except (UnicodeDecodeError, FileNotFoundError):
-                continue
-        
-        return imports
+        walk_key = self._walk_key()
+        file_imports = self._import_cache.cached_imports(walk_key)
+        if file_imports is None:
+            # Excluded, ignored and virtualenv directories are pruned before descending
+            started_ns = time.time_ns()
+            directories: List[Path] = []
+            python_files = list(iter_files(self.project_root, suffixes=(".py",), exclude_globs=self.exclude_globs,
+                                           visited_dirs=directories))
+            
+            # Only new or changed files are parsed; the rest come from the cache
+            file_imports = self._import_cache.scan(python_files, max_workers=self.max_workers,
+                                                   directories=directories, walk_key=walk_key,
+                                                   walk_started_ns=started_ns)
+        python_files = list(file_imports)
+        imports = set().union(*file_imports.values())
+        
+        classified = classify_imports(imports, local_module_names(python_files, self.project_root))
+        
+        if self.verbose:
+            console.print(
+                f"[blue]Scanned {len(file_imports)} files ({self._import_cache.parsed} parsed): "
+                f"{len(classified['third_party'])} third-party, "
+                f"{len(classified['stdlib'])} stdlib, {len(classified['local'])} local imports[/blue]"
+            )
+        
+        return classified["third_party"]
+    
+    def _walk_key(self) -> list:
+        """Describe what decides which files a project walk includes: the exclusions and the root .gitignore."""
+        try:
+            st = (self.project_root / ".gitignore").stat()
+            gitignore = [st.st_size, st.st_mtime_ns]
+        except OSError:
+            gitignore = None
+        return [sorted(self.exclude_globs), gitignore]
     
     def _extract_imports(self, content: str) -> Set[str]:
         """Extract import statements from Python code."""
-        imports = set()
-        
-        # Patterns for different import styles
-        patterns = [
-            r'^import\s+([a-zA-Z_][a-zA-Z0-9_]*)',
-            r'^from\s+([a-zA-Z_][a-zA-Z0-9_]*)\s+import',
-        ]
-        
-        for line in content.split('\n'):
-            line = line.strip()
-            if line.startswith('#'):
-                continue
-                
-            for pattern in patterns:
-                match = re.match(pattern, line)
-                if match:
-                    module = match.group(1)
-                    # Get top-level module name
-                    top_module = module.split('.')[0]
-                    imports.add(top_module)
-        
-        return imports
+        return extract_imports(content)
     
     def _match_imports_to_packages(self, imports: Set[str], installed_packages: Dict[str, str]) -> Dict[str, str]:
         """Match import names to installed package names."""
@@ -247,16 +517,56 @@ class RequirementsManager:
         
         return merged
     
-    def _write_requirements_file(self, file_path: Path, packages: Dict[str, str]) -> None:
-        """Write packages to a requirements.txt file."""
-        sorted_packages = sorted(packages.items())
+    def _collect_hashes(self, packages: Dict[str, str]) -> Dict[str, List[str]]:
+        """Hash every pinned artifact, warning about packages that got no hashes."""
+        with console.status("[bold blue]Hashing artifacts...", spinner="dots"):
+            hashes = collect_hashes(packages)
+        
+        missing = sorted(name for name, digests in hashes.items() if not digests)
+        if missing:
+            console.print(f"[yellow]No hashes found for: {', '.join(missing)}[/yellow]")
+            console.print("[yellow]pip --require-hashes will reject this file until they are added[/yellow]")
+        
+        return hashes
+    
+    def _write_requirements_file(self, file_path: Path, packages: Dict[str, str],
+                                 hashes: Optional[Dict[str, List[str]]] = None) -> bool:
+        """Write packages to a requirements.txt file, with --hash entries in lock mode.
+        
+        Returns False without touching the file when its content wouldn't change.
+        """
+        content = self._render_requirements(file_path.name, packages, hashes)
+        
+        try:
+            with open(file_path, 'r') as f:
+                if f.read() == content:
+                    return False
+        except OSError:
+            pass
         
         with open(file_path, 'w') as f:
-            f.write("# Generated by ipip\n")
-            f.write("# This file lists the Python dependencies for this project\n\n")
-            
-            for package, version in sorted_packages:
-                f.write(f"{package}=={version}\n")
+            f.write(content)
+        return True
+    
+    def _render_requirements(self, file_name: str, packages: Dict[str, str],
+                             hashes: Optional[Dict[str, List[str]]] = None) -> str:
+        """Render the content of a requirements file."""
+        lines = ["# Generated by ipip"]
+        if hashes is not None:
+            lines.append("# Install with: pip install --require-hashes -r " + file_name)
+        else:
+            lines.append("# This file lists the Python dependencies for this project")
+        lines.append("")
+        
+        for package, version in sorted(packages.items()):
+            digests = hashes.get(package) if hashes else None
+            if digests:
+                lines.append(f"{package}=={version} \\")
+                lines.append(" \\\n".join(f"    --hash=sha256:{digest}" for digest in digests))
+            else:
+                lines.append(f"{package}=={version}")
+        
+        return "\n".join(lines) + "\n"
     
     def _read_requirements_file(self, file_path: Path) -> Dict[str, str]:
         """Read an existing requirements.txt file."""
@@ -267,10 +577,30 @@ class RequirementsManager:
                 line = line.strip()
                 if line and not line.startswith('#') and '==' in line:
                     name, version = line.split('==', 1)
-                    packages[name] = version
+                    # Hash-pinned lines continue with " \" and --hash options
+                    packages[name.strip()] = version.split()[0].rstrip('\\').split(';')[0].strip()
         
         return packages
     
+    def _read_requirements_hashes(self, file_path: Path) -> Dict[str, List[str]]:
+        """Read the --hash entries of a hash-pinned requirements file."""
+        hashes: Dict[str, List[str]] = {}
+        package = None
+        
+        with open(file_path, 'r') as f:
+            for line in f:
+                line = line.strip().rstrip('\\').strip()
+                if not line or line.startswith('#'):
+                    continue
+                if line.startswith('--hash='):
+                    if package is not None:
+                        hashes[package].append(line.split(':', 1)[-1])
+                elif '==' in line:
+                    package = line.split('==', 1)[0].strip()
+                    hashes[package] = []
+        
+        return hashes
+    
     def _display_packages_table(self, packages: Dict[str, str]) -> None:
         """Display packages in a formatted table."""
         table = Table(title="Project Dependencies")
@@ -0,0 +1,121 @@
+"""
+Pruning directory walker for project scans.
+"""
+
+import os
+from pathlib import Path
+from typing import Iterable, Iterator, List, Optional, Tuple
+
+from .ignore import IgnoreMatcher
+
+# Directories never worth descending into when looking for project sources
+DEFAULT_EXCLUDE_DIRS = frozenset({
+    ".git", ".hg", ".svn", "__pycache__", ".pytest_cache", ".mypy_cache", ".ruff_cache",
+    "venv", ".venv", "env", ".tox", ".nox", ".eggs", "node_modules", "site-packages",
+})
+
+
+def is_virtualenv(directory: str) -> bool:
+    """Check if a directory is a virtualenv or conda environment, whatever its name."""
+    return (os.path.exists(os.path.join(directory, "pyvenv.cfg"))
+            or os.path.isdir(os.path.join(directory, "conda-meta")))
+
+
+def walk(root: Path,
+         exclude_dirs: Iterable[str] = DEFAULT_EXCLUDE_DIRS,
+         exclude_globs: Iterable[str] = (),
+         use_gitignore: bool = True,
+         start: Optional[Path] = None) -> Iterator[Tuple[str, str, List[os.DirEntry]]]:
+    """Yield (directory, relative prefix, file entries) for every directory that isn't pruned.
+
+    Directories are skipped by name (``exclude_dirs``), when they are
+    virtualenvs, or when they match the root ``.gitignore`` or any of the
+    gitignore-style ``exclude_globs``; files matching the same patterns are
+    left out. Entries are visited in sorted order so results are deterministic.
+
+    With ``start``, a directory below root whose parent wasn't pruned, only
+    its subtree is walked, still matching patterns relative to root.
+    """
+    exclude_dirs = frozenset(exclude_dirs)
+
+    ignore = IgnoreMatcher.from_lines(exclude_globs)
+    if use_gitignore:
+        ignore = IgnoreMatcher.from_file(root / ".gitignore").extend(ignore)
+
+    stack = [(str(root), "")]
+    if start is not None and start != root:
+        relative = start.relative_to(root).as_posix()
+        if start.name in exclude_dirs or (ignore and ignore.match(relative, True)) or is_virtualenv(str(start)):
+            return
+        stack = [(str(start), relative + "/")]
+
+    while stack:
+        directory, relative = stack.pop()
+
+        try:
+            with os.scandir(directory) as it:
+                entries = sorted(it, key=lambda e: e.name)
+        except OSError:
+            continue
+
+        files = []
+        subdirs = []
+        for entry in entries:
+            name = entry.name
+            try:
+                is_dir = entry.is_dir(follow_symlinks=False)
+            except OSError:
+                continue
+
+            if is_dir:
+                if name in exclude_dirs:
+                    continue
+                if ignore and ignore.match(relative + name, True):
+                    continue
+                if is_virtualenv(entry.path):
+                    continue
+                subdirs.append((entry.path, relative + name + "/"))
+                continue
+
+            if ignore and ignore.match(relative + name, False):
+                continue
+            files.append(entry)
+
+        yield directory, relative, files
+
+        # Depth-first, in name order
+        stack.extend(reversed(subdirs))
+
+
+def iter_files(root: Path,
+               suffixes: Optional[Tuple[str, ...]] = None,
+               exclude_dirs: Iterable[str] = DEFAULT_EXCLUDE_DIRS,
+               exclude_globs: Iterable[str] = (),
+               use_gitignore: bool = True,
+               visited_dirs: Optional[List[Path]] = None) -> Iterator[Path]:
+    """Lazily yield files under root, pruning excluded directories before descending.
+
+    Every directory walked is appended to ``visited_dirs`` when it's given.
+    """
+    for directory, _, entries in walk(root, exclude_dirs, exclude_globs, use_gitignore):
+        if visited_dirs is not None:
+            visited_dirs.append(Path(directory))
+        for entry in entries:
+            if suffixes and not entry.name.endswith(suffixes):
+                continue
+            try:
+                if not entry.is_file():
+                    continue
+            except OSError:
+                continue
+            yield Path(entry.path)
+
+
+def iter_dirs(root: Path,
+              exclude_dirs: Iterable[str] = DEFAULT_EXCLUDE_DIRS,
+              exclude_globs: Iterable[str] = (),
+              use_gitignore: bool = True,
+              start: Optional[Path] = None) -> Iterator[Path]:
+    """Lazily yield root (or ``start``) and every directory below it that isn't pruned."""
+    for directory, _, _ in walk(root, exclude_dirs, exclude_globs, use_gitignore, start):
+        yield Path(directory)
@@ -0,0 +1,221 @@
+"""
+File system change watching for long-running ipip modes.
+"""
+
+import ctypes
+import ctypes.util
+import os
+import select
+import site
+import struct
+import sys
+import sysconfig
+import time
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from .walker import iter_dirs, iter_files
+
+# inotify flags (linux/inotify.h)
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_FROM = 0x00000040
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_DELETE = 0x00000200
+IN_DELETE_SELF = 0x00000400
+IN_Q_OVERFLOW = 0x00004000
+IN_IGNORED = 0x00008000
+IN_ISDIR = 0x40000000
+IN_NONBLOCK = 0o4000
+IN_CLOEXEC = 0o2000000
+
+PROJECT_MASK = IN_CLOSE_WRITE | IN_MOVED_FROM | IN_MOVED_TO | IN_CREATE | IN_DELETE | IN_DELETE_SELF
+SITE_MASK = IN_MOVED_FROM | IN_MOVED_TO | IN_CREATE | IN_DELETE
+
+_EVENT_HEADER = struct.Struct('iIII')
+
+# Changes arriving within this window are reported together
+DEBOUNCE_SECONDS = 0.25
+
+
+def get_site_packages_dirs() -> List[Path]:
+    """Get the existing site-packages directories of the running interpreter."""
+    candidates = set()
+    for key in ('purelib', 'platlib'):
+        path = sysconfig.get_paths().get(key)
+        if path:
+            candidates.add(path)
+
+    try:
+        candidates.update(site.getsitepackages())
+    except AttributeError:  # Old virtualenv versions don't provide it
+        pass
+    if site.ENABLE_USER_SITE:
+        candidates.add(site.getusersitepackages())
+
+    return sorted(Path(p) for p in candidates if os.path.isdir(p))
+
+
+class ChangeSet:
+    """What changed since the last wait."""
+
+    def __init__(self, sources: bool = False, environment: bool = False):
+        self.sources = sources
+        self.environment = environment
+
+    def __bool__(self) -> bool:
+        return self.sources or self.environment
+
+
+class PollingWatcher:
+    """Portable watcher that compares stat snapshots every interval."""
+
+    def __init__(self, root: Path, exclude_globs: Iterable[str] = (), interval: float = 1.0):
+        self.root = root
+        self.exclude_globs = tuple(exclude_globs)
+        self.interval = interval
+        self.site_dirs = get_site_packages_dirs()
+        self._sources = self._snapshot_sources()
+        self._environment = self._snapshot_environment()
+
+    def _snapshot_sources(self) -> Dict[str, Tuple[int, int]]:
+        snapshot = {}
+        for path in iter_files(self.root, suffixes=('.py',), exclude_globs=self.exclude_globs):
+            try:
+                st = path.stat()
+            except OSError:
+                continue
+            snapshot[str(path)] = (st.st_size, st.st_mtime_ns)
+        return snapshot
+
+    def _snapshot_environment(self) -> Dict[str, int]:
+        snapshot = {}
+        for directory in self.site_dirs:
+            try:
+                snapshot[str(directory)] = directory.stat().st_mtime_ns
+            except OSError:
+                continue
+        return snapshot
+
+    def wait(self, timeout: Optional[float] = None) -> ChangeSet:
+        """Block until something changes (or the timeout passes)."""
+        deadline = None if timeout is None else time.monotonic() + timeout
+
+        while True:
+            time.sleep(self.interval)
+
+            sources = self._snapshot_sources()
+            environment = self._snapshot_environment()
+            changes = ChangeSet(sources != self._sources, environment != self._environment)
+            self._sources, self._environment = sources, environment
+
+            if changes or (deadline is not None and time.monotonic() >= deadline):
+                return changes
+
+    def close(self) -> None:
+        pass
+
+
+class InotifyWatcher:
+    """Linux watcher that blocks on inotify, using no CPU between changes."""
+
+    def __init__(self, root: Path, exclude_globs: Iterable[str] = ()):
+        libc_name = ctypes.util.find_library('c') or 'libc.so.6'
+        self._libc = ctypes.CDLL(libc_name, use_errno=True)
+        self.root = root
+        self.exclude_globs = tuple(exclude_globs)
+        self._watches: Dict[int, Tuple[Path, bool]] = {}
+
+        self._fd = self._libc.inotify_init1(IN_NONBLOCK | IN_CLOEXEC)
+        if self._fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1 failed")
+
+        try:
+            for directory in iter_dirs(root, exclude_globs=self.exclude_globs):
+                self._add_watch(directory, PROJECT_MASK, is_site=False)
+            for directory in get_site_packages_dirs():
+                self._add_watch(directory, SITE_MASK, is_site=True)
+        except OSError:
+            self.close()
+            raise
+
+    def _add_watch(self, directory: Path, mask: int, is_site: bool) -> None:
+        wd = self._libc.inotify_add_watch(self._fd, os.fsencode(str(directory)), mask)
+        if wd < 0:
+            # ENOSPC here means the per-user watch limit is exhausted
+            raise OSError(ctypes.get_errno(), f"inotify_add_watch failed for {directory}")
+        self._watches[wd] = (directory, is_site)
+
+    def wait(self, timeout: Optional[float] = None) -> ChangeSet:
+        """Block until something changes (or the timeout passes)."""
+        changes = ChangeSet()
+        wait_for = timeout
+
+        while True:
+            ready, _, _ = select.select([self._fd], [], [], wait_for)
+            if not ready:
+                return changes
+
+            self._read_events(changes)
+
+            # Keep draining briefly so one editor save produces one update
+            if changes:
+                wait_for = DEBOUNCE_SECONDS
+
+    def _read_events(self, changes: ChangeSet) -> None:
+        try:
+            data = os.read(self._fd, 64 * 1024)
+        except BlockingIOError:
+            return
+
+        offset = 0
+        while offset + _EVENT_HEADER.size <= len(data):
+            wd, mask, _, length = _EVENT_HEADER.unpack_from(data, offset)
+            name_bytes = data[offset + _EVENT_HEADER.size:offset + _EVENT_HEADER.size + length]
+            offset += _EVENT_HEADER.size + length
+            name = os.fsdecode(name_bytes.rstrip(b'\0'))
+
+            if mask & IN_Q_OVERFLOW:
+                changes.sources = changes.environment = True
+                continue
+
+            if mask & IN_IGNORED:
+                self._watches.pop(wd, None)
+                continue
+
+            watched = self._watches.get(wd)
+            if watched is None:
+                continue
+            directory, is_site = watched
+
+            if is_site:
+                changes.environment = True
+            elif mask & IN_ISDIR:
+                if mask & (IN_CREATE | IN_MOVED_TO):
+                    self._watch_new_directory(directory / name)
+                changes.sources = True
+            elif name.endswith('.py') or mask & IN_DELETE_SELF:
+                changes.sources = True
+
+    def _watch_new_directory(self, directory: Path) -> None:
+        # Pruned exactly as the initial walk would have, with patterns relative to the root
+        try:
+            for subdirectory in iter_dirs(self.root, exclude_globs=self.exclude_globs, start=directory):
+                self._add_watch(subdirectory, PROJECT_MASK, is_site=False)
+        except OSError:
+            pass
+
+    def close(self) -> None:
+        if self._fd >= 0:
+            os.close(self._fd)
+            self._fd = -1
+
+
+def create_watcher(root: Path, exclude_globs: Iterable[str] = (), interval: float = 1.0):
+    """Create an inotify watcher on Linux, falling back to polling elsewhere or on failure."""
+    if sys.platform.startswith('linux'):
+        try:
+            return InotifyWatcher(root, exclude_globs)
+        except (OSError, AttributeError):
+            pass
+    return PollingWatcher(root, exclude_globs, interval)
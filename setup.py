@@ -13,6 +13,7 @@ setup(
     name="ipip",
     version="0.1.0",
     packages=find_packages(),
+    package_data={"ipip": ["data/*.json"]},
     author="Cody Serino (Zero)",
     author_email="iamtheoriginalzero@gmail.com",
     description="Intelligent pip package installer using AI to resolve package names",